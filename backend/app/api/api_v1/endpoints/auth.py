@@ -1,14 +1,16 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import uuid
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.schemas.auth import (
     UserCreate, 
     UserResponse, 
@@ -18,24 +20,25 @@ from app.schemas.auth import (
     UserUpdate
 )
 from app.models.database import User, UserRole
-from app.repositories.base import BaseRepository
+from app.repositories.base import AsyncBaseRepository
 
 router = APIRouter()
 security = HTTPBearer()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-class UserRepository(BaseRepository[User]):
-    def __init__(self, db: Session):
+class UserRepository(AsyncBaseRepository[User]):
+    def __init__(self, db: AsyncSession):
         super().__init__(db, User)
     
-    def get_by_email(self, email: str) -> Optional[User]:
+    async def get_by_email(self, email: str) -> Optional[User]:
         """Get user by email address."""
-        return self.db.query(User).filter(User.email == email).first()
+        return await self.db.scalar(select(User).where(User.email == email))
     
-    def create_user(self, user_data: UserCreate) -> User:
+    async def create_user(self, user_data: UserCreate) -> User:
         """Create a new user with hashed password."""
-        hashed_password = pwd_context.hash(user_data.password)
+        # bcrypt is deliberately slow; keep it off the event loop
+        hashed_password = await run_in_threadpool(pwd_context.hash, user_data.password)
         
         user_dict = {
             "id": uuid.uuid4(),
@@ -48,17 +51,17 @@ class UserRepository(BaseRepository[User]):
             "is_active": True,
         }
         
-        return self.create(user_dict)
+        return await self.create(user_dict)
     
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify password against hash."""
-        return pwd_context.verify(plain_password, hashed_password)
+        return await run_in_threadpool(pwd_context.verify, plain_password, hashed_password)
     
-    def update_last_login(self, user_id: uuid.UUID) -> None:
+    async def update_last_login(self, user_id: uuid.UUID) -> None:
         """Update user's last login timestamp."""
-        user = self.get(user_id)
+        user = await self.get(user_id)
         if user:
-            self.update(user, {"last_login": datetime.utcnow()})
+            await self.update(user, {"last_login": datetime.utcnow()})
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -74,9 +77,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current authenticated user from JWT token."""
     credentials_exception = HTTPException(
@@ -95,7 +98,7 @@ def get_current_user(
         raise credentials_exception
     
     user_repo = UserRepository(db)
-    user = user_repo.get(uuid.UUID(token_data.user_id))
+    user = await user_repo.get(uuid.UUID(token_data.user_id))
     if user is None:
         raise credentials_exception
     
@@ -108,7 +111,7 @@ def get_current_user(
     return user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -116,14 +119,14 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user account.
     """
     user_repo = UserRepository(db)
     
     # Check if user already exists
-    existing_user = user_repo.get_by_email(user_data.email)
+    existing_user = await user_repo.get_by_email(user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -132,7 +135,7 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     
     # Create new user
     try:
-        user = user_repo.create_user(user_data)
+        user = await user_repo.create_user(user_data)
         return UserResponse(
             id=str(user.id),
             email=user.email,
@@ -154,14 +157,14 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login_for_access_token(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login_for_access_token(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate user and return access token.
     """
     user_repo = UserRepository(db)
     
     # Get user by email
-    user = user_repo.get_by_email(login_data.email)
+    user = await user_repo.get_by_email(login_data.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -170,7 +173,7 @@ async def login_for_access_token(login_data: LoginRequest, db: Session = Depends
         )
     
     # Verify password
-    if not user_repo.verify_password(login_data.password, user.password_hash):
+    if not await user_repo.verify_password(login_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -192,7 +195,7 @@ async def login_for_access_token(login_data: LoginRequest, db: Session = Depends
     )
     
     # Update last login
-    user_repo.update_last_login(user.id)
+    await user_repo.update_last_login(user.id)
     
     return LoginResponse(
         access_token=access_token,
@@ -238,7 +241,7 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
 async def update_user_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update current user's profile.
@@ -260,7 +263,7 @@ async def update_user_profile(
             detail="No valid fields to update"
         )
     
-    updated_user = user_repo.update(current_user, update_data)
+    updated_user = await user_repo.update(current_user, update_data)
     
     return UserResponse(
         id=str(updated_user.id),
@@ -1,38 +1,260 @@
 
+import mimetypes
 import os
+import re
 import uuid
-import aiofiles
-from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, RedirectResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from loguru import logger
 import time
 
 from app.core.config import settings
-from app.core.database import get_db
-from app.services.document_processor import document_processor
+from app.core.database import get_async_db, get_db
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.services.blob_storage import BLOB_KEY_PATTERN, blob_store
+from app.services.document_counts import COUNT_ESTIMATED, COUNT_MODES, document_counter
+from app.services.file_response import RangeFileResponse, content_disposition
+from app.services.job_scheduler import QueueFullError, job_scheduler
+from app.services.result_cache import result_cache
+from app.services.stage_cache import BY_BLOCK, RAN, stage_cache
+from app.services.text_index import TextIndex
+from app.services.upload_storage import (
+    MULTIPART_OVERHEAD,
+    ReceivedFile,
+    UploadFormError,
+    UploadRangeError,
+    UploadTooLargeError,
+    create_partial_file,
+    hash_file,
+    receive_multipart_file,
+    save_zip_entries,
+    write_range,
+)
 from app.schemas.document import (
+    BulkUploadItem,
+    BulkUploadResponse,
+    ChunkPage,
     DocumentResponse, 
     DocumentProcessResponse, 
     DocumentListResponse,
-    ProcessedDocument
+    DocumentSummary,
+    DocumentVersionResponse,
+    EntityPage,
+    ProcessedDocument,
+    SectionPage,
+    SentencePage,
+    UploadSessionCreate,
+    UploadSessionResponse,
 )
-from app.repositories.document_repository import DocumentRepository
-from app.models.database import DocumentStatus, User
+from app.repositories.document_repository import AsyncDocumentRepository, DocumentRepository
+from app.repositories.document_version_repository import DocumentVersionRepository
+from app.repositories.upload_session_repository import AsyncUploadSessionRepository, UploadSessionRepository
+from app.models.database import Document, DocumentStatus, ProcessingJobStatus, UploadSession, User, UserRole
 from app.api.api_v1.endpoints.auth import get_current_active_user # Import authentication dependency
 
 router = APIRouter()
 
+# Content-Range of a resumable upload chunk: bytes start-end/total, end inclusive
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+# Document column behind each field of a listed document, for fields=
+DOCUMENT_LIST_FIELDS = {
+    "id": "id",
+    "filename": "file_name",
+    "title": "title",
+    "file_path": "file_path",
+    "file_size": "file_size",
+    "mime_type": "mime_type",
+    "content_hash": "content_hash",
+    "version": "version",
+    "status": "status",
+    "processed": "processed",
+    "word_count": "word_count",
+    "sentence_count": "sentence_count",
+    "processing_time": "processing_time",
+    "error_message": "error_message",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+
+# Document columns read by the status endpoint, which is polled during processing
+DOCUMENT_STATUS_COLUMNS = (
+    "status",
+    "processed",
+    "word_count",
+    "sentence_count",
+    "processing_time",
+    "error_message",
+    "processing_stages",
+    "created_at",
+    "updated_at",
+)
+
+# Document columns and value of each field of a processed document, for fields=
+PROCESSED_DOCUMENT_FIELDS: Dict[str, Tuple[Tuple[str, ...], Callable[[Document], Any]]] = {
+    "document_id": (("id",), lambda document: str(document.id)),
+    "filename": (("file_name",), lambda document: document.file_name),
+    "title": (("title",), lambda document: document.title),
+    "raw_text": (("raw_text",), lambda document: document.raw_text or ""),
+    # Documents processed before cleaned_text and the offsets fall back to raw_text and processed_chunks
+    "cleaned_text": (("cleaned_text", "raw_text"), lambda document: document.cleaned_text or document.raw_text or ""),
+    "metadata": (("document_metadata",), lambda document: document.document_metadata or {}),
+    "sentences": (("cleaned_text", "sentence_offsets", "raw_text"), lambda document: _document_sentences(document)),
+    "sections": (("sections",), lambda document: document.sections or []),
+    "entities": (("entities",), lambda document: document.entities or []),
+    "key_phrases": (("key_phrases",), lambda document: document.key_phrases or []),
+    "chunks": (
+        ("cleaned_text", "sentence_offsets", "chunk_offsets", "processed_chunks"),
+        lambda document: _document_chunks(document),
+    ),
+    "word_count": (("word_count",), lambda document: document.word_count or 0),
+    "sentence_count": (("sentence_count",), lambda document: document.sentence_count or 0),
+    "processing_time": (("processing_time",), lambda document: document.processing_time or 0),
+    "created_at": (("created_at",), lambda document: document.created_at),
+    "updated_at": (("updated_at",), lambda document: document.updated_at),
+}
+
+
+def _validate_upload(file: UploadFile) -> str:
+    """Check an upload's name, type and declared size; returns its extension."""
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No filename provided")
+    
+    file_extension = Path(file.filename).suffix.lower()
+    if file_extension not in settings.ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type {file_extension} not supported. Allowed: {settings.ALLOWED_EXTENSIONS}"
+        )
+    
+    # Reject early when the client declared the size up front
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
+        )
+    
+    return file_extension
+
+
+# Request body of the single-file uploads, which read it themselves
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                },
+            },
+        },
+    },
+}
+
 
-@router.post("/upload", response_model=DocumentResponse)
-async def upload_document(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
+    )
+
+
+async def _receive_upload(request: Request) -> AsyncIterator[ReceivedFile]:
+    """
+    Receive the ``file`` part of a single-file upload into the incoming directory.
+    
+    The body is parsed as it arrives, so the file is written to disk once
+    and an oversized upload is rejected from its ``Content-Length``, or as
+    soon as too many bytes have arrived, instead of after it has been
+    spooled in full. The file is removed after the response unless the
+    endpoint has stored it.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        raise _file_too_large()
+    
+    try:
+        upload = await receive_multipart_file(
+            request.stream(),
+            request.headers.get("content-type", ""),
+            "file",
+            blob_store.incoming_path,
+            settings.ALLOWED_EXTENSIONS,
+        )
+    except UploadTooLargeError:
+        raise _file_too_large()
+    except UploadFormError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        yield upload
+    finally:
+        upload.path.unlink(missing_ok=True)
+
+
+def _admit_upload(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> None:
+    """Push back before the file is received when the user's processing backlog is full."""
+    try:
+        job_scheduler.check_admission(db, current_user.id)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def _create_document(db: Session, document_repo: DocumentRepository, document_data: Dict) -> Tuple[Document, str]:
+    """
+    Create the document for a stored upload and queue its processing.
+    
+    Returns:
+        The document and a status message for the client
+    """
+    # Identical content processed by the current pipeline is reused as is
+    cached_result = result_cache.lookup(db, document_data["content_hash"])
+    if cached_result:
+        document_data.update(
+            cached_result,
+            processed=True,
+            status=DocumentStatus.COMPLETED,
+            processing_time=0,
+        )
+    
+    document = document_repo.create(document_data)
+    
+    if cached_result:
+        return document, "Identical document already processed. Results reused."
+    
+    job = job_scheduler.submit(db, document)
+    if job.status == ProcessingJobStatus.ATTACHED:
+        return document, "Identical document is already being processed. Results will be shared."
+    
+    job_scheduler.dispatch()
+    return document, "Document uploaded successfully. Processing queued."
+
+
+@router.post(
+    "/upload",
+    response_model=DocumentResponse,
+    dependencies=[Depends(_admit_upload)],
+    openapi_extra=UPLOAD_REQUEST_BODY,
+)
+def upload_document(
     title: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user), # Dependency Injection for current user
+    upload: ReceivedFile = Depends(_receive_upload),
 ):
     """
     Upload and process a document.
@@ -44,62 +266,447 @@ async def upload_document(
     document_repo = DocumentRepository(db)
     
     try:
-        # Validate file
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="No filename provided")
+        document_id = str(uuid.uuid4())
         
-        file_extension = Path(file.filename).suffix.lower()
-        if file_extension not in settings.ALLOWED_EXTENSIONS:
+        storage_key = blob_store.store(
+            db, upload.path, upload.content_hash, upload.size, Path(upload.filename).suffix
+        )
+        
+        logger.info(f"File uploaded successfully by user {current_user.id}: {storage_key}")
+        
+        # Create document record in database
+        document_data = {
+            "id": uuid.UUID(document_id),
+            "title": title or upload.filename,
+            "file_name": upload.filename,
+            "file_path": storage_key,
+            "file_size": upload.size,
+            "content_hash": upload.content_hash,
+            "mime_type": upload.content_type or "application/octet-stream",
+            # REMOVED MOCK DATA: Use the authenticated user's ID
+            "uploaded_by": current_user.id,
+            "status": DocumentStatus.UPLOADED,
+        }
+        
+        try:
+            document, message = _create_document(db, document_repo, document_data)
+        except Exception:
+            db.rollback()
+            blob_store.release(db, storage_key)
+            raise
+        
+        processing_time = time.time() - start_time
+        
+        return DocumentResponse(
+            id=str(document.id),
+            filename=document.file_name,
+            file_path=document.file_path,
+            file_size=document.file_size,
+            mime_type=document.mime_type,
+            status=document.status,
+            message=message,
+            processing_time=processing_time,
+            created_at=document.created_at, # Added created_at to response
+            title=document.title,
+            content_hash=document.content_hash,
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error uploading document: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/upload/bulk", response_model=BulkUploadResponse)
+def upload_documents_bulk(
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Upload several documents, or ZIP archives of documents, in one request.
+    
+    Every file is streamed to storage; ZIP archives are unpacked entry by
+    entry. All documents are created in one transaction and queued for
+    processing together. Files that cannot be accepted are reported
+    individually and do not fail the others.
+    """
+    start_time = time.time()
+    document_repo = DocumentRepository(db)
+    
+    try:
+        if len(files) > settings.BULK_UPLOAD_MAX_FILES:
             raise HTTPException(
                 status_code=400,
-                detail=f"File type {file_extension} not supported. Allowed: {settings.ALLOWED_EXTENSIONS}"
+                detail=f"Too many files. Maximum per upload: {settings.BULK_UPLOAD_MAX_FILES}"
+            )
+        
+        try:
+            job_scheduler.check_admission(db, current_user.id)
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
             )
         
-        content = await file.read()
+        # Stored files and rejections, in upload order
+        entries = []
+        stored = 0
+        total_size = 0
+        
+        try:
+            for file in files:
+                remaining_files = settings.BULK_UPLOAD_MAX_FILES - stored
+                remaining_size = settings.BULK_UPLOAD_MAX_TOTAL_SIZE - total_size
+                
+                if Path(file.filename or "").suffix.lower() == ".zip":
+                    # The archive is spooled to disk by the server; its entries are read one at a time
+                    archive_entries = save_zip_entries(
+                        file.file, blob_store.incoming_dir, remaining_files, remaining_size
+                    )
+                    entries.extend(archive_entries)
+                    for entry in archive_entries:
+                        entry["filename"] = f"{file.filename}/{entry['filename']}".rstrip("/")
+                        if "error" not in entry:
+                            entry["storage_key"] = blob_store.store(
+                                db,
+                                Path(entry.pop("file_path")),
+                                entry["content_hash"],
+                                entry["file_size"],
+                                Path(entry["file_name"]).suffix,
+                            )
+                else:
+                    entries.append(_save_bulk_file(db, file, remaining_files, remaining_size))
+                
+                accepted = [entry for entry in entries if "error" not in entry]
+                stored = len(accepted)
+                total_size = sum(entry["file_size"] for entry in accepted)
+            
+            # One transaction for all documents
+            rows = []
+            for entry in entries:
+                if "error" in entry:
+                    continue
+                
+                row = {
+                    "id": entry["id"],
+                    "title": entry["file_name"],
+                    "file_name": entry["file_name"],
+                    "file_path": entry["storage_key"],
+                    "file_size": entry["file_size"],
+                    "content_hash": entry["content_hash"],
+                    "mime_type": entry["mime_type"],
+                    "uploaded_by": current_user.id,
+                    "status": DocumentStatus.UPLOADED,
+                }
+                
+                cached_result = result_cache.lookup(db, entry["content_hash"])
+                if cached_result:
+                    row.update(
+                        cached_result,
+                        processed=True,
+                        status=DocumentStatus.COMPLETED,
+                        processing_time=0,
+                    )
+                    entry["message"] = "Identical document already processed. Results reused."
+                rows.append(row)
+                entry["status"] = row["status"]
+            
+            documents = document_repo.create_many(rows)
+        except BaseException:
+            db.rollback()
+            for entry in entries:
+                if "storage_key" in entry:
+                    blob_store.release(db, entry["storage_key"])
+                elif "file_path" in entry:
+                    # Extracted but not stored yet
+                    Path(entry["file_path"]).unlink(missing_ok=True)
+            raise
+        
+        logger.info(f"Bulk upload by user {current_user.id}: {len(documents)} documents created")
+        
+        # Queue all documents, then fill the free slots once
+        jobs = {}
+        for document in documents:
+            if document.status != DocumentStatus.COMPLETED:
+                jobs[document.id] = job_scheduler.submit(db, document)
+        if jobs:
+            job_scheduler.dispatch()
+        
+        items = []
+        for entry in entries:
+            if "error" in entry:
+                items.append(BulkUploadItem(filename=entry["filename"], accepted=False, message=entry["error"]))
+                continue
+            
+            job = jobs.get(entry["id"])
+            if job is None:
+                message = entry["message"]
+            elif job.status == ProcessingJobStatus.ATTACHED:
+                message = "Identical document is already being processed. Results will be shared."
+            else:
+                message = "Document uploaded successfully. Processing queued."
+            
+            items.append(BulkUploadItem(
+                filename=entry["filename"],
+                accepted=True,
+                document_id=str(entry["id"]),
+                status=entry["status"],
+                file_size=entry["file_size"],
+                content_hash=entry["content_hash"],
+                message=message,
+            ))
         
-        if len(content) > settings.MAX_FILE_SIZE:
+        return BulkUploadResponse(
+            documents=items,
+            accepted=len(documents),
+            rejected=len(items) - len(documents),
+            processing_time=time.time() - start_time,
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _save_bulk_file(db: Session, file: UploadFile, remaining_files: int, remaining_size: int) -> Dict:
+    """Store one plain file of a bulk upload, or describe why it was rejected."""
+    filename = file.filename or ""
+    try:
+        file_extension = _validate_upload(file)
+    except HTTPException as e:
+        return {"filename": filename, "error": e.detail}
+    
+    if remaining_files <= 0:
+        return {"filename": filename, "error": "Too many files in one upload"}
+    
+    try:
+        storage_key, file_size, content_hash = blob_store.save_upload(
+            db, file.file, file_extension, max_size=min(settings.MAX_FILE_SIZE, remaining_size)
+        )
+    except UploadTooLargeError as e:
+        if e.max_size == settings.MAX_FILE_SIZE:
+            return {"filename": filename, "error": f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"}
+        return {"filename": filename, "error": "Upload exceeds the total size limit"}
+    
+    return {
+        "filename": filename,
+        "id": uuid.uuid4(),
+        "file_name": filename,
+        "storage_key": storage_key,
+        "file_size": file_size,
+        "content_hash": content_hash,
+        "mime_type": file.content_type or "application/octet-stream",
+    }
+
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=201)
+def create_upload_session(
+    upload: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Start a resumable upload.
+    
+    Send the file's bytes with ``PUT /uploads/{upload_id}`` in chunks of any
+    size and in any order, each with a ``Content-Range: bytes start-end/total``
+    header. After an interruption, ``GET /uploads/{upload_id}`` tells which
+    ranges are missing. ``POST /uploads/{upload_id}/complete`` creates the
+    document once every byte has arrived.
+    """
+    session_repo = UploadSessionRepository(db)
+    
+    try:
+        file_extension = Path(upload.filename).suffix.lower()
+        if file_extension not in settings.ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type {file_extension} not supported. Allowed: {settings.ALLOWED_EXTENSIONS}"
+            )
+        if upload.file_size > settings.MAX_FILE_SIZE:
             raise HTTPException(
                 status_code=413,
                 detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
             )
         
-        document_id = str(uuid.uuid4())
-        safe_filename = f"{document_id}{file_extension}"
+        try:
+            job_scheduler.check_admission(db, current_user.id)
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
         
-        upload_dir = Path(settings.UPLOAD_DIR)
-        upload_dir.mkdir(exist_ok=True)
+        _remove_expired_upload_sessions(session_repo)
+        if session_repo.count_for_user(current_user.id) >= settings.UPLOAD_SESSION_MAX_PER_USER:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Too many unfinished uploads (limit {settings.UPLOAD_SESSION_MAX_PER_USER})",
+            )
         
-        file_path = upload_dir / safe_filename
+        # Partial data is kept next to the final file, so completing is a rename
+        upload_id = uuid.uuid4()
+        file_path = Path(settings.UPLOAD_DIR) / f".upload-{upload_id}{file_extension}.part"
+        create_partial_file(file_path, upload.file_size)
         
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
+        session = session_repo.create({
+            "id": upload_id,
+            "user_id": current_user.id,
+            "file_name": upload.filename,
+            "title": upload.title,
+            "mime_type": upload.mime_type,
+            "file_size": upload.file_size,
+            "file_path": str(file_path),
+            "received": [],
+            "expires_at": _upload_session_expiry(),
+        })
         
-        logger.info(f"File uploaded successfully by user {current_user.id}: {safe_filename}")
+        logger.info(f"Resumable upload {upload_id} started by user {current_user.id}: {upload.filename}")
+        return _upload_session_response(session, session.received)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting upload: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+def get_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Get the ranges of a resumable upload that have been received and that are missing.
+    """
+    session = _get_upload_session(db, upload_id, current_user)
+    return _upload_session_response(session, session.received)
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    content_range: str = Header(..., description="bytes start-end/total, end inclusive"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Store one chunk of a resumable upload.
+    
+    The request body is written at its offset as it arrives. The range is
+    acknowledged only once the whole chunk is on disk, so a chunk that
+    breaks off is simply sent again.
+    """
+    session_repo = AsyncUploadSessionRepository(db)
+    session = await session_repo.get_for_user(_upload_session_id(upload_id), current_user.id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    match = CONTENT_RANGE_PATTERN.fullmatch(content_range.strip())
+    if not match:
+        raise HTTPException(status_code=400, detail="Content-Range must be 'bytes start-end/total'")
+    
+    start, end, total = (int(value) for value in match.groups())
+    if total != session.file_size or start > end or end >= session.file_size:
+        raise HTTPException(
+            status_code=416,
+            detail=f"Range {start}-{end}/{total} is outside the upload of {session.file_size} bytes",
+            headers={"Content-Range": f"bytes */{session.file_size}"},
+        )
+    
+    try:
+        await write_range(request.stream(), Path(session.file_path), start, end - start + 1)
+    except UploadRangeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        # Completed or cancelled by another request meanwhile
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    received = await session_repo.add_range(session, start, end + 1, _upload_session_expiry())
+    return _upload_session_response(session, received)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=DocumentResponse)
+def complete_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Create the document of a finished resumable upload and queue its processing.
+    
+    The partial file is handed to storage as it is; with local storage that
+    is a rename, so the data is not copied again.
+    """
+    start_time = time.time()
+    session_repo = UploadSessionRepository(db)
+    document_repo = DocumentRepository(db)
+    session = _get_upload_session(db, upload_id, current_user)
+    
+    if session.received != [[0, session.file_size]]:
+        missing = _missing_ranges(session.received, session.file_size)
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: {sum(end - start for start, end in missing)} bytes missing",
+        )
+    
+    try:
+        try:
+            job_scheduler.check_admission(db, current_user.id)
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        
+        # Claiming the partial file by renaming it fails for concurrent requests
+        file_extension = Path(session.file_name).suffix
+        incoming_path = blob_store.incoming_path(file_extension)
+        incoming_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(session.file_path, incoming_path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=409, detail="Upload is already being completed")
+        
+        try:
+            content_hash = hash_file(incoming_path)
+        except BaseException:
+            os.replace(incoming_path, session.file_path)
+            raise
+        storage_key = blob_store.store(db, incoming_path, content_hash, session.file_size, file_extension)
         
-        # Create document record in database
         document_data = {
-            "id": uuid.UUID(document_id),
-            "title": title or file.filename,
-            "file_name": file.filename,
-            "file_path": str(file_path),
-            "file_size": len(content),
-            "mime_type": file.content_type or "application/octet-stream",
-            # REMOVED MOCK DATA: Use the authenticated user's ID
+            "id": session.id,
+            "title": session.title or session.file_name,
+            "file_name": session.file_name,
+            "file_path": storage_key,
+            "file_size": session.file_size,
+            "content_hash": content_hash,
+            "mime_type": session.mime_type or "application/octet-stream",
             "uploaded_by": current_user.id,
             "status": DocumentStatus.UPLOADED,
         }
         
-        document = document_repo.create(document_data)
-        
-        background_tasks.add_task(
-            process_document_background,
-            document_id,
-            str(file_path),
-            file_extension[1:],
-            file.filename
-        )
+        try:
+            document, message = _create_document(db, document_repo, document_data)
+        except Exception:
+            # The data has been moved to storage, so the upload cannot be completed again
+            db.rollback()
+            blob_store.release(db, storage_key)
+            session_repo.delete(session.id)
+            raise
         
-        processing_time = time.time() - start_time
+        session_repo.delete(session.id)
+        logger.info(f"Resumable upload {upload_id} completed by user {current_user.id}")
         
         return DocumentResponse(
             id=str(document.id),
@@ -108,32 +715,125 @@ async def upload_document(
             file_size=document.file_size,
             mime_type=document.mime_type,
             status=document.status,
-            message="Document uploaded successfully. Processing in background.",
-            processing_time=processing_time,
-            created_at=document.created_at, # Added created_at to response
+            message=message,
+            processing_time=time.time() - start_time,
+            created_at=document.created_at,
             title=document.title,
+            content_hash=document.content_hash,
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error uploading document: {str(e)}")
+        logger.error(f"Error completing upload {upload_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.delete("/uploads/{upload_id}")
+def cancel_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Cancel a resumable upload and discard its data.
+    """
+    session = _get_upload_session(db, upload_id, current_user)
+    Path(session.file_path).unlink(missing_ok=True)
+    UploadSessionRepository(db).delete(session.id)
+    return {"message": "Upload cancelled"}
+
+
+def _get_upload_session(db: Session, upload_id: str, current_user: User) -> UploadSession:
+    """Get an unexpired upload session of the current user, or respond with 404."""
+    session = UploadSessionRepository(db).get_for_user(_upload_session_id(upload_id), current_user.id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+def _upload_session_id(upload_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(upload_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+def _upload_session_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+
+
+def _missing_ranges(received: List[List[int]], file_size: int) -> List[List[int]]:
+    """The gaps between the received ranges."""
+    missing = []
+    position = 0
+    for start, end in received:
+        if start > position:
+            missing.append([position, start])
+        position = max(position, end)
+    if position < file_size:
+        missing.append([position, file_size])
+    return missing
+
+
+def _upload_session_response(session: UploadSession, received: List[List[int]]) -> UploadSessionResponse:
+    offset = received[0][1] if received and received[0][0] == 0 else 0
+    return UploadSessionResponse(
+        upload_id=str(session.id),
+        filename=session.file_name,
+        file_size=session.file_size,
+        offset=offset,
+        received=received,
+        missing=_missing_ranges(received, session.file_size),
+        complete=offset == session.file_size,
+        expires_at=session.expires_at,
+    )
+
+
+def _remove_expired_upload_sessions(session_repo: UploadSessionRepository) -> None:
+    """Discard the data and sessions of uploads that were abandoned."""
+    for session in session_repo.get_expired():
+        Path(session.file_path).unlink(missing_ok=True)
+        session_repo.delete(session.id)
+
+
 @router.get("", response_model=DocumentListResponse)
 async def get_documents(
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor of a previous page"),
+    skip: int = Query(0, ge=0, description="Offset for clients not yet using cursors"),
     limit: int = Query(10, ge=1, le=100),
     user_id: Optional[str] = Query(None),
     status: Optional[DocumentStatus] = Query(None),
-    db: Session = Depends(get_db),
+    count: str = Query(COUNT_ESTIMATED, pattern=f"^({'|'.join(COUNT_MODES)})$", description="How to compute total"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields of each document to return"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Get list of documents with filtering and pagination.
+    Get list of documents with filtering and pagination, newest first.
+    
+    Pages are addressed by opaque cursors on ``(created_at, id)``, so every
+    page costs the same however deep it is. ``count=estimated`` returns the
+    planner's estimate of the total for large listings, ``count=exact`` an
+    exact total cached for a short time, and ``count=none`` skips it.
+    
+    Processing results are never loaded for a listing; with ``fields`` only
+    the columns behind the requested fields are.
     """
     try:
-        document_repo = DocumentRepository(db)
+        document_repo = AsyncDocumentRepository(db)
+        selected = _parse_fields(fields, DOCUMENT_LIST_FIELDS)
+        columns = None
+        if selected:
+            # Cursors are built from created_at and id
+            columns = sorted({DOCUMENT_LIST_FIELDS[field] for field in selected} | {"created_at", "id"})
+        
+        position, backwards = None, False
+        if cursor:
+            try:
+                position, backwards = _decode_document_cursor(cursor)
+            except InvalidCursorError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            skip = 0
         
         # Build filters
         filters = {}
@@ -143,101 +843,605 @@ async def get_documents(
             filters["status"] = status
         
         # Get documents
-        documents = document_repo.get_multi(skip=skip, limit=limit, filters=filters)
-        total = document_repo.count(filters=filters)
+        documents, has_more = await document_repo.get_page(
+            limit, filters=filters, position=position, backwards=backwards, skip=skip, fields=columns
+        )
+        total, total_estimated = await document_counter.count(db, filters, count)
+        
+        if backwards:
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, bool(cursor) or skip > 0
         
         # Convert to response format
-        document_responses = [
-            DocumentResponse(
-                id=str(doc.id),
-                filename=doc.file_name,
-                file_path=doc.file_path,
-                file_size=doc.file_size,
-                mime_type=doc.mime_type,
-                status=doc.status,
-                message="",
-                created_at=doc.created_at,
-                title=doc.title,
-                processed=doc.processed,
-                word_count=doc.word_count or 0,
-                sentence_count=doc.sentence_count or 0,
-            )
-            for doc in documents
-        ]
+        if selected:
+            document_responses = [_sparse_document(doc, selected) for doc in documents]
+        else:
+            document_responses = [
+                DocumentResponse(
+                    id=str(doc.id),
+                    filename=doc.file_name,
+                    file_path=doc.file_path,
+                    file_size=doc.file_size,
+                    mime_type=doc.mime_type,
+                    status=doc.status,
+                    message="",
+                    created_at=doc.created_at,
+                    title=doc.title,
+                    processed=doc.processed,
+                    word_count=doc.word_count or 0,
+                    sentence_count=doc.sentence_count or 0,
+                )
+                for doc in documents
+            ]
         
         return DocumentListResponse(
             documents=document_responses,
             total=total,
-            page=skip // limit + 1,
+            total_estimated=total_estimated,
+            page=None if cursor else skip // limit + 1,
             per_page=limit,
-            has_next=skip + limit < total,
-            has_prev=skip > 0,
+            has_next=has_next,
+            has_prev=has_prev,
+            next_cursor=_document_cursor(documents[-1], backwards=False) if has_next and documents else None,
+            prev_cursor=_document_cursor(documents[0], backwards=True) if has_prev and documents else None,
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting documents: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/{document_id}", response_model=ProcessedDocument)
+def _parse_fields(fields: Optional[str], allowed) -> Optional[List[str]]:
+    """The fields of a sparse fieldset, or ``None`` for all fields."""
+    if not fields:
+        return None
+    selected = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected or None
+
+
+def _sparse_document(document: Document, fields: List[str]) -> Dict[str, Any]:
+    """The requested fields of a listed document."""
+    values = {}
+    for field in fields:
+        value = getattr(document, DOCUMENT_LIST_FIELDS[field])
+        if field == "id":
+            value = str(value)
+        elif field in ("word_count", "sentence_count"):
+            value = value or 0
+        values[field] = value
+    return values
+
+
+def _text_index(document: Document) -> TextIndex:
+    return TextIndex(document.cleaned_text, document.sentence_offsets, document.chunk_offsets)
+
+
+def _document_sentences(document: Document) -> List[str]:
+    if document.sentence_offsets is None:
+        return document.raw_text.split(".") if document.raw_text else []
+    # Only the sentence columns are loaded for fields=sentences
+    return TextIndex(document.cleaned_text, document.sentence_offsets, None).sentences()
+
+
+def _document_chunks(document: Document) -> List[Dict[str, Any]]:
+    if document.chunk_offsets is None:
+        return [_legacy_chunk(chunk) for chunk in document.processed_chunks or []]
+    return _text_index(document).chunks()
+
+
+def _legacy_chunk(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    # Chunks stored with their text, before chunk offsets
+    return {
+        "id": chunk.get("id", 0),
+        "text": chunk.get("text", ""),
+        "start_sentence": chunk.get("start_sentence", 0),
+        "end_sentence": chunk.get("end_sentence", 0),
+        "sentence_count": chunk.get("sentence_count", 0),
+    }
+
+
+def _chunk_count(document: Document) -> int:
+    if document.chunk_offsets is None:
+        return len(document.processed_chunks) if document.processed_chunks else 0
+    return _text_index(document).chunk_count
+
+
+def _document_cursor(document: Document, backwards: bool) -> str:
+    """Cursor of the page after ``document``, or before it when ``backwards`` is set."""
+    created_at = document.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return encode_cursor({"t": created_at.isoformat(), "id": str(document.id), "b": backwards})
+
+
+def _decode_document_cursor(cursor: str) -> Tuple[Tuple[datetime, uuid.UUID], bool]:
+    position = decode_cursor(cursor)
+    try:
+        created_at = datetime.fromisoformat(position["t"])
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return (created_at, uuid.UUID(position["id"])), bool(position.get("b"))
+    except (KeyError, TypeError, ValueError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+@router.get("/queue/stats")
+def get_queue_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Get processing queue depth, running jobs and waiting times.
+    
+    Administrators see every user; other users see their own jobs only.
+    """
+    try:
+        user_id = None if current_user.role == UserRole.ADMIN else current_user.id
+        return job_scheduler.stats(db, user_id=user_id)
+        
+    except Exception as e:
+        logger.error(f"Error getting queue stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{document_id}", response_model=Union[ProcessedDocument, DocumentSummary, Dict[str, Any]])
 async def get_document_by_id(
     document_id: str,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    summary: bool = Query(False, description="Return counts instead of the text and item lists"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
 ):
     """
     Get a specific document by ID with full processing details.
+    
+    With ``fields`` only the requested fields are returned, and only the
+    columns behind them are loaded. With ``summary`` the text, sentences,
+    chunks, entities and sections are replaced by their counts; fetch the
+    ranges to display from the ``/sentences``, ``/chunks``, ``/entities``
+    and ``/sections`` sub-resources. Only the uploader and administrators
+    may read a document.
     """
     try:
-        document_repo = DocumentRepository(db)
-        document = document_repo.get(uuid.UUID(document_id))
+        document_repo = AsyncDocumentRepository(db)
+        await _check_can_view(document_repo, document_id, current_user)
+        
+        if summary:
+            row = await document_repo.get_summary(uuid.UUID(document_id))
+            if row is None:
+                raise HTTPException(status_code=404, detail="Document not found")
+            
+            return DocumentSummary(
+                document_id=str(row.id),
+                filename=row.file_name,
+                title=row.title,
+                metadata=row.document_metadata or {},
+                key_phrases=row.key_phrases or [],
+                word_count=row.word_count or 0,
+                sentence_count=row.sentence_count or 0,
+                chunk_count=row.chunk_count,
+                entity_count=row.entity_count,
+                section_count=row.section_count,
+                processing_time=row.processing_time or 0,
+                created_at=row.created_at,
+                updated_at=row.updated_at,
+            )
+        
+        selected = _parse_fields(fields, PROCESSED_DOCUMENT_FIELDS)
+        columns = None
+        if selected:
+            columns = sorted({column for field in selected for column in PROCESSED_DOCUMENT_FIELDS[field][0]})
+        
+        document = await document_repo.get(uuid.UUID(document_id), fields=columns)
         
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # Convert processed_chunks from JSONB to list of objects
-        chunks = []
-        if document.processed_chunks:
-            chunks = [
-                {
-                    "id": chunk.get("id", 0),
-                    "text": chunk.get("text", ""),
-                    "start_sentence": chunk.get("start_sentence", 0),
-                    "end_sentence": chunk.get("end_sentence", 0),
-                    "sentence_count": chunk.get("sentence_count", 0),
-                }
-                for chunk in document.processed_chunks
-            ]
+        values = {
+            field: value(document)
+            for field, (_, value) in PROCESSED_DOCUMENT_FIELDS.items()
+            if not selected or field in selected
+        }
+        if selected:
+            return {field: values[field] for field in selected}
+        
+        return ProcessedDocument(**values)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{document_id}/sentences", response_model=SentencePage)
+async def get_document_sentences(
+    document_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Get a range of a document's sentences; only their part of the text is read."""
+    try:
+        document_repo = AsyncDocumentRepository(db)
+        await _check_can_view(document_repo, document_id, current_user)
+        offsets = await document_repo.get_text_offsets(uuid.UUID(document_id))
+        if offsets is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        if offsets.sentence_offsets is None:
+            # Processed before sentences were stored
+            document = await document_repo.get(uuid.UUID(document_id), fields=("raw_text", "sentence_offsets"))
+            sentences = _document_sentences(document)
+            return _items_page(SentencePage, document_id, offset, limit, len(sentences), sentences[offset:offset + limit])
+        
+        text_index = await _load_text_range(
+            document_repo, document_id, offsets, lambda index: index.sentences_range(offset, offset + limit)
+        )
+        return _items_page(
+            SentencePage, document_id, offset, limit, text_index.sentence_count,
+            text_index.sentences(offset, offset + limit),
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting sentences of document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{document_id}/chunks", response_model=ChunkPage)
+async def get_document_chunks(
+    document_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Get a range of a document's chunks; only their part of the text is read."""
+    try:
+        document_repo = AsyncDocumentRepository(db)
+        await _check_can_view(document_repo, document_id, current_user)
+        offsets = await document_repo.get_text_offsets(uuid.UUID(document_id))
+        if offsets is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        if offsets.chunk_offsets is None:
+            # Processed before chunk offsets were stored
+            return await _array_page(
+                ChunkPage, document_repo, document_id, "processed_chunks", offset, limit, item=_legacy_chunk
+            )
+        
+        text_index = await _load_text_range(
+            document_repo, document_id, offsets, lambda index: index.chunks_range(offset, offset + limit)
+        )
+        return _items_page(
+            ChunkPage, document_id, offset, limit, text_index.chunk_count,
+            text_index.chunks(offset, offset + limit),
+        )
         
-        return ProcessedDocument(
-            document_id=str(document.id),
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting chunks of document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{document_id}/entities", response_model=EntityPage)
+async def get_document_entities(
+    document_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Get a range of a document's named entities, sliced in the database."""
+    try:
+        document_repo = AsyncDocumentRepository(db)
+        await _check_can_view(document_repo, document_id, current_user)
+        return await _array_page(EntityPage, document_repo, document_id, "entities", offset, limit)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting entities of document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{document_id}/sections", response_model=SectionPage)
+async def get_document_sections(
+    document_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Get a range of a document's sections, sliced in the database."""
+    try:
+        document_repo = AsyncDocumentRepository(db)
+        await _check_can_view(document_repo, document_id, current_user)
+        return await _array_page(SectionPage, document_repo, document_id, "sections", offset, limit)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting sections of document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _items_page(page_type, document_id: str, offset: int, limit: int, total: int, items: List[Any]):
+    return page_type(
+        document_id=document_id,
+        offset=offset,
+        limit=limit,
+        total=total,
+        has_more=offset + len(items) < total,
+        items=items,
+    )
+
+
+async def _check_can_view(document_repo: AsyncDocumentRepository, document_id: str, current_user: User) -> None:
+    """Raise unless the document exists and ``current_user`` owns it or is an admin."""
+    document = await document_repo.get(uuid.UUID(document_id), fields=("uploaded_by",))
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if document.uploaded_by != current_user.id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not allowed to view this document")
+
+
+async def _load_text_range(
+    document_repo: AsyncDocumentRepository,
+    document_id: str,
+    offsets,
+    text_range: Callable[[TextIndex], Tuple[int, int]],
+) -> TextIndex:
+    """Text index over just the part of the cleaned text that ``text_range`` selects."""
+    text_index = TextIndex(None, offsets.sentence_offsets, offsets.chunk_offsets, text_length=offsets.text_length)
+    start, end = text_range(text_index)
+    text = await document_repo.get_text_range(uuid.UUID(document_id), start, end)
+    return TextIndex(
+        text, offsets.sentence_offsets, offsets.chunk_offsets, text_start=start, text_length=offsets.text_length
+    )
+
+
+async def _array_page(
+    page_type,
+    document_repo: AsyncDocumentRepository,
+    document_id: str,
+    column: str,
+    offset: int,
+    limit: int,
+    item: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+):
+    """Page of a JSONB array column of a document, with ``item`` applied to each element."""
+    result = await document_repo.get_array_range(uuid.UUID(document_id), column, offset, offset + limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    items, total = result
+    if item is not None:
+        items = [item(element) for element in items]
+    return _items_page(page_type, document_id, offset, limit, total, items)
+
+
+@router.post("/{document_id}/versions", response_model=DocumentResponse, openapi_extra=UPLOAD_REQUEST_BODY)
+def upload_document_version(
+    document_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    upload: ReceivedFile = Depends(_receive_upload),
+):
+    """
+    Upload a revised file as the next version of a document.
+    
+    The new version is processed incrementally: only blocks of the document
+    that changed since the previous version are analysed again.
+    """
+    start_time = time.time()
+    document_repo = DocumentRepository(db)
+    version_repo = DocumentVersionRepository(db)
+    
+    try:
+        document = document_repo.get(uuid.UUID(document_id))
+        if not document:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        if document.uploaded_by != current_user.id and current_user.role != UserRole.ADMIN:
+            raise HTTPException(status_code=403, detail="Not allowed to revise this document")
+        
+        # The version cannot change under a running job
+        previous_status = document.status
+        if not document_repo.transition_status(
+            document.id,
+            [DocumentStatus.UPLOADED, DocumentStatus.COMPLETED, DocumentStatus.FAILED],
+            DocumentStatus.PROCESSING,
+        ):
+            raise HTTPException(status_code=409, detail="Document processing already in progress")
+        
+        storage_key = None
+        previous_fields = None
+        new_version = None
+        try:
+            job_scheduler.check_admission(db, document.uploaded_by)
+            
+            # Keep the file of the current version for the version history
+            version_repo.get_current(document)
+            next_version = document.version + 1
+            storage_key = blob_store.store(
+                db, upload.path, upload.content_hash, upload.size, Path(upload.filename).suffix
+            )
+            
+            revision = {
+                "version": next_version,
+                "file_name": upload.filename,
+                "file_path": storage_key,
+                "file_size": upload.size,
+                "content_hash": upload.content_hash,
+                "mime_type": upload.content_type or "application/octet-stream",
+                "processed": False,
+                "error_message": None,
+            }
+            previous_fields = {field: getattr(document, field) for field in revision}
+            document = document_repo.update(document, revision)
+            new_version = version_repo.create_for_document(document)
+            job_scheduler.submit(db, document)
+        except Exception as e:
+            db.rollback()
+            if previous_fields is not None and document.version == previous_fields["version"] + 1:
+                # The new version was already committed; go back to the previous one
+                if new_version is not None:
+                    version_repo.delete(new_version.id)
+                document = document_repo.update(document, previous_fields)
+            document_repo.transition_status(document.id, [DocumentStatus.PROCESSING], previous_status)
+            if storage_key is not None:
+                blob_store.release(db, storage_key)
+            if isinstance(e, QueueFullError):
+                raise HTTPException(
+                    status_code=429,
+                    detail=str(e),
+                    headers={"Retry-After": str(e.retry_after)},
+                )
+            raise
+        job_scheduler.dispatch()
+        
+        logger.info(f"Version {document.version} of document {document.id} uploaded by user {current_user.id}")
+        
+        return DocumentResponse(
+            id=str(document.id),
             filename=document.file_name,
-            title=document.title,
-            raw_text=document.raw_text or "",
-            cleaned_text=document.raw_text or "",  # TODO: Store cleaned text separately
-            metadata=document.metadata or {},
-            sentences=document.raw_text.split(".") if document.raw_text else [],
-            sections=document.sections or [],
-            entities=document.entities or [],
-            key_phrases=[],  # TODO: Extract from processed data
-            chunks=chunks,
-            word_count=document.word_count or 0,
-            sentence_count=document.sentence_count or 0,
-            processing_time=document.processing_time or 0,
+            file_path=document.file_path,
+            file_size=document.file_size,
+            mime_type=document.mime_type,
+            status=DocumentStatus.PROCESSING,
+            message=f"Version {document.version} uploaded. Processing queued.",
+            processing_time=time.time() - start_time,
             created_at=document.created_at,
             updated_at=document.updated_at,
+            title=document.title,
+            content_hash=document.content_hash,
+            version=document.version,
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting document {document_id}: {str(e)}")
+        logger.error(f"Error uploading version of document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{document_id}/versions", response_model=List[DocumentVersionResponse])
+async def get_document_versions(
+    document_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """List the versions of a document, oldest first."""
+    try:
+        document_repo = AsyncDocumentRepository(db)
+        document = await document_repo.get(uuid.UUID(document_id), fields=("uploaded_by", "version"))
+        if not document:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        if document.uploaded_by != current_user.id and current_user.role != UserRole.ADMIN:
+            raise HTTPException(status_code=403, detail="Not allowed to view this document")
+        
+        return [
+            DocumentVersionResponse(
+                version=version.version,
+                filename=version.file_name,
+                file_size=version.file_size,
+                content_hash=version.content_hash,
+                current=version.version == document.version,
+                processed=version.pipeline_version is not None,
+                block_count=version.block_count or 0,
+                reused_blocks=version.reused_blocks or 0,
+                created_at=version.created_at,
+            )
+            for version in await document_repo.get_versions(document.id)
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting versions of document {document_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.api_route("/{document_id}/file", methods=["GET", "HEAD"])
+async def download_document_file(
+    document_id: str,
+    request: Request,
+    version: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Download the original file of a document, or of one of its versions.
+    
+    Supports ``Range`` and ``If-Range`` for partial and resumed downloads,
+    and ``If-None-Match`` and ``If-Modified-Since``; the ETag is the file's
+    SHA-256. Files in S3 are served by a redirect to a short-lived
+    presigned URL.
+    """
+    try:
+        document_repo = AsyncDocumentRepository(db)
+        document = await document_repo.get(
+            uuid.UUID(document_id),
+            fields=("uploaded_by", "version", "file_name", "file_path", "content_hash", "mime_type"),
+        )
+        if not document:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        if document.uploaded_by != current_user.id and current_user.role != UserRole.ADMIN:
+            raise HTTPException(status_code=403, detail="Not allowed to download this document")
+        
+        file_name, storage_key, content_hash = document.file_name, document.file_path, document.content_hash
+        media_type = document.mime_type
+        if version is not None and version != document.version:
+            versions = await document_repo.get_versions(document.id)
+            match = next((entry for entry in versions if entry.version == version), None)
+            if match is None:
+                raise HTTPException(status_code=404, detail="Version not found")
+            file_name, storage_key, content_hash = match.file_name, match.file_path, match.content_hash
+            media_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        
+        download_url = blob_store.download_url(storage_key, file_name, media_type)
+        if download_url:
+            return RedirectResponse(download_url, status_code=307)
+        
+        file_path = blob_store.file_path(storage_key)
+        if file_path is None or not file_path.exists():
+            raise HTTPException(status_code=404, detail="Document file not found")
+        
+        etag = f'"{content_hash}"' if content_hash else None
+        if settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX and BLOB_KEY_PATTERN.fullmatch(storage_key):
+            # nginx sends the file itself, with ranges and conditional requests
+            headers = {
+                "X-Accel-Redirect": f"{settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX}{storage_key}",
+                "Content-Disposition": content_disposition(file_name),
+            }
+            if etag:
+                headers["ETag"] = etag
+            return Response(headers=headers, media_type=media_type)
+        
+        return RangeFileResponse(file_path, request.headers, media_type=media_type, filename=file_name, etag=etag)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error downloading file of document {document_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.post("/process/{document_id}", response_model=DocumentProcessResponse)
-async def process_document(
+def process_document(
     document_id: str,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     """
@@ -251,31 +1455,47 @@ async def process_document(
             raise HTTPException(status_code=404, detail="Document not found")
         
         # Check if file still exists
-        if not Path(document.file_path).exists():
+        if not blob_store.exists(document.file_path):
             raise HTTPException(status_code=404, detail="Document file not found")
         
-        # Update status to processing
-        document_repo.update_processing_status(
-            document_id, 
-            DocumentStatus.PROCESSING
-        )
+        # Only one of several concurrent requests moves the document into
+        # processing; the others attach to the job it starts
+        previous_status = document.status
+        if not document_repo.transition_status(
+            document.id,
+            [DocumentStatus.UPLOADED, DocumentStatus.COMPLETED, DocumentStatus.FAILED],
+            DocumentStatus.PROCESSING,
+        ):
+            return DocumentProcessResponse(
+                document_id=document_id,
+                status=DocumentStatus.PROCESSING,
+                message="Document processing already in progress",
+                raw_text_length=len(document.raw_text) if document.raw_text else 0,
+                processed_chunks=_chunk_count(document),
+            )
         
-        # Schedule background processing
-        file_extension = Path(document.file_path).suffix[1:]  # Remove dot
-        background_tasks.add_task(
-            process_document_background,
-            document_id,
-            document.file_path,
-            file_extension,
-            document.file_name
-        )
+        # Queue processing for the job workers
+        try:
+            job_scheduler.check_admission(db, document.uploaded_by)
+            job_scheduler.submit(db, document)
+        except Exception as e:
+            document_repo.transition_status(document.id, [DocumentStatus.PROCESSING], previous_status)
+            if isinstance(e, QueueFullError):
+                raise HTTPException(
+                    status_code=429,
+                    detail=str(e),
+                    headers={"Retry-After": str(e.retry_after)},
+                )
+            raise
+        job_scheduler.dispatch()
         
         return DocumentProcessResponse(
             document_id=document_id,
             status=DocumentStatus.PROCESSING,
             message="Document processing started",
             raw_text_length=len(document.raw_text) if document.raw_text else 0,
-            processed_chunks=len(document.processed_chunks) if document.processed_chunks else 0,
+            processed_chunks=_chunk_count(document),
+            stages=_plan_stages(db, document),
         )
         
     except HTTPException:
@@ -285,15 +1505,29 @@ async def process_document(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def _plan_stages(db: Session, document) -> Dict[str, str]:
+    """Which processing stages a run of the document will reuse from the stage cache."""
+    if settings.INCREMENTAL_PROCESSING_ENABLED:
+        # Cleaning, NLP and chunking are reused block by block
+        plan = stage_cache.plan(db, document.content_hash, ["extract"])
+        plan.update(clean=BY_BLOCK, nlp=BY_BLOCK, chunk=BY_BLOCK)
+    elif document.file_size >= settings.STREAMING_MIN_FILE_SIZE:
+        plan = {stage: RAN for stage in ("extract", "clean", "nlp", "chunk")}
+    else:
+        plan = stage_cache.plan(db, document.content_hash, ["extract", "clean", "nlp", "chunk"])
+    plan["persist"] = RAN
+    return plan
+
+
 @router.get("/status/{document_id}")
 async def get_document_status(
     document_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get the processing status of a document."""
     try:
-        document_repo = DocumentRepository(db)
-        document = document_repo.get(uuid.UUID(document_id))
+        document_repo = AsyncDocumentRepository(db)
+        document = await document_repo.get(uuid.UUID(document_id), fields=DOCUMENT_STATUS_COLUMNS)
         
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
@@ -306,6 +1540,8 @@ async def get_document_status(
             "word_count": document.word_count or 0,
             "sentence_count": document.sentence_count or 0,
             "processing_time": document.processing_time,
+            "error_message": document.error_message,
+            "stages": document.processing_stages,
             "created_at": document.created_at,
             "updated_at": document.updated_at,
         }
@@ -318,7 +1554,7 @@ async def get_document_status(
 
 
 @router.delete("/{document_id}")
-async def delete_document(
+def delete_document(
     document_id: str,
     db: Session = Depends(get_db),
 ):
@@ -330,109 +1566,45 @@ async def delete_document(
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        # Delete file from storage
-        try:
-            if Path(document.file_path).exists():
-                Path(document.file_path).unlink()
-                logger.info(f"Deleted file: {document.file_path}")
-        except Exception as e:
-            logger.warning(f"Could not delete file {document.file_path}: {e}")
+        # Stop in-flight processing before its file disappears
+        cancelled = job_scheduler.cancel(db, document.id)
         
-        # Delete database record
-        success = document_repo.delete(uuid.UUID(document_id))
+        # Each version holds one reference to its stored file, and the current
+        # version may not have its entry yet
+        versions = DocumentVersionRepository(db).get_for_document(document.id)
+        storage_keys = [version.file_path for version in versions]
+        if not any(version.version == document.version for version in versions):
+            storage_keys.append(document.file_path)
         
-        if success:
-            return {
-                "message": f"Document {document_id} deleted successfully",
-                "status": "success"
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to delete document")
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error deleting document: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
-
-
-async def process_document_background(
-    document_id: str, 
-    file_path: str, 
-    file_type: str, 
-    original_filename: str
-):
-    """
-    Background task to process document and save results to database.
-    """
-    from app.core.database import create_db_session
-    
-    db = None
-    processing_start_time = time.time()
-    
-    try:
-        logger.info(f"Starting background processing for document {document_id}")
+        # The references are given back only once the row is gone, so a failed
+        # delete leaves the document with all its files
+        if not document_repo.delete(document.id):
+            raise HTTPException(status_code=404, detail="Document not found")
         
-        # Create database session for background task
-        db = create_db_session()
-        document_repo = DocumentRepository(db)
+        if cancelled:
+            # Hand the freed slot to the next job
+            job_scheduler.dispatch()
         
-        # Update status to processing
-        document_repo.update_processing_status(
-            document_id, 
-            DocumentStatus.PROCESSING
-        )
+        leaked = []
+        for storage_key in storage_keys:
+            try:
+                blob_store.release(db, storage_key)
+            except Exception as e:
+                logger.error(f"Could not release file {storage_key} of deleted document {document_id}: {e}")
+                leaked.append(storage_key)
+        if leaked:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Document {document_id} deleted, but {len(leaked)} of its files could not be released",
+            )
         
-        # Extract text
-        extraction_result = await document_processor.extract_text(file_path, file_type)
-        raw_text = extraction_result["raw_text"]
-        metadata = extraction_result["metadata"]
-        
-        # Preprocess text
-        preprocessing_result = await document_processor.preprocess_text(raw_text)
-        
-        # Calculate processing time
-        processing_time = int(time.time() - processing_start_time)
-        
-        # Update document with results
-        update_data = {
-            "raw_text": raw_text,
-            "processed_chunks": preprocessing_result["chunks"],
-            "document_metadata": metadata,
-            "entities": [{"text": ent[0], "label": ent[1]} for ent in preprocessing_result["entities"]],
-            "key_phrases": preprocessing_result["key_phrases"],
-            "sections": preprocessing_result["sections"],
-            "word_count": preprocessing_result["word_count"],
-            "sentence_count": preprocessing_result["sentence_count"],
-            "processed": True,
-            "status": DocumentStatus.COMPLETED,
-            "processing_time": processing_time,
+        return {
+            "message": f"Document {document_id} deleted successfully",
+            "status": "success"
         }
         
-        document_repo.update_processing_status(document_id, DocumentStatus.COMPLETED, **update_data)
-        
-        logger.info(f"Document {document_id} processed successfully:")
-        logger.info(f"- Raw text length: {len(raw_text)}")
-        logger.info(f"- Sentences: {preprocessing_result['sentence_count']}")
-        logger.info(f"- Chunks: {len(preprocessing_result['chunks'])}")
-        logger.info(f"- Entities: {len(preprocessing_result['entities'])}")
-        logger.info(f"- Processing time: {processing_time}s")
-        
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in background processing for document {document_id}: {str(e)}")
-        
-        # Update document status to failed
-        if db:
-            try:
-                document_repo = DocumentRepository(db)
-                document_repo.update_processing_status(
-                    document_id, 
-                    DocumentStatus.FAILED,
-                    processing_time=int(time.time() - processing_start_time)
-                )
-            except Exception as db_error:
-                logger.error(f"Failed to update document status to failed: {db_error}")
-        
-    finally:
-        if db:
-            db.close()
\ No newline at end of file
+        logger.error(f"Error deleting document: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
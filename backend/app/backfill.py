@@ -0,0 +1,325 @@
+"""
+Reprocess existing documents offline, e.g. after a change to the pipeline.
+
+Usage (from the backend directory):
+    python -m app.backfill --workers 8 --batch-size 50 --rate 20
+
+Document IDs are read from the database in keyset order, page by page, and
+processed on a pool of worker processes that each load the NLP models
+once. Results are written back in one transaction per batch. Progress is
+checkpointed after every batch to ``--checkpoint``, so an interrupted run
+resumes where it stopped; ``--restart`` ignores the checkpoint.
+
+``--dry-run`` processes documents without writing results or the
+checkpoint, and ``--rate`` caps the documents per second so a run does not
+compete with production traffic for the database. Documents that are
+being processed by a job when their batch is written are skipped.
+
+For every document written, the result cache entry for its content is
+replaced and the stored blocks of its current version are dropped, so
+neither identical uploads nor the next revision get results from before
+the backfill.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.models.database import DocumentStatus
+from app.services.document_processor import PIPELINE_STAGES
+from app.services.stage_cache import RAN
+from app.services.text_index import build_text_index
+
+
+# Document processor of the current worker process
+_worker_processor = None
+
+
+def _init_worker() -> None:
+    """Load the models once per worker and run extraction and NLP inline."""
+    global _worker_processor
+    from app.services.document_processor import document_processor
+    from app.services.nlp_pool import nlp_pool
+    from app.services.pdf_extraction import pdf_shard_pool
+
+    # The backfill pool provides the parallelism
+    nlp_pool.workers = 0
+    pdf_shard_pool.workers = 0
+    # Interrupts are handled by the parent, which stops the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    document_processor.warm_up()
+    _worker_processor = document_processor
+
+
+def process_file(document_id: str, file_path: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Extract and analyse one document file in a worker process.
+
+    Returns:
+        The document ID, the document fields to store (or ``None``) and the
+        error message if processing failed
+    """
+    from app.services.blob_storage import blob_store
+
+    try:
+        started = time.time()
+        metadata = {}
+        with blob_store.local_path(file_path) as local_path:
+            units = _worker_processor.iter_text_units(str(local_path), Path(file_path).suffix[1:], metadata)
+            raw_text = "".join(unit["raw"] for unit in units)
+        cleaned = _worker_processor.clean_stage(raw_text)
+        analysis = _worker_processor.nlp_stage_sync(cleaned["cleaned_text"], cleaned["page_starts"])
+        chunked = _worker_processor.chunk_stage(analysis)
+
+        return document_id, {
+            "raw_text": raw_text,
+            **build_text_index(analysis["sentences"], chunked["chunks"]),
+            "processed_chunks": None,
+            "document_metadata": metadata,
+            "entities": [{"text": text, "label": label} for text, label in analysis["entities"]],
+            "key_phrases": chunked["key_phrases"],
+            "sections": cleaned["sections"],
+            "word_count": analysis["word_count"],
+            "sentence_count": len(analysis["sentences"]),
+            "processed": True,
+            "status": DocumentStatus.COMPLETED,
+            "processing_time": int(time.time() - started),
+            "processing_stages": {stage: RAN for stage in PIPELINE_STAGES},
+            "error_message": None,
+        }, None
+    except Exception as e:
+        return document_id, None, f"{type(e).__name__}: {e}"
+
+
+class Checkpoint:
+    """
+    Progress of a backfill run, persisted as JSON.
+
+    ``last_id`` is the highest document ID up to which every document has
+    been processed and written; documents finish out of order, so IDs are
+    only confirmed once all earlier ones are.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.last_id: Optional[str] = None
+        self.processed = 0
+        self.failed = 0
+        self.failed_ids = []
+        self.submitted = deque()  # document IDs in keyset order, until confirmed
+        self.finished = set()
+
+    def submit(self, document_id: str) -> None:
+        """Record that a document was handed to the pool; IDs must arrive in keyset order."""
+        self.submitted.append(document_id)
+
+    def finish(self, document_id: str) -> None:
+        """Record that a document finished processing, successfully or not."""
+        self.finished.add(document_id)
+
+    def confirm(self) -> Optional[str]:
+        """Advance ``last_id`` over every document finished without a gap before it."""
+        while self.submitted and self.submitted[0] in self.finished:
+            self.finished.discard(self.submitted[0])
+            self.last_id = self.submitted.popleft()
+        return self.last_id
+
+    def load(self) -> None:
+        if self.path.exists():
+            state = json.loads(self.path.read_text())
+            self.last_id = state.get("last_id")
+            self.processed = state.get("processed", 0)
+            self.failed = state.get("failed", 0)
+            self.failed_ids = state.get("failed_ids", [])
+
+    def save(self) -> None:
+        # Write atomically so an interrupt never leaves a truncated file
+        temp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        temp_path.write_text(json.dumps({
+            "last_id": self.last_id,
+            "processed": self.processed,
+            "failed": self.failed,
+            "failed_ids": self.failed_ids,
+        }, indent=2))
+        os.replace(temp_path, self.path)
+
+
+class RateLimiter:
+    """Spaces out submissions to at most ``rate`` per second; 0 disables it."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = time.monotonic()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+        self.next_at = max(now, self.next_at) + self.interval
+
+
+def refresh_derived_state(db, document_ids) -> None:
+    """
+    Replace what other runs would reuse from the old results of backfilled documents.
+
+    The result cache entries for the documents' content are overwritten
+    with their new results. The blocks stored for the documents' versions
+    came from the old results too; they are dropped, so the next run of a
+    version or of its next revision analyses every block again. Each is
+    one statement for the whole batch, and the documents' texts are not
+    loaded.
+    """
+    from app.repositories.document_repository import DocumentRepository
+    from app.repositories.document_version_repository import DocumentVersionRepository
+    from app.services.result_cache import CACHED_FIELDS, result_cache
+
+    if not document_ids:
+        return
+    documents = DocumentRepository(db).get_many(document_ids, fields=("content_hash",) + CACHED_FIELDS)
+    result_cache.store_many(db, documents)
+    DocumentVersionRepository(db).delete_blocks_of_documents(document_ids)
+    db.expunge_all()
+
+
+def run_backfill(args: argparse.Namespace) -> Checkpoint:
+    from app.core.database import create_db_session
+    from app.repositories.document_repository import DocumentRepository
+
+    checkpoint = Checkpoint(Path(args.checkpoint))
+    if not args.restart:
+        checkpoint.load()
+        if checkpoint.last_id:
+            logger.info(f"Resuming after document {checkpoint.last_id} ({checkpoint.processed} processed)")
+
+    statuses = [DocumentStatus(status) for status in args.status]
+    rate_limiter = RateLimiter(args.rate)
+    db = create_db_session()
+    document_repo = DocumentRepository(db)
+
+    executor = ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context(settings.NLP_POOL_START_METHOD),
+        initializer=_init_worker,
+    )
+    max_in_flight = args.workers * 2
+    in_flight: Dict[Future, str] = {}
+    results: Dict[Any, Dict[str, Any]] = {}
+    after_id = uuid.UUID(checkpoint.last_id) if checkpoint.last_id else None
+    remaining = args.limit
+    exhausted = False
+
+    def collect(done) -> None:
+        for future in done:
+            in_flight.pop(future)
+            document_id, fields, error = future.result()
+            if error:
+                logger.warning(f"Document {document_id} failed: {error}")
+                checkpoint.failed += 1
+                checkpoint.failed_ids.append(document_id)
+            else:
+                results[uuid.UUID(document_id)] = fields
+            checkpoint.finish(document_id)
+
+    def write_batch() -> None:
+        if args.dry_run:
+            checkpoint.processed += len(results)
+            results.clear()
+            return
+
+        # One transaction per batch, then confirm the IDs it completed
+        updated = document_repo.write_results(results)
+        checkpoint.processed += len(updated)
+        results.clear()
+        refresh_derived_state(db, updated)
+
+        checkpoint.confirm()
+        checkpoint.save()
+        logger.info(
+            f"Backfill: {checkpoint.processed} processed, {checkpoint.failed} failed, "
+            f"up to document {checkpoint.last_id}"
+        )
+
+    try:
+        while True:
+            # Keep the pool fed with the next page of IDs
+            while not exhausted and len(in_flight) < max_in_flight:
+                page = document_repo.get_page_after(
+                    after_id, min(args.page_size, remaining) if remaining is not None else args.page_size, statuses
+                )
+                db.rollback()  # end the read transaction between pages
+                if not page:
+                    exhausted = True
+                    break
+
+                for document_id, file_path in page:
+                    rate_limiter.wait()
+                    future = executor.submit(process_file, str(document_id), file_path)
+                    in_flight[future] = str(document_id)
+                    checkpoint.submit(str(document_id))
+                    after_id = document_id
+
+                if remaining is not None:
+                    remaining -= len(page)
+                    exhausted = remaining <= 0
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+            if len(results) >= args.batch_size:
+                write_batch()
+
+        write_batch()
+        logger.info(f"Backfill finished: {checkpoint.processed} processed, {checkpoint.failed} failed")
+
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; writing completed documents before exiting")
+        for future in in_flight:
+            future.cancel()
+        collect([future for future in in_flight if future.done() and not future.cancelled()])
+        write_batch()
+
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        db.close()
+
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--batch-size", type=int, default=50, help="documents written per transaction")
+    parser.add_argument("--page-size", type=int, default=500, help="document IDs read per query")
+    parser.add_argument("--rate", type=float, default=0, help="maximum documents per second (0: unlimited)")
+    parser.add_argument(
+        "--status", nargs="+", default=[DocumentStatus.COMPLETED.value],
+        choices=[status.value for status in DocumentStatus if status != DocumentStatus.PROCESSING],
+        help="statuses of the documents to reprocess",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many documents")
+    parser.add_argument("--checkpoint", default="backfill.checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the beginning")
+    parser.add_argument("--dry-run", action="store_true", help="process without writing results or the checkpoint")
+    args = parser.parse_args()
+
+    run_backfill(args)
+
+
+if __name__ == "__main__":
+    main()
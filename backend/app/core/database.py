@@ -3,6 +3,7 @@ Database connection and session management.
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from loguru import logger
@@ -25,6 +26,25 @@ except Exception as e:
 # Create a sessionmaker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    """The database URL with the asyncpg driver."""
+    scheme, _, rest = url.partition("://")
+    return f"{scheme.split('+')[0]}+asyncpg://{rest}"
+
+
+# Async engine for the API, so queries do not block the event loop
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or _async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    pool_size=settings.ASYNC_DATABASE_POOL_SIZE,
+    max_overflow=settings.ASYNC_DATABASE_MAX_OVERFLOW,
+)
+
+# Objects stay usable after commit; reloading them would need another await
+AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Base class for declarative models
 Base = declarative_base()
 
@@ -36,6 +56,8 @@ async def connect_to_db():
         # Test the connection
         with engine.connect() as connection:
             logger.info("Database connection successful.")
+        async with async_engine.connect() as connection:
+            logger.info("Async database connection successful.")
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         # In a real app, you might want to retry or exit
@@ -46,6 +68,7 @@ async def close_db_connection():
     # SQLAlchemy engine manages connections automatically, so this is more for graceful shutdown logging
     logger.info("Closing database connection pool.")
     engine.dispose()
+    await async_engine.dispose()
 
 # --- Dependency for API Endpoints ---
 
@@ -60,8 +83,22 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    FastAPI dependency to provide an async database session.
+    Ensures the session is always closed after the request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_db_session():
     """
     Helper to create a database session for background tasks.
     """
-    return SessionLocal()
\ No newline at end of file
+    return SessionLocal()
+
+def create_async_db_session() -> AsyncSession:
+    """
+    Helper to create an async database session outside of a request.
+    """
+    return AsyncSessionLocal()
\ No newline at end of file
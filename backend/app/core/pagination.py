@@ -0,0 +1,34 @@
+"""
+Opaque cursors for keyset pagination.
+"""
+
+import base64
+import json
+from typing import Any, Dict
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor was not issued by this API or has been altered."""
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode a position in a listing as an opaque, URL-safe cursor."""
+    data = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor created by ``encode_cursor``.
+
+    Raises:
+        InvalidCursorError: If the cursor cannot be decoded
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(data)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if not isinstance(position, dict):
+        raise InvalidCursorError("Invalid cursor")
+    return position
@@ -2,6 +2,7 @@
 FastAPI main application.
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -13,6 +14,14 @@ import time
 from app.api.api_v1.api import api_router
 from app.core.config import settings
 from app.core.database import connect_to_db, close_db_connection
+from app.services.nlp_pool import nlp_pool
+from app.services.pdf_extraction import pdf_shard_pool
+from app.services.warmup import warm_up_models, warmup_state
+
+
+def _runs_jobs() -> bool:
+    """Whether processing jobs run in this process rather than in the job workers."""
+    return settings.JOB_QUEUE_BACKEND == "memory"
 
 
 @asynccontextmanager
@@ -22,9 +31,20 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up MindMap API...")
     await connect_to_db()
     logger.info("Database connected successfully")
+    warmup_task = None
+    # Otherwise the job workers load the models and the API needs none
+    if _runs_jobs():
+        nlp_pool.start()
+        if settings.WARMUP_ON_STARTUP:
+            # Models load in the background; /ready reports when they are warm
+            warmup_task = asyncio.create_task(warm_up_models())
     yield
     # Shutdown
     logger.info("Shutting down MindMap API...")
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    nlp_pool.shutdown()
+    pdf_shard_pool.shutdown()
     await close_db_connection()
     logger.info("Database disconnected successfully")
 
@@ -97,4 +117,26 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": time.time()
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check endpoint.
+    
+    Where jobs run in the API process, returns 503 until the startup warm-up
+    has loaded the NLP models. When warm-up is disabled, models load on first
+    use and the API is always ready. With a job broker the models are loaded
+    by the job workers, which take no jobs before they are warm.
+    """
+    ready = warmup_state.completed or not settings.WARMUP_ON_STARTUP or not _runs_jobs()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "warming_up",
+            "models_warm": warmup_state.completed,
+            "warmup": warmup_state.as_dict(),
+            "timestamp": time.time(),
+        },
+    )
\ No newline at end of file
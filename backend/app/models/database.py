@@ -2,7 +2,7 @@
 import uuid
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, Index, JSON, LargeBinary, Enum as SQLEnum, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -21,6 +21,14 @@ class DocumentStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class ProcessingJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    ATTACHED = "attached"  # waiting for the result of a job on identical content
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
 class TestStatus(str, Enum):
     DRAFT = "DRAFT"
     PUBLISHED = "PUBLISHED"
@@ -49,18 +57,33 @@ class User(Base):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Keyset pagination of listings, newest first, optionally filtered
+        Index("ix_documents_created_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_documents_uploaded_by_created_id", "uploaded_by", text("created_at DESC"), text("id DESC")),
+        Index("ix_documents_status_created_id", "status", text("created_at DESC"), text("id DESC")),
+        Index(
+            "ix_documents_uploaded_by_status_created_id",
+            "uploaded_by", "status", text("created_at DESC"), text("id DESC"),
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(255), nullable=False)
     file_name = Column(String(255), nullable=False)
-    file_path = Column(String(500), nullable=False)
+    file_path = Column(String(500), nullable=False)  # storage key of the file
     file_size = Column(Integer, nullable=False)
     mime_type = Column(String(100), nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the file
+    version = Column(Integer, nullable=False, default=1)  # current entry of document_versions
     uploaded_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     processed = Column(Boolean, default=False)
     status = Column(SQLEnum(DocumentStatus), default=DocumentStatus.UPLOADED)
     raw_text = Column(Text, nullable=True)
-    processed_chunks = Column(JSONB, nullable=True)
+    cleaned_text = Column(Text, nullable=True)  # sentences joined by a space
+    sentence_offsets = Column(LargeBinary, nullable=True)  # packed start of each sentence in cleaned_text
+    chunk_offsets = Column(LargeBinary, nullable=True)  # packed first and last sentence of each chunk
+    processed_chunks = Column(JSONB, nullable=True)  # chunks of documents processed before chunk_offsets
     document_metadata = Column("metadata", JSONB, nullable=True)
     entities = Column(JSONB, nullable=True)
     key_phrases = Column(JSONB, nullable=True)
@@ -68,12 +91,132 @@ class Document(Base):
     word_count = Column(Integer, default=0)
     sentence_count = Column(Integer, default=0)
     processing_time = Column(Integer, nullable=True)  # in seconds
-    created_at = Column(DateTime, default=datetime.utcnow)
+    error_message = Column(Text, nullable=True)  # reason of the last failed processing
+    processing_stages = Column(JSONB, nullable=True)  # which stages the last run reused or ran
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     uploaded_by_user = relationship("User", back_populates="documents")
     mindmaps = relationship("MindMap", back_populates="document")
+    versions = relationship("DocumentVersion", back_populates="document", order_by="DocumentVersion.version")
+
+class DocumentResultBatch(Base):
+    __tablename__ = "document_result_batches"
+    
+    # Results of a document being streamed, assembled into the document when it completes
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    raw_text = Column(Text, nullable=False)
+    cleaned_text = Column(Text, nullable=False)
+    sentence_offsets = Column(LargeBinary, nullable=False)
+    chunk_offsets = Column(LargeBinary, nullable=False)
+    entities = Column(JSONB, nullable=False)
+    key_phrases = Column(JSONB, nullable=False)
+    sections = Column(JSONB, nullable=False)
+    word_count = Column(Integer, nullable=False)
+    sentence_count = Column(Integer, nullable=False)
+
+class DocumentVersion(Base):
+    __tablename__ = "document_versions"
+    __table_args__ = (
+        Index("ux_document_versions_document_version", "document_id", "version", unique=True),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    file_name = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    file_size = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=True)
+    pipeline_version = Column(String(64), nullable=True)  # stages that produced the stored blocks
+    block_count = Column(Integer, default=0)
+    reused_blocks = Column(Integer, default=0)  # blocks carried over from the previous version
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    document = relationship("Document", back_populates="versions")
+
+class DocumentBlock(Base):
+    __tablename__ = "document_blocks"
+    __table_args__ = (
+        Index("ix_document_blocks_version_hash", "version_id", "block_hash"),
+    )
+    
+    version_id = Column(UUID(as_uuid=True), ForeignKey("document_versions.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    block_hash = Column(String(64), nullable=False)  # SHA-256 over the hashes of the block's units
+    unit_count = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)  # the block's cleaned text
+    sentence_offsets = Column(LargeBinary, nullable=False)  # packed start and end of each sentence in text
+    result = Column(JSONB, nullable=False)  # entities and noun chunks as offsets into text, sections, word count
+
+class Blob(Base):
+    __tablename__ = "blobs"
+    
+    key = Column(String(500), primary_key=True)  # storage key, derived from the content hash
+    content_hash = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=1)  # documents and versions using the blob
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)  # also the ID of the document it becomes
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    file_name = Column(String(255), nullable=False)
+    title = Column(String(255), nullable=True)
+    mime_type = Column(String(100), nullable=True)
+    file_size = Column(Integer, nullable=False)
+    file_path = Column(String(500), nullable=False)  # partial data, at the final size
+    received = Column(JSONB, nullable=False, default=list)  # sorted, merged [start, end) byte ranges
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class ProcessingCacheEntry(Base):
+    __tablename__ = "processing_cache"
+    
+    namespace = Column(String(32), primary_key=True, default="document")  # whole documents or one stage
+    content_hash = Column(String(64), primary_key=True)  # of the file, or of a stage's input
+    pipeline_version = Column(String(64), primary_key=True)
+    result = Column(JSONB, nullable=False)
+    output_hash = Column(String(64), nullable=True)  # of the result; input of the next stage
+    size_bytes = Column(Integer, nullable=False, default=0)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class ProcessingJob(Base):
+    __tablename__ = "processing_jobs"
+    __table_args__ = (
+        Index("ix_processing_jobs_dispatch", "status", "user_id", "lane", "created_at"),
+        # Single flight: one active job per document and one leader job per content
+        Index(
+            "ux_processing_jobs_active_document", "document_id", unique=True,
+            postgresql_where=text("status IN ('queued', 'running', 'attached')"),
+        ),
+        Index(
+            "ux_processing_jobs_active_content", "content_hash", unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    lane = Column(Integer, nullable=False, default=1)  # lower lanes are dispatched first
+    status = Column(String(20), nullable=False, default=ProcessingJobStatus.QUEUED)
+    content_hash = Column(String(64), nullable=True)
+    leader_id = Column(UUID(as_uuid=True), ForeignKey("processing_jobs.id", ondelete="SET NULL"), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    document = relationship("Document")
 
 class Test(Base):
     __tablename__ = "tests"
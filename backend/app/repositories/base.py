@@ -1,13 +1,34 @@
 
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from typing import Generic, TypeVar, List, Optional, Dict, Any, Sequence, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer, load_only
 from sqlalchemy.exc import IntegrityError
 from app.models.database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+
+def load_options(model, fields: Optional[Sequence[str]] = None, deferred: Sequence[str] = ()) -> list:
+    """
+    Loader options that load only ``fields`` of ``model``, or every column
+    except ``deferred`` when no fields are given.
+    
+    Columns left out are loaded on first access with a synchronous session;
+    with an ``AsyncSession`` they must not be accessed at all.
+    """
+    if fields:
+        return [load_only(*(getattr(model, field) for field in fields))]
+    if deferred:
+        return [defer(getattr(model, column)) for column in deferred]
+    return []
+
+
 class BaseRepository(Generic[ModelType], ABC):
+    # Large columns that listings do not load unless asked for
+    deferred_columns: Tuple[str, ...] = ()
+
     def __init__(self, db: Session, model: type[ModelType]):
         self.db = db
         self.model = model
@@ -24,18 +45,24 @@ class BaseRepository(Generic[ModelType], ABC):
             self.db.rollback()
             raise
 
-    def get(self, id: Any) -> Optional[ModelType]:
-        """Get record by ID."""
-        return self.db.query(self.model).filter(self.model.id == id).first()
+    def get(self, id: Any, fields: Optional[Sequence[str]] = None) -> Optional[ModelType]:
+        """Get record by ID, loading only ``fields`` if given."""
+        return (
+            self.db.query(self.model)
+            .options(*load_options(self.model, fields))
+            .filter(self.model.id == id)
+            .first()
+        )
 
     def get_multi(
         self, 
         skip: int = 0, 
         limit: int = 100,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[Sequence[str]] = None,
     ) -> List[ModelType]:
-        """Get multiple records with optional filtering."""
-        query = self.db.query(self.model)
+        """Get multiple records with optional filtering, loading only ``fields`` if given."""
+        query = self.db.query(self.model).options(*load_options(self.model, fields, self.deferred_columns))
         
         if filters:
             for key, value in filters.items():
@@ -77,3 +104,84 @@ class BaseRepository(Generic[ModelType], ABC):
                     query = query.filter(getattr(self.model, key) == value)
         
         return query.count()
+
+
+class AsyncBaseRepository(Generic[ModelType], ABC):
+    """Counterpart of ``BaseRepository`` for an ``AsyncSession``."""
+    # Large columns that listings do not load unless asked for
+    deferred_columns: Tuple[str, ...] = ()
+
+    def __init__(self, db: AsyncSession, model: type[ModelType]):
+        self.db = db
+        self.model = model
+
+    def _filtered(self, statement, filters: Optional[Dict[str, Any]]):
+        if filters:
+            for key, value in filters.items():
+                if hasattr(self.model, key):
+                    statement = statement.where(getattr(self.model, key) == value)
+        return statement
+
+    async def create(self, obj_in: Dict[str, Any]) -> ModelType:
+        """Create a new record."""
+        try:
+            db_obj = self.model(**obj_in)
+            self.db.add(db_obj)
+            await self.db.commit()
+            await self.db.refresh(db_obj)
+            return db_obj
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+
+    async def get(self, id: Any, fields: Optional[Sequence[str]] = None) -> Optional[ModelType]:
+        """Get record by ID, loading only ``fields`` if given."""
+        if not fields:
+            return await self.db.get(self.model, id)
+        statement = select(self.model).options(*load_options(self.model, fields)).where(self.model.id == id)
+        return await self.db.scalar(statement)
+
+    async def get_multi(
+        self, 
+        skip: int = 0, 
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[ModelType]:
+        """Get multiple records with optional filtering, loading only ``fields`` if given."""
+        statement = (
+            self._filtered(select(self.model), filters)
+            .options(*load_options(self.model, fields, self.deferred_columns))
+            .offset(skip)
+            .limit(limit)
+        )
+        return list((await self.db.scalars(statement)).all())
+
+    async def update(self, db_obj: ModelType, obj_in: Dict[str, Any]) -> ModelType:
+        """Update an existing record."""
+        try:
+            for field, value in obj_in.items():
+                if hasattr(db_obj, field):
+                    setattr(db_obj, field, value)
+            
+            await self.db.commit()
+            await self.db.refresh(db_obj)
+            return db_obj
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+
+    async def delete(self, id: Any) -> bool:
+        """Delete a record by ID."""
+        obj = await self.get(id)
+        if obj:
+            await self.db.delete(obj)
+            await self.db.commit()
+            return True
+        return False
+
+    async def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Count records with optional filtering."""
+        statement = self._filtered(select(func.count()).select_from(self.model), filters)
+        return await self.db.scalar(statement)
+
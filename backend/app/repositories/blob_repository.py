@@ -0,0 +1,48 @@
+from typing import Callable
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.database import Blob
+from app.repositories.base import BaseRepository
+
+class BlobRepository(BaseRepository[Blob]):
+    def __init__(self, db: Session):
+        super().__init__(db, Blob)
+
+    def acquire(self, key: str, content_hash: str, size: int) -> int:
+        """
+        Add a reference to a blob, recording the blob if it is new.
+
+        Returns:
+            The blob's reference count; 1 if it was not stored before
+        """
+        statement = (
+            insert(Blob)
+            .values(key=key, content_hash=content_hash, size=size, ref_count=1)
+            .on_conflict_do_update(index_elements=[Blob.key], set_={"ref_count": Blob.ref_count + 1})
+            .returning(Blob.ref_count)
+        )
+        ref_count = self.db.execute(statement).scalar_one()
+        self.db.commit()
+        return ref_count
+
+    def release(self, key: str, delete_blob: Callable[[str], None]) -> int:
+        """
+        Drop a reference to a blob, deleting it with ``delete_blob`` after the last one.
+
+        The blob's row stays locked until the blob is deleted, so a
+        concurrent upload of the same content waits and then stores it again.
+
+        Returns:
+            The remaining reference count
+        """
+        blob = self.db.query(Blob).filter(Blob.key == key).with_for_update().first()
+        if blob is None:
+            self.db.commit()
+            return 0
+
+        blob.ref_count -= 1
+        if blob.ref_count <= 0:
+            delete_blob(key)
+            self.db.delete(blob)
+        self.db.commit()
+        return max(blob.ref_count, 0)
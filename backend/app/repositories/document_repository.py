@@ -1,10 +1,32 @@
 
-from typing import List, Optional
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import DateTime, bindparam, func, literal, literal_column, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql.base import PGDialect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from app.models.database import Document, User, DocumentStatus
-from app.repositories.base import BaseRepository
+from app.models.database import Document, DocumentResultBatch, DocumentVersion, User, DocumentStatus
+from app.repositories.base import AsyncBaseRepository, BaseRepository, load_options
+
+# Processing results, often megabytes per document, that listings leave out
+DOCUMENT_LARGE_COLUMNS = (
+    "raw_text",
+    "cleaned_text",
+    "sentence_offsets",
+    "chunk_offsets",
+    "processed_chunks",
+    "document_metadata",
+    "entities",
+    "key_phrases",
+    "sections",
+    "processing_stages",
+)
 
 class DocumentRepository(BaseRepository[Document]):
+    deferred_columns = DOCUMENT_LARGE_COLUMNS
+
     def __init__(self, db: Session):
         super().__init__(db, Document)
 
@@ -38,6 +60,327 @@ class DocumentRepository(BaseRepository[Document]):
             return self.update(document, update_data)
         return None
 
+    def transition_status(self, document_id, from_statuses: List[DocumentStatus], to_status: DocumentStatus) -> bool:
+        """
+        Atomically move a document to ``to_status`` if it is in one of ``from_statuses``.
+        
+        The check and the update are a single conditional UPDATE, so of several
+        concurrent callers, in any process, exactly one succeeds.
+        
+        Returns:
+            Whether this call made the transition
+        """
+        result = self.db.execute(
+            update(Document)
+            .where(Document.id == document_id, Document.status.in_(from_statuses))
+            .values(status=to_status)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def clear_processing_batches(self, document_id: str) -> None:
+        """Drop result batches left over from an earlier, unfinished run."""
+        self.db.query(DocumentResultBatch).filter(DocumentResultBatch.document_id == document_id).delete(
+            synchronize_session=False
+        )
+        self.db.commit()
+    
+    def append_processing_batch(self, document_id: str, seq: int, batch: Dict[str, Any]) -> None:
+        """
+        Store a batch of streamed processing results of a document.
+        
+        Each batch is a row of ``document_result_batches`` keyed by
+        ``(document_id, seq)``, so appending costs the same however much
+        the document already holds. The batch's ``cleaned_text`` and packed
+        offsets come from a ``TextIndexBuilder`` that has seen every earlier
+        batch. ``finish_processing_batches`` assembles the document.
+        """
+        self.db.add(DocumentResultBatch(
+            document_id=document_id,
+            seq=seq,
+            raw_text=batch["raw_text"],
+            cleaned_text=batch["cleaned_text"],
+            sentence_offsets=batch["sentence_offsets"],
+            chunk_offsets=batch["chunk_offsets"],
+            entities=[{"text": text, "label": label} for text, label in batch["entities"]],
+            key_phrases=batch["key_phrases"],
+            sections=batch["sections"],
+            word_count=batch["word_count"],
+            sentence_count=batch["sentence_count"],
+        ))
+        self.db.commit()
+    
+    def finish_processing_batches(self, document_id: str) -> None:
+        """
+        Write the concatenated result batches of a document to it and drop them.
+        
+        The texts, offsets and arrays are aggregated in order of ``seq`` by
+        one statement, so each result is written once.
+        """
+        self.db.execute(_ASSEMBLE_BATCHES, {"document_id": document_id})
+        self.db.query(DocumentResultBatch).filter(DocumentResultBatch.document_id == document_id).delete(
+            synchronize_session=False
+        )
+        self.db.commit()
+    
+    def get_many(self, document_ids: Sequence, fields: Optional[Sequence[str]] = None) -> List[Document]:
+        """Get several documents with one query, loading only ``fields`` if given."""
+        return (
+            self.db.query(Document)
+            .options(*load_options(Document, fields))
+            .filter(Document.id.in_(list(document_ids)))
+            .all()
+        )
+    
+    def get_completed_texts(self, document_id, content_hash: str) -> Optional[Tuple[str, str]]:
+        """Raw and cleaned text of a document, if it is completed and still holds ``content_hash``."""
+        return (
+            self.db.query(Document.raw_text, Document.cleaned_text)
+            .filter(
+                Document.id == document_id,
+                Document.content_hash == content_hash,
+                Document.status == DocumentStatus.COMPLETED,
+            )
+            .first()
+        )
+    
+    def get_page_after(self, after_id, limit: int, statuses: List[DocumentStatus]) -> List[Tuple]:
+        """
+        Get the next documents in ``id`` order after ``after_id`` (keyset paging).
+        
+        Returns:
+            (id, file_path) of at most ``limit`` documents in one of ``statuses``
+        """
+        query = self.db.query(Document.id, Document.file_path).filter(Document.status.in_(statuses))
+        if after_id is not None:
+            query = query.filter(Document.id > after_id)
+        return query.order_by(Document.id).limit(limit).all()
+
+    def write_results(self, results: Dict[Any, Dict[str, Any]]) -> List[Any]:
+        """
+        Store processing results of several documents in one transaction.
+        
+        Documents that have started processing in the meantime are left to
+        their job.
+        
+        Returns:
+            The IDs of the documents updated
+        """
+        updated = []
+        for document_id, fields in results.items():
+            result = self.db.execute(
+                update(Document)
+                .where(Document.id == document_id, Document.status != DocumentStatus.PROCESSING)
+                .values(**fields)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                updated.append(document_id)
+        self.db.commit()
+        return updated
+
+    def create_many(self, rows: List[Dict[str, Any]]) -> List[Document]:
+        """Create several documents in one transaction."""
+        documents = [Document(**row) for row in rows]
+        try:
+            self.db.add_all(documents)
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise
+        return documents
+
     def get_by_filename(self, filename: str) -> Optional[Document]:
         """Get document by filename."""
-        return self.db.query(Document).filter(Document.file_name == filename).first()
\ No newline at end of file
+        return self.db.query(Document).filter(Document.file_name == filename).first()
+
+
+class AsyncDocumentRepository(AsyncBaseRepository[Document]):
+    """Document queries on an ``AsyncSession``, for endpoints that must not block the event loop."""
+    deferred_columns = DOCUMENT_LARGE_COLUMNS
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Document)
+
+    async def get_by_user(self, user_id: str, skip: int = 0, limit: int = 100) -> List[Document]:
+        """Get documents uploaded by a specific user."""
+        return list((await self.db.scalars(
+            select(Document)
+            .options(joinedload(Document.uploaded_by_user))
+            .where(Document.uploaded_by == user_id)
+            .offset(skip)
+            .limit(limit)
+        )).all())
+
+    async def get_page(
+        self,
+        limit: int,
+        filters: Optional[Dict[str, Any]] = None,
+        position: Optional[Tuple[datetime, Any]] = None,
+        backwards: bool = False,
+        skip: int = 0,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[Document], bool]:
+        """
+        Get a page of documents, newest first, by keyset on ``(created_at, id)``.
+
+        ``position`` is the ``(created_at, id)`` of the document the page
+        starts after, or before when ``backwards`` is set. ``skip`` is only
+        for clients still paging by offset. Only ``fields`` are loaded if
+        given, otherwise every column except the large ones.
+
+        Returns:
+            The documents in listing order, and whether more documents follow
+            in the direction of the page
+        """
+        statement = self._filtered(select(Document), filters).options(
+            *load_options(Document, fields, self.deferred_columns)
+        )
+        if position is not None:
+            key = tuple_(Document.created_at, Document.id)
+            # created_at comes back timezone-aware from timestamptz
+            bound = tuple_(literal(position[0], DateTime(timezone=True)), literal(position[1], Document.id.type))
+            statement = statement.where(key > bound if backwards else key < bound)
+
+        if backwards:
+            statement = statement.order_by(Document.created_at.asc(), Document.id.asc())
+        else:
+            statement = statement.order_by(Document.created_at.desc(), Document.id.desc())
+
+        # One extra row tells whether there is a further page
+        documents = list((await self.db.scalars(statement.offset(skip).limit(limit + 1))).all())
+        has_more = len(documents) > limit
+        documents = documents[:limit]
+        if backwards:
+            documents.reverse()
+        return documents, has_more
+
+    async def count_estimate(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Estimate the number of matching documents from the query planner's statistics."""
+        compiled = self._filtered(select(Document.id), filters).compile(
+            dialect=PGDialect(paramstyle="named")
+        )
+        explain = text(f"EXPLAIN (FORMAT JSON) {compiled}").bindparams(
+            *(bindparam(name, compiled.params[name], type_=bind.type) for name, bind in compiled.binds.items())
+        )
+        plan = await self.db.scalar(explain)
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def get_summary(self, document_id):
+        """
+        Get a document's scalar results and the sizes of its item lists,
+        counted in the database without loading the lists.
+        """
+        return (await self.db.execute(
+            select(
+                Document.id,
+                Document.file_name,
+                Document.title,
+                Document.document_metadata,
+                Document.key_phrases,
+                Document.word_count,
+                Document.sentence_count,
+                Document.processing_time,
+                Document.created_at,
+                Document.updated_at,
+                func.coalesce(
+                    func.length(Document.chunk_offsets) / 8,
+                    func.jsonb_array_length(Document.processed_chunks),
+                    0,
+                ).label("chunk_count"),
+                func.coalesce(func.jsonb_array_length(Document.entities), 0).label("entity_count"),
+                func.coalesce(func.jsonb_array_length(Document.sections), 0).label("section_count"),
+            )
+            .where(Document.id == document_id)
+        )).first()
+
+    async def get_text_offsets(self, document_id):
+        """Get the packed sentence and chunk offsets of a document and the length of its cleaned text."""
+        return (await self.db.execute(
+            select(
+                Document.sentence_offsets,
+                Document.chunk_offsets,
+                func.coalesce(func.char_length(Document.cleaned_text), 0).label("text_length"),
+            )
+            .where(Document.id == document_id)
+        )).first()
+
+    async def get_text_range(self, document_id, start: int, end: int) -> str:
+        """Get the characters ``[start, end)`` of a document's cleaned text."""
+        if end <= start:
+            return ""
+        return await self.db.scalar(
+            select(func.substr(Document.cleaned_text, start + 1, end - start)).where(Document.id == document_id)
+        ) or ""
+
+    async def get_array_range(self, document_id, column: str, start: int, stop: int) -> Optional[Tuple[List[Any], int]]:
+        """
+        Get the elements ``[start, stop)`` of a JSONB array column, sliced in the database.
+
+        Returns:
+            The elements and the length of the whole array, or ``None`` if
+            the document does not exist
+        """
+        array_column = getattr(Document, column)
+        # Bounds are integers, so the JSON path can be inlined
+        path = literal_column(f"'$[{int(start)} to {int(stop) - 1}]'::jsonpath")
+        row = (await self.db.execute(
+            select(
+                func.jsonb_path_query_array(array_column, path) if stop > start else literal(None),
+                func.coalesce(func.jsonb_array_length(array_column), 0),
+            )
+            .where(Document.id == document_id)
+        )).first()
+        if row is None:
+            return None
+        items, total = row
+        if isinstance(items, str):
+            items = json.loads(items)
+        return items or [], total
+
+    async def get_versions(self, document_id) -> List[DocumentVersion]:
+        """Get all versions of a document, oldest first."""
+        return list((await self.db.scalars(
+            select(DocumentVersion)
+            .where(DocumentVersion.document_id == document_id)
+            .order_by(DocumentVersion.version)
+        )).all())
+
+
+
+def _jsonb_concat(column: str) -> str:
+    """SQL concatenating a JSONB array column of a document's result batches in order."""
+    return f"""(
+        SELECT coalesce(jsonb_agg(item.value ORDER BY batch.seq, item.ordinality), '[]'::jsonb)
+        FROM document_result_batches AS batch, jsonb_array_elements(batch.{column}) WITH ORDINALITY AS item
+        WHERE batch.document_id = :document_id
+    )"""
+
+
+_ASSEMBLE_BATCHES = text(f"""
+    UPDATE documents SET
+        raw_text = batches.raw_text,
+        cleaned_text = batches.cleaned_text,
+        sentence_offsets = batches.sentence_offsets,
+        chunk_offsets = batches.chunk_offsets,
+        word_count = batches.word_count,
+        sentence_count = batches.sentence_count,
+        entities = {_jsonb_concat("entities")},
+        key_phrases = {_jsonb_concat("key_phrases")},
+        sections = {_jsonb_concat("sections")}
+    FROM (
+        SELECT
+            string_agg(raw_text, '' ORDER BY seq) AS raw_text,
+            string_agg(cleaned_text, '' ORDER BY seq) AS cleaned_text,
+            string_agg(sentence_offsets, ''::bytea ORDER BY seq) AS sentence_offsets,
+            string_agg(chunk_offsets, ''::bytea ORDER BY seq) AS chunk_offsets,
+            coalesce(sum(word_count), 0) AS word_count,
+            coalesce(sum(sentence_count), 0) AS sentence_count
+        FROM document_result_batches
+        WHERE document_id = :document_id
+    ) AS batches
+    WHERE documents.id = :document_id
+""")
\ No newline at end of file
@@ -0,0 +1,125 @@
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy.orm import Session
+from app.models.database import Document, DocumentBlock, DocumentVersion
+from app.repositories.base import BaseRepository
+
+class DocumentVersionRepository(BaseRepository[DocumentVersion]):
+    def __init__(self, db: Session):
+        super().__init__(db, DocumentVersion)
+
+    def get_for_document(self, document_id) -> List[DocumentVersion]:
+        """Get all versions of a document, oldest first."""
+        return (
+            self.db.query(DocumentVersion)
+            .filter(DocumentVersion.document_id == document_id)
+            .order_by(DocumentVersion.version)
+            .all()
+        )
+
+    def get_current(self, document: Document) -> DocumentVersion:
+        """Get the document's current version, recording it if it has no entry yet."""
+        version = (
+            self.db.query(DocumentVersion)
+            .filter(
+                DocumentVersion.document_id == document.id,
+                DocumentVersion.version == document.version,
+            )
+            .first()
+        )
+        if version:
+            return version
+        return self.create_for_document(document)
+
+    def create_for_document(self, document: Document) -> DocumentVersion:
+        """Record the document's current file as its current version."""
+        return self.create({
+            "document_id": document.id,
+            "version": document.version,
+            "file_name": document.file_name,
+            "file_path": document.file_path,
+            "file_size": document.file_size,
+            "content_hash": document.content_hash,
+        })
+
+    def get_latest_processed(self, document_id, before_version: int, pipeline_version: str) -> Optional[DocumentVersion]:
+        """Get the newest earlier version whose blocks were stored by ``pipeline_version``."""
+        return (
+            self.db.query(DocumentVersion)
+            .filter(
+                DocumentVersion.document_id == document_id,
+                DocumentVersion.version < before_version,
+                DocumentVersion.pipeline_version == pipeline_version,
+            )
+            .order_by(DocumentVersion.version.desc())
+            .first()
+        )
+
+    def get_block_hashes(self, version_id) -> set:
+        """Hashes of all blocks stored for a version."""
+        rows = self.db.query(DocumentBlock.block_hash).filter(DocumentBlock.version_id == version_id).all()
+        return {block_hash for block_hash, in rows}
+
+    def get_block_results(self, version_ids: List, block_hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored text, sentence offsets and result of blocks of the given versions, by block hash."""
+        rows = (
+            self.db.query(DocumentBlock.block_hash, DocumentBlock.text, DocumentBlock.sentence_offsets, DocumentBlock.result)
+            .filter(
+                DocumentBlock.version_id.in_(version_ids),
+                DocumentBlock.block_hash.in_(list(block_hashes)),
+            )
+            .all()
+        )
+        return {
+            block_hash: {"text": text, "sentence_offsets": sentence_offsets, "result": result}
+            for block_hash, text, sentence_offsets, result in rows
+        }
+
+    def replace_blocks(self, version_id, blocks: List[Dict[str, Any]]) -> None:
+        """Store processed blocks of a version in place of those at the same positions."""
+        (
+            self.db.query(DocumentBlock)
+            .filter(
+                DocumentBlock.version_id == version_id,
+                DocumentBlock.position.in_([block["position"] for block in blocks]),
+            )
+            .delete(synchronize_session=False)
+        )
+        self.db.add_all([DocumentBlock(version_id=version_id, **block) for block in blocks])
+        self.db.commit()
+
+    def truncate_blocks(self, version_id, block_count: int) -> None:
+        """Drop blocks left over from a longer earlier run of a version."""
+        (
+            self.db.query(DocumentBlock)
+            .filter(DocumentBlock.version_id == version_id, DocumentBlock.position >= block_count)
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def clear_blocks(self, version: DocumentVersion, pipeline_version: str) -> None:
+        """Drop the stored blocks of a version before stages of ``pipeline_version`` process it."""
+        self.db.query(DocumentBlock).filter(DocumentBlock.version_id == version.id).delete(synchronize_session=False)
+        self.update(version, {"pipeline_version": pipeline_version, "block_count": 0, "reused_blocks": 0})
+
+    def delete_blocks_of_documents(self, document_ids: List) -> None:
+        """Drop the stored blocks of every version of several documents with one statement."""
+        versions = self.db.query(DocumentVersion.id).filter(DocumentVersion.document_id.in_(list(document_ids)))
+        (
+            self.db.query(DocumentBlock)
+            .filter(DocumentBlock.version_id.in_(versions.scalar_subquery()))
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def delete_blocks_before(self, document_id, version: int) -> None:
+        """Drop the stored blocks of a document's versions older than ``version``."""
+        older = (
+            self.db.query(DocumentVersion.id)
+            .filter(DocumentVersion.document_id == document_id, DocumentVersion.version < version)
+        )
+        (
+            self.db.query(DocumentBlock)
+            .filter(DocumentBlock.version_id.in_(older.scalar_subquery()))
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.database import ProcessingCacheEntry
+from app.repositories.base import BaseRepository
+
+# Namespace of whole-document results; stage outputs use one namespace per stage
+DOCUMENT_NAMESPACE = "document"
+
+class ProcessingCacheRepository(BaseRepository[ProcessingCacheEntry]):
+    def __init__(self, db: Session):
+        super().__init__(db, ProcessingCacheEntry)
+
+    def get_entry(self, content_hash: str, pipeline_version: str, namespace: str = DOCUMENT_NAMESPACE) -> Optional[ProcessingCacheEntry]:
+        """Get the cached result for a content hash and pipeline version."""
+        return self.db.get(ProcessingCacheEntry, (namespace, content_hash, pipeline_version))
+
+    def get_output_hash(self, content_hash: str, pipeline_version: str, namespace: str) -> Optional[str]:
+        """Get only the output hash of a cached result, without loading the result."""
+        return (
+            self.db.query(ProcessingCacheEntry.output_hash)
+            .filter(
+                ProcessingCacheEntry.namespace == namespace,
+                ProcessingCacheEntry.content_hash == content_hash,
+                ProcessingCacheEntry.pipeline_version == pipeline_version,
+            )
+            .scalar()
+        )
+
+    def record_hit(self, entry: ProcessingCacheEntry) -> ProcessingCacheEntry:
+        """Mark an entry as used now."""
+        return self.update(entry, {
+            "hit_count": (entry.hit_count or 0) + 1,
+            "last_used_at": datetime.utcnow(),
+        })
+
+    def upsert(
+        self,
+        content_hash: str,
+        pipeline_version: str,
+        result: Dict[str, Any],
+        size_bytes: int,
+        namespace: str = DOCUMENT_NAMESPACE,
+        output_hash: Optional[str] = None,
+    ) -> ProcessingCacheEntry:
+        """Store or replace the cached result for a content hash and pipeline version."""
+        entry = self.get_entry(content_hash, pipeline_version, namespace)
+        data = {
+            "result": result,
+            "output_hash": output_hash,
+            "size_bytes": size_bytes,
+            "last_used_at": datetime.utcnow(),
+        }
+        if entry:
+            return self.update(entry, data)
+        return self.create({
+            "namespace": namespace,
+            "content_hash": content_hash,
+            "pipeline_version": pipeline_version,
+            **data,
+        })
+
+    def upsert_many(self, entries: List[Dict[str, Any]], namespace: str = DOCUMENT_NAMESPACE) -> None:
+        """
+        Store or replace several cached results with one statement.
+
+        Each entry has ``content_hash``, ``pipeline_version``, ``result`` and
+        ``size_bytes``; the content hashes must be distinct.
+        """
+        if not entries:
+            return
+
+        now = datetime.utcnow()
+        statement = insert(ProcessingCacheEntry).values([
+            {"namespace": namespace, "output_hash": None, "hit_count": 0, "created_at": now, "last_used_at": now, **entry}
+            for entry in entries
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[
+                ProcessingCacheEntry.namespace, ProcessingCacheEntry.content_hash, ProcessingCacheEntry.pipeline_version,
+            ],
+            set_={
+                column: statement.excluded[column]
+                for column in ("result", "output_hash", "size_bytes", "last_used_at")
+            },
+        )
+        self.db.execute(statement)
+        self.db.commit()
+
+    def delete_other_versions(self, pipeline_version: str, namespace: str = DOCUMENT_NAMESPACE) -> int:
+        """Delete entries of a namespace produced by any other pipeline version."""
+        deleted = (
+            self.db.query(ProcessingCacheEntry)
+            .filter(
+                ProcessingCacheEntry.namespace == namespace,
+                ProcessingCacheEntry.pipeline_version != pipeline_version,
+            )
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+        return deleted
+
+    def delete_unused_since(self, cutoff: datetime, namespace: str = DOCUMENT_NAMESPACE) -> int:
+        """Delete entries of a namespace not used since ``cutoff``."""
+        deleted = (
+            self.db.query(ProcessingCacheEntry)
+            .filter(
+                ProcessingCacheEntry.namespace == namespace,
+                ProcessingCacheEntry.last_used_at < cutoff,
+            )
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+        return deleted
+
+    def delete_least_recently_used(self, keep: int, namespace: str = DOCUMENT_NAMESPACE) -> int:
+        """Delete the least recently used entries of a namespace beyond the newest ``keep``."""
+        oldest_kept = (
+            self.db.query(ProcessingCacheEntry.last_used_at)
+            .filter(ProcessingCacheEntry.namespace == namespace)
+            .order_by(ProcessingCacheEntry.last_used_at.desc())
+            .offset(keep)
+            .limit(1)
+            .scalar()
+        )
+        if oldest_kept is None:
+            return 0
+
+        deleted = (
+            self.db.query(ProcessingCacheEntry)
+            .filter(
+                ProcessingCacheEntry.namespace == namespace,
+                ProcessingCacheEntry.last_used_at <= oldest_kept,
+            )
+            .delete(synchronize_session=False)
+        )
+        self.db.commit()
+        return deleted
@@ -0,0 +1,168 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from app.models.database import Document, DocumentStatus, ProcessingJob, ProcessingJobStatus
+from app.repositories.base import BaseRepository
+
+# Key of the advisory lock serialising dispatch across API and worker processes
+DISPATCH_LOCK_KEY = 7301
+
+# Jobs that do the processing themselves, and all unfinished jobs
+LEADER_STATUSES = (ProcessingJobStatus.QUEUED, ProcessingJobStatus.RUNNING)
+ACTIVE_STATUSES = LEADER_STATUSES + (ProcessingJobStatus.ATTACHED,)
+
+class ProcessingJobRepository(BaseRepository[ProcessingJob]):
+    def __init__(self, db: Session):
+        super().__init__(db, ProcessingJob)
+
+    def get_active_for_document(self, document_id) -> Optional[ProcessingJob]:
+        """Get the unfinished job of a document, if any."""
+        return (
+            self.db.query(ProcessingJob)
+            .filter(
+                ProcessingJob.document_id == document_id,
+                ProcessingJob.status.in_(ACTIVE_STATUSES),
+            )
+            .first()
+        )
+
+    def get_leader_for_content(self, content_hash: str) -> Optional[ProcessingJob]:
+        """Get the queued or running job processing content with this hash, if any."""
+        return (
+            self.db.query(ProcessingJob)
+            .filter(
+                ProcessingJob.content_hash == content_hash,
+                ProcessingJob.status.in_(LEADER_STATUSES),
+            )
+            .first()
+        )
+
+    def get_attached(self, leader_id) -> List[ProcessingJob]:
+        """Get the jobs waiting for the result of a leader job."""
+        return (
+            self.db.query(ProcessingJob)
+            .filter(
+                ProcessingJob.leader_id == leader_id,
+                ProcessingJob.status == ProcessingJobStatus.ATTACHED,
+            )
+            .order_by(ProcessingJob.created_at)
+            .all()
+        )
+
+    def get_orphaned_attached(self) -> List[ProcessingJob]:
+        """Get attached jobs whose leader job was deleted."""
+        return (
+            self.db.query(ProcessingJob)
+            .filter(
+                ProcessingJob.status == ProcessingJobStatus.ATTACHED,
+                ProcessingJob.leader_id.is_(None),
+            )
+            .all()
+        )
+
+    def count_with_status(self, status: ProcessingJobStatus, user_id=None) -> int:
+        """Count jobs in a status, optionally for one user."""
+        query = self.db.query(func.count(ProcessingJob.id)).filter(ProcessingJob.status == status)
+        if user_id is not None:
+            query = query.filter(ProcessingJob.user_id == user_id)
+        return query.scalar()
+
+    def lock_dispatch(self) -> None:
+        """Take the dispatch lock until the current transaction ends."""
+        self.db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": DISPATCH_LOCK_KEY})
+
+    def running_counts_by_user(self) -> Dict:
+        """Number of running jobs per user."""
+        rows = (
+            self.db.query(ProcessingJob.user_id, func.count(ProcessingJob.id))
+            .filter(ProcessingJob.status == ProcessingJobStatus.RUNNING)
+            .group_by(ProcessingJob.user_id)
+            .all()
+        )
+        return dict(rows)
+
+    def next_queued_per_user(self) -> List[ProcessingJob]:
+        """The first queued job of every user, by lane and then by age."""
+        return (
+            self.db.query(ProcessingJob)
+            .filter(ProcessingJob.status == ProcessingJobStatus.QUEUED)
+            .order_by(ProcessingJob.user_id, ProcessingJob.lane, ProcessingJob.created_at)
+            .distinct(ProcessingJob.user_id)
+            .all()
+        )
+
+    def get_stale_running(self, updated_before: datetime) -> List[ProcessingJob]:
+        """Get running jobs whose document has not been updated since ``updated_before``."""
+        return (
+            self.db.query(ProcessingJob)
+            .join(Document, Document.id == ProcessingJob.document_id)
+            .filter(
+                ProcessingJob.status == ProcessingJobStatus.RUNNING,
+                ProcessingJob.started_at < updated_before,
+                Document.updated_at < updated_before,
+            )
+            .all()
+        )
+
+    def average_duration(self, recent: int = 50) -> Optional[float]:
+        """Average run time in seconds of the most recently finished jobs."""
+        durations = (
+            self.db.query(
+                func.extract("epoch", ProcessingJob.finished_at - ProcessingJob.started_at).label("seconds")
+            )
+            .filter(
+                ProcessingJob.status == ProcessingJobStatus.COMPLETED,
+                ProcessingJob.started_at.isnot(None),
+            )
+            .order_by(ProcessingJob.finished_at.desc())
+            .limit(recent)
+            .subquery()
+        )
+        average = self.db.query(func.avg(durations.c.seconds)).scalar()
+        return float(average) if average is not None else None
+
+    def stats_by_user(self, since: datetime, user_id=None) -> List[Dict]:
+        """Queue depth, running jobs and waiting times per user."""
+        queued = ProcessingJob.status == ProcessingJobStatus.QUEUED
+        running = ProcessingJob.status == ProcessingJobStatus.RUNNING
+        recently_started = ProcessingJob.started_at >= since
+
+        query = (
+            self.db.query(
+                ProcessingJob.user_id,
+                func.count(ProcessingJob.id).filter(queued).label("queued"),
+                func.count(ProcessingJob.id).filter(running).label("running"),
+                func.min(ProcessingJob.created_at).filter(queued).label("oldest_queued_at"),
+                func.avg(
+                    func.extract("epoch", ProcessingJob.started_at - ProcessingJob.created_at)
+                ).filter(recently_started).label("avg_wait_seconds"),
+            )
+            .filter(ProcessingJob.status.in_(ACTIVE_STATUSES) | recently_started)
+            .group_by(ProcessingJob.user_id)
+        )
+        if user_id is not None:
+            query = query.filter(ProcessingJob.user_id == user_id)
+
+        return [row._asdict() for row in query.all()]
+
+    def get_stale_documents_without_job(self, updated_before: datetime, limit: int = 100) -> List[Document]:
+        """Get documents stuck in processing that no active job is working on."""
+        active_job = (
+            self.db.query(ProcessingJob.id)
+            .filter(
+                ProcessingJob.document_id == Document.id,
+                ProcessingJob.status.in_(ACTIVE_STATUSES),
+            )
+            .exists()
+        )
+        return (
+            self.db.query(Document)
+            .filter(
+                Document.status == DocumentStatus.PROCESSING,
+                Document.updated_at < updated_before,
+                ~active_job,
+            )
+            .limit(limit)
+            .all()
+        )
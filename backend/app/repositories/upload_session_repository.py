@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.database import UploadSession
+from app.repositories.base import AsyncBaseRepository, BaseRepository
+
+class UploadSessionRepository(BaseRepository[UploadSession]):
+    def __init__(self, db: Session):
+        super().__init__(db, UploadSession)
+
+    def get_for_user(self, session_id, user_id) -> Optional[UploadSession]:
+        """Get an unexpired upload session of a user."""
+        return (
+            self.db.query(UploadSession)
+            .filter(
+                UploadSession.id == session_id,
+                UploadSession.user_id == user_id,
+                UploadSession.expires_at > datetime.utcnow(),
+            )
+            .first()
+        )
+
+    def count_for_user(self, user_id) -> int:
+        """Count the unexpired upload sessions of a user."""
+        return (
+            self.db.query(UploadSession)
+            .filter(UploadSession.user_id == user_id, UploadSession.expires_at > datetime.utcnow())
+            .count()
+        )
+
+    def add_range(self, session: UploadSession, start: int, end: int, expires_at: datetime) -> List[List[int]]:
+        """
+        Record that the bytes ``[start, end)`` of an upload have been stored.
+
+        The session row is locked while its ranges are merged, so concurrent
+        chunk uploads to any API process do not lose each other's ranges.
+
+        Returns:
+            The merged ranges received so far
+        """
+        locked = (
+            self.db.query(UploadSession)
+            .filter(UploadSession.id == session.id)
+            .with_for_update()
+            .populate_existing()  # ranges committed by others since the session was read
+            .one()
+        )
+        locked.received = merge_range(locked.received or [], start, end)
+        locked.expires_at = expires_at
+        self.db.commit()
+        return locked.received
+
+    def get_expired(self, limit: int = 100) -> List[UploadSession]:
+        """Get upload sessions that have expired."""
+        return (
+            self.db.query(UploadSession)
+            .filter(UploadSession.expires_at <= datetime.utcnow())
+            .limit(limit)
+            .all()
+        )
+
+
+class AsyncUploadSessionRepository(AsyncBaseRepository[UploadSession]):
+    """Upload session queries on an ``AsyncSession``, for the chunk endpoint that streams the request body."""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, UploadSession)
+
+    async def get_for_user(self, session_id, user_id) -> Optional[UploadSession]:
+        """Get an unexpired upload session of a user."""
+        return await self.db.scalar(
+            select(UploadSession).where(
+                UploadSession.id == session_id,
+                UploadSession.user_id == user_id,
+                UploadSession.expires_at > datetime.utcnow(),
+            )
+        )
+
+    async def add_range(self, session: UploadSession, start: int, end: int, expires_at: datetime) -> List[List[int]]:
+        """Record that the bytes ``[start, end)`` of an upload have been stored; see ``UploadSessionRepository.add_range``."""
+        locked = (await self.db.scalars(
+            select(UploadSession)
+            .where(UploadSession.id == session.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)  # ranges committed by others since the session was read
+        )).one()
+        locked.received = merge_range(locked.received or [], start, end)
+        locked.expires_at = expires_at
+        await self.db.commit()
+        return locked.received
+
+
+def merge_range(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """Add ``[start, end)`` to sorted, non-overlapping ranges, merging adjacent ones."""
+    merged = []
+    for range_start, range_end in sorted(ranges + [[start, end]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+    return merged
@@ -20,19 +20,60 @@ class DocumentResponse(BaseModel):
     id: str = Field(..., description="Unique document identifier")
     filename: str = Field(..., description="Original filename")
     title: Optional[str] = Field(None, description="Document title")
-    file_path: str = Field(..., description="Server file path")
+    file_path: str = Field(..., description="Storage key of the file")
     file_size: int = Field(..., description="File size in bytes")
     mime_type: str = Field(..., description="MIME type of the file")
+    content_hash: Optional[str] = Field(None, description="SHA-256 of the file content")
+    version: Optional[int] = Field(None, description="Current version number")
     status: DocumentStatus = Field(..., description="Processing status")
     message: str = Field(..., description="Status message")
     processed: Optional[bool] = Field(None, description="Whether document is processed")
     word_count: Optional[int] = Field(None, description="Total word count")
     sentence_count: Optional[int] = Field(None, description="Total sentence count")
     processing_time: Optional[float] = Field(None, description="Processing time in seconds")
+    error_message: Optional[str] = Field(None, description="Reason of the last failed processing")
     created_at: datetime = Field(..., description="Creation timestamp")
     updated_at: Optional[datetime] = Field(None, description="Last update timestamp")
 
 
+class DocumentVersionResponse(BaseModel):
+    """Response model for one version of a document."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    version: int = Field(..., description="Version number")
+    filename: str = Field(..., description="Original filename of this version")
+    file_size: int = Field(..., description="File size in bytes")
+    content_hash: Optional[str] = Field(None, description="SHA-256 of the file content")
+    current: bool = Field(..., description="Whether this is the document's current version")
+    processed: bool = Field(..., description="Whether the version's blocks are stored for reuse")
+    block_count: int = Field(0, description="Number of blocks the version was split into")
+    reused_blocks: int = Field(0, description="Blocks carried over from the previous version")
+    created_at: datetime = Field(..., description="Creation timestamp")
+
+
+class BulkUploadItem(BaseModel):
+    """Outcome for one file of a bulk upload."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    filename: str = Field(..., description="Uploaded filename, or path of the entry within a ZIP archive")
+    accepted: bool = Field(..., description="Whether a document was created for the file")
+    document_id: Optional[str] = Field(None, description="Identifier of the created document")
+    status: Optional[DocumentStatus] = Field(None, description="Processing status of the created document")
+    file_size: Optional[int] = Field(None, description="File size in bytes")
+    content_hash: Optional[str] = Field(None, description="SHA-256 of the file content")
+    message: str = Field(..., description="Status message, or why the file was rejected")
+
+
+class BulkUploadResponse(BaseModel):
+    """Response model for bulk uploads."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    documents: List[BulkUploadItem] = Field(..., description="Outcome for each file, in upload order")
+    accepted: int = Field(..., description="Number of documents created")
+    rejected: int = Field(..., description="Number of files rejected")
+    processing_time: float = Field(..., description="Request time in seconds")
+
+
 class DocumentProcessResponse(BaseModel):
     """Response model for document processing."""
     model_config = ConfigDict(from_attributes=True)
@@ -45,6 +86,7 @@ class DocumentProcessResponse(BaseModel):
     entities_count: Optional[int] = Field(None, description="Number of extracted entities")
     sections_count: Optional[int] = Field(None, description="Number of identified sections")
     processing_time: Optional[float] = Field(None, description="Processing time in seconds")
+    stages: Optional[Dict[str, str]] = Field(None, description="Whether each processing stage will be reused or run")
     error_details: Optional[str] = Field(None, description="Error details if processing failed")
 
 
@@ -116,16 +158,69 @@ class ProcessedDocument(BaseModel):
     updated_at: datetime = Field(..., description="Last update timestamp")
 
 
+class DocumentSummary(BaseModel):
+    """Processing results of a document without its text and item lists."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    document_id: str = Field(..., description="Document identifier")
+    filename: str = Field(..., description="Original filename")
+    title: str = Field(..., description="Document title")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Document metadata")
+    key_phrases: List[str] = Field(default_factory=list, description="Extracted key phrases")
+    word_count: int = Field(0, description="Total word count")
+    sentence_count: int = Field(0, description="Number of sentences; see /sentences")
+    chunk_count: int = Field(0, description="Number of chunks; see /chunks")
+    entity_count: int = Field(0, description="Number of named entities; see /entities")
+    section_count: int = Field(0, description="Number of sections; see /sections")
+    processing_time: float = Field(0, description="Processing time in seconds")
+    created_at: datetime = Field(..., description="Creation timestamp")
+    updated_at: Optional[datetime] = Field(None, description="Last update timestamp")
+
+
+class DocumentItemsPage(BaseModel):
+    """A range of one of a document's item lists."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    document_id: str = Field(..., description="Document identifier")
+    offset: int = Field(..., description="Number of the first item in the range")
+    limit: int = Field(..., description="Maximum number of items in the range")
+    total: int = Field(..., description="Number of items in the whole list")
+    has_more: bool = Field(..., description="Whether items follow the range")
+
+
+class SentencePage(DocumentItemsPage):
+    """A range of a document's sentences."""
+    items: List[str] = Field(..., description="Sentences, in document order")
+
+
+class ChunkPage(DocumentItemsPage):
+    """A range of a document's chunks."""
+    items: List[TextChunk] = Field(..., description="Chunks, in document order")
+
+
+class EntityPage(DocumentItemsPage):
+    """A range of a document's named entities."""
+    items: List[EntityExtraction] = Field(..., description="Named entities, in document order")
+
+
+class SectionPage(DocumentItemsPage):
+    """A range of a document's sections."""
+    items: List[DocumentSection] = Field(..., description="Sections, in document order")
+
+
 class DocumentListResponse(BaseModel):
     """Response for listing documents."""
     model_config = ConfigDict(from_attributes=True)
     
-    documents: List[DocumentResponse] = Field(..., description="List of documents")
-    total: int = Field(..., description="Total number of documents")
-    page: int = Field(..., description="Current page number")
+    documents: List[Union[DocumentResponse, Dict[str, Any]]] = Field(..., description="List of documents, newest first; only the requested fields with fields=")
+    total: Optional[int] = Field(None, description="Total number of documents, if requested")
+    total_estimated: bool = Field(False, description="Whether the total is the database's estimate")
+    page: Optional[int] = Field(None, description="Current page number when paging by offset")
     per_page: int = Field(..., description="Items per page")
     has_next: bool = Field(..., description="Whether there are more pages")
     has_prev: bool = Field(..., description="Whether there are previous pages")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page")
+    prev_cursor: Optional[str] = Field(None, description="Cursor of the previous page")
 
 
 class DocumentUploadRequest(BaseModel):
@@ -134,3 +229,27 @@ class DocumentUploadRequest(BaseModel):
     
     title: Optional[str] = Field(None, description="Document title")
     description: Optional[str] = Field(None, description="Document description")
+
+
+class UploadSessionCreate(BaseModel):
+    """Request model for starting a resumable upload."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    filename: str = Field(..., min_length=1, max_length=255, description="Original filename")
+    file_size: int = Field(..., gt=0, description="Total file size in bytes")
+    title: Optional[str] = Field(None, max_length=255, description="Document title")
+    mime_type: Optional[str] = Field(None, max_length=100, description="MIME type of the file")
+
+
+class UploadSessionResponse(BaseModel):
+    """State of a resumable upload."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    upload_id: str = Field(..., description="Upload identifier, and the ID of the document it becomes")
+    filename: str = Field(..., description="Original filename")
+    file_size: int = Field(..., description="Total file size in bytes")
+    offset: int = Field(..., description="Bytes received without gaps from the start; resume from here")
+    received: List[List[int]] = Field(..., description="Received byte ranges as [start, end) pairs")
+    missing: List[List[int]] = Field(..., description="Byte ranges still to be sent as [start, end) pairs")
+    complete: bool = Field(..., description="Whether all bytes have been received")
+    expires_at: datetime = Field(..., description="When the upload is discarded if it is not continued")
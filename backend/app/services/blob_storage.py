@@ -0,0 +1,335 @@
+"""
+Content-addressed storage of uploaded files.
+
+Files are stored once per content under a key derived from their SHA-256,
+sharded into two directory levels (``ab/cd/abcd...ef.pdf``), and shared by
+every document and version with the same content. The ``blobs`` table
+counts the references to each file, which is deleted with the last one.
+
+Keys are opaque to the rest of the application: processing reads a file
+through ``local_path``, downloads stream from ``open``. Files stored before
+content addressing keep their plain paths as keys.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.repositories.blob_repository import BlobRepository
+from app.services.file_response import content_disposition
+from app.services.upload_storage import save_upload_stream
+
+
+# Keys of content-addressed files; anything else is a path from before
+BLOB_KEY_PATTERN = re.compile(r"[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]+)?")
+
+
+def blob_key(content_hash: str, extension: str) -> str:
+    """Storage key of a file: sharded by the first bytes of its hash, keeping its extension."""
+    return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}{extension.lower()}"
+
+
+class StorageBackend(ABC):
+    """Where blobs are kept."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether a blob is stored under ``key``."""
+
+    @abstractmethod
+    def put(self, source: Path, key: str) -> None:
+        """Store the local file ``source`` under ``key``, consuming the file."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open a blob for streaming reads; the caller closes it."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete a blob, if it exists."""
+
+    @abstractmethod
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[Path]:
+        """A path on the local file system with the blob's content, for the duration of the context."""
+
+    def file_path(self, key: str) -> Optional[Path]:
+        """The blob's own path on the local file system, if it has one."""
+        return None
+
+    def download_url(self, key: str, filename: str, media_type: str, expires_in: int) -> Optional[str]:
+        """A temporary URL clients can download the blob from directly, if the backend offers one."""
+        return None
+
+    def iter_chunks(self, key: str, chunk_size: int = settings.UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        """Read a blob in chunks."""
+        with closing(self.open(key)) as source:
+            while chunk := source.read(chunk_size):
+                yield chunk
+
+
+class LocalStorage(StorageBackend):
+    """Blobs as files in a sharded directory tree under ``root``."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def file_path(self, key: str) -> Optional[Path]:
+        return self.path(key)
+
+    def put(self, source: Path, key: str) -> None:
+        destination = self.path(key)
+        if destination.exists():
+            # Identical content is already stored
+            source.unlink(missing_ok=True)
+            return
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(source, destination)
+        except OSError:
+            # Across file systems; copied to a temporary name and renamed
+            # into place so readers never see a partial blob
+            fd, temp_path = tempfile.mkstemp(dir=destination.parent, prefix=".blob-", suffix=".part")
+            os.close(fd)
+            try:
+                shutil.copyfile(source, temp_path)
+                os.replace(temp_path, destination)
+            except BaseException:
+                Path(temp_path).unlink(missing_ok=True)
+                raise
+            source.unlink(missing_ok=True)
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[Path]:
+        path = self.path(key)
+        if not path.exists():
+            raise FileNotFoundError(f"Blob {key} not found")
+        yield path
+
+
+class S3Storage(StorageBackend):
+    """
+    Blobs as objects in an S3-compatible bucket.
+
+    ``endpoint_url`` points the client at another implementation of the S3
+    API, such as a local MinIO for development and tests. Credentials come
+    from the usual AWS environment variables or configuration files.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None, region: Optional[str] = None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self._client = None
+
+    @property
+    def client(self):
+        # boto3 is only needed when this backend is used
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("s3", endpoint_url=self.endpoint_url, region_name=self.region)
+        return self._client
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, source: Path, key: str) -> None:
+        try:
+            if not self.exists(key):
+                # Multipart for large files, streamed from disk
+                self.client.upload_file(str(source), self.bucket, self.object_key(key))
+        finally:
+            source.unlink(missing_ok=True)
+
+    def open(self, key: str) -> BinaryIO:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))["Body"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(f"Blob {key} not found") from e
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def download_url(self, key: str, filename: str, media_type: str, expires_in: int) -> Optional[str]:
+        # S3 serves ranges and conditional requests itself
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.object_key(key),
+                "ResponseContentDisposition": content_disposition(filename),
+                "ResponseContentType": media_type,
+            },
+            ExpiresIn=expires_in,
+        )
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[Path]:
+        # Extractors need a seekable file; the object is downloaded for the duration
+        temp_dir = Path(settings.UPLOAD_DIR)
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir, prefix=".download-", suffix=Path(key).suffix)
+        os.close(fd)
+        try:
+            with open(temp_path, "wb") as out:
+                for chunk in self.iter_chunks(key):
+                    out.write(chunk)
+            yield Path(temp_path)
+        finally:
+            Path(temp_path).unlink(missing_ok=True)
+
+
+class BlobStore:
+    """
+    Reference-counted, content-addressed files on a storage backend.
+
+    Every stored upload takes a reference to its blob and every deleted
+    document or version gives one back. A reference is taken before the
+    blob is written and given back under a row lock before it is deleted,
+    so a blob is never deleted while an upload of the same content is
+    being stored.
+    """
+
+    def __init__(self, backend: StorageBackend, incoming_dir: Path):
+        self.backend = backend
+        self.incoming_dir = incoming_dir
+
+    def incoming_path(self, extension: str) -> Path:
+        """A new path in the directory where uploads are received before they are stored."""
+        return self.incoming_dir / f"{uuid.uuid4()}{extension.lower()}"
+
+    def save_upload(
+        self, db: Session, file: BinaryIO, extension: str, max_size: int = settings.MAX_FILE_SIZE
+    ) -> Tuple[str, int, str]:
+        """
+        Stream a file-like upload to storage. Blocking; run it in a thread.
+
+        Returns:
+            The storage key, the file size in bytes and the hex SHA-256 of its content
+
+        Raises:
+            UploadTooLargeError: As soon as more than ``max_size`` bytes arrive
+        """
+        incoming = self.incoming_path(extension)
+        size, content_hash = save_upload_stream(file, incoming, max_size=max_size)
+        return self.store(db, incoming, content_hash, size, extension), size, content_hash
+
+    def store(self, db: Session, source: Path, content_hash: str, size: int, extension: str) -> str:
+        """
+        Store a received local file under its content key, consuming the file.
+
+        Returns:
+            The storage key
+        """
+        key = blob_key(content_hash, extension)
+        BlobRepository(db).acquire(key, content_hash, size)
+        try:
+            self.backend.put(source, key)
+        except BaseException:
+            self.release(db, key)
+            raise
+        return key
+
+    def release(self, db: Session, key: str) -> None:
+        """Give back a reference to a stored file, deleting it after the last one."""
+        if not BLOB_KEY_PATTERN.fullmatch(key):
+            # Stored at a plain path before content addressing
+            Path(key).unlink(missing_ok=True)
+            return
+
+        try:
+            remaining = BlobRepository(db).release(key, self.backend.delete)
+        except Exception:
+            db.rollback()
+            raise
+        if remaining == 0:
+            logger.info(f"Deleted blob {key}")
+
+    def exists(self, key: str) -> bool:
+        if not BLOB_KEY_PATTERN.fullmatch(key):
+            return Path(key).exists()
+        return self.backend.exists(key)
+
+    def open(self, key: str) -> BinaryIO:
+        if not BLOB_KEY_PATTERN.fullmatch(key):
+            return open(key, "rb")
+        return self.backend.open(key)
+
+    def file_path(self, key: str) -> Optional[Path]:
+        """The file's own local path, if storage keeps it on the local file system."""
+        if not BLOB_KEY_PATTERN.fullmatch(key):
+            return Path(key)
+        return self.backend.file_path(key)
+
+    def download_url(self, key: str, filename: str, media_type: str) -> Optional[str]:
+        """A temporary direct download URL, if storage offers one."""
+        if not BLOB_KEY_PATTERN.fullmatch(key):
+            return None
+        return self.backend.download_url(key, filename, media_type, settings.DOWNLOAD_URL_EXPIRES_SECONDS)
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[Path]:
+        """A local path with the file's content, for the duration of the context."""
+        if not BLOB_KEY_PATTERN.fullmatch(key):
+            yield Path(key)
+            return
+        with self.backend.local_path(key) as path:
+            yield path
+
+
+def _create_backend() -> StorageBackend:
+    backend = settings.STORAGE_BACKEND
+    if backend == "local":
+        return LocalStorage(Path(settings.STORAGE_LOCAL_ROOT))
+    if backend == "s3":
+        return S3Storage(
+            bucket=settings.STORAGE_S3_BUCKET,
+            prefix=settings.STORAGE_S3_PREFIX,
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            region=settings.STORAGE_S3_REGION,
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+# Global instance
+blob_store = BlobStore(_create_backend(), incoming_dir=Path(settings.UPLOAD_DIR) / ".incoming")
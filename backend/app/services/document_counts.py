@@ -0,0 +1,77 @@
+"""
+Totals for document listings without counting the whole table on every page.
+"""
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.repositories.document_repository import AsyncDocumentRepository
+
+
+# How a listing's total is computed
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_NONE = "none"
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_NONE)
+
+
+class DocumentCounter:
+    """
+    Exact or estimated numbers of documents matching listing filters.
+
+    Exact counts are kept per filter for ``cache_seconds`` in this process,
+    so paging through a listing counts it once. Estimates come from the
+    query planner and cost no scan; estimates below ``exact_below`` are
+    replaced by an exact count, which is cheap on the listing indexes and
+    keeps small listings accurate.
+    """
+
+    def __init__(self, cache_seconds: int, exact_below: int, max_entries: int = 10000):
+        self.cache_seconds = cache_seconds
+        self.exact_below = exact_below
+        self.max_entries = max_entries
+        self._exact: Dict[Tuple, Tuple[float, int]] = {}
+
+    async def count(
+        self, db: AsyncSession, filters: Dict[str, Any], mode: str = COUNT_ESTIMATED
+    ) -> Tuple[Optional[int], bool]:
+        """
+        Count the documents matching ``filters``.
+
+        Returns:
+            The total, or ``None`` for mode ``none``, and whether it is an estimate
+        """
+        if mode == COUNT_NONE:
+            return None, False
+
+        if mode == COUNT_ESTIMATED:
+            estimate = await AsyncDocumentRepository(db).count_estimate(filters)
+            if estimate >= self.exact_below:
+                return estimate, True
+
+        return await self._count_exact(db, filters), False
+
+    async def _count_exact(self, db: AsyncSession, filters: Dict[str, Any]) -> int:
+        key = tuple(sorted((name, str(value)) for name, value in filters.items()))
+        now = time.monotonic()
+        cached = self._exact.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        total = await AsyncDocumentRepository(db).count(filters=filters)
+        if len(self._exact) >= self.max_entries:
+            self._exact = {k: v for k, v in self._exact.items() if v[0] > now}
+            if len(self._exact) >= self.max_entries:
+                self._exact.clear()
+        self._exact[key] = (now + self.cache_seconds, total)
+        return total
+
+
+# Global instance
+document_counter = DocumentCounter(
+    cache_seconds=settings.DOCUMENT_COUNT_CACHE_SECONDS,
+    exact_below=settings.DOCUMENT_COUNT_EXACT_BELOW,
+)
@@ -0,0 +1,482 @@
+"""
+Document processing jobs, executed by the job queue workers.
+
+Jobs use the synchronous ``SessionLocal``. The jobs of a worker share its
+event loop, but their queries are short and the long work (extraction and
+NLP) runs in thread and process pools, so a query holds the others up only
+briefly.
+"""
+
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import create_db_session
+from app.models.database import DocumentStatus
+from app.repositories.document_repository import DocumentRepository
+from app.repositories.document_version_repository import DocumentVersionRepository
+from app.services.blob_storage import blob_store
+from app.services.document_processor import PIPELINE_STAGES, document_processor
+from app.services.job_control import NLP, JobControl
+from app.services.nlp_batcher import nlp_batcher
+from app.services.nlp_pool import nlp_pool
+from app.services.result_cache import result_cache
+from app.services.stage_cache import PARTIAL, RAN, REUSED, output_hash, stage_cache
+from app.services.text_index import TextIndexBuilder, build_text_index, decode_block, encode_block
+
+
+async def process_document_job(
+    document_id: str,
+    file_path: str,
+    file_type: str,
+    original_filename: str,
+    control: JobControl,
+):
+    """
+    Process a document and save the results to the database.
+
+    ``file_path`` is the storage key of the document's file, which is read
+    from a local path for the duration of the job. Extraction is pulled
+    page by page through ``control``, which checks for cancellation and
+    enforces the time budgets between pages and NLP windows. Stages whose
+    output is cached for their input are skipped, and the document records
+    which stages were reused. Errors are raised to the caller so the queue
+    can retry the job; the document is only marked as failed once retries
+    are exhausted.
+    """
+    with blob_store.local_path(file_path) as local_path:
+        await _process_document_file(document_id, str(local_path), file_type, original_filename, control)
+
+
+async def _process_document_file(
+    document_id: str,
+    file_path: str,
+    file_type: str,
+    original_filename: str,
+    control: JobControl,
+):
+    # The body of process_document_job, on a local copy of the file
+    db = create_db_session()
+    processing_start_time = time.time()
+
+    try:
+        logger.info(f"Starting processing for document {document_id}")
+        document_repo = DocumentRepository(db)
+
+        # Update status to processing
+        document = document_repo.update_processing_status(
+            document_id,
+            DocumentStatus.PROCESSING
+        )
+
+        # Versions are processed block by block, reusing unchanged blocks;
+        # otherwise large files are extracted, analysed and persisted page by page
+        if settings.INCREMENTAL_PROCESSING_ENABLED:
+            await process_document_incremental(
+                db, document_repo, document_id, file_path, file_type, processing_start_time, control
+            )
+        elif Path(file_path).stat().st_size >= settings.STREAMING_MIN_FILE_SIZE:
+            await process_document_streaming(
+                document_repo, document_id, file_path, file_type, processing_start_time, control
+            )
+        else:
+            report = {}
+
+            # Extract text
+            metadata = {}
+            units = extract_stage(db, document.content_hash, file_path, file_type, metadata, control, report)
+            raw_text = "".join([unit["raw"] async for unit in units])
+
+            # Clean, analyse and chunk, each stage keyed by the output of the one before
+            async def clean():
+                return document_processor.clean_stage(raw_text)
+
+            async def analyse():
+                return await document_processor.nlp_stage(
+                    cleaned["cleaned_text"], cleaned["page_starts"], _analyze_windows(control)
+                )
+
+            async def chunk():
+                return document_processor.chunk_stage(analysis)
+
+            cleaned, cleaned_hash = await stage_cache.run(db, "clean", output_hash(raw_text), clean, report)
+            analysis, analysis_hash = await stage_cache.run(db, "nlp", cleaned_hash, analyse, report)
+            chunked, _ = await stage_cache.run(db, "chunk", analysis_hash, chunk, report)
+            report["persist"] = RAN
+
+            # Calculate processing time
+            processing_time = int(time.time() - processing_start_time)
+
+            # Update document with results
+            update_data = {
+                "raw_text": raw_text,
+                **build_text_index(analysis["sentences"], chunked["chunks"]),
+                "processed_chunks": None,
+                "document_metadata": metadata,
+                "entities": [{"text": ent[0], "label": ent[1]} for ent in analysis["entities"]],
+                "key_phrases": chunked["key_phrases"],
+                "sections": cleaned["sections"],
+                "word_count": analysis["word_count"],
+                "sentence_count": len(analysis["sentences"]),
+                "processed": True,
+                "status": DocumentStatus.COMPLETED,
+                "processing_time": processing_time,
+                "processing_stages": report,
+                "error_message": None,
+            }
+
+            document_repo.update_processing_status(document_id, DocumentStatus.COMPLETED, **update_data)
+
+            logger.info(f"Document {document_id} processed successfully:")
+            logger.info(f"- Raw text length: {len(raw_text)}")
+            logger.info(f"- Sentences: {len(analysis['sentences'])}")
+            logger.info(f"- Chunks: {len(chunked['chunks'])}")
+            logger.info(f"- Entities: {len(analysis['entities'])}")
+            logger.info(f"- Stages: {report}")
+            logger.info(f"- Processing time: {processing_time}s")
+
+        # Make the results reusable for identical uploads
+        result_cache.store(db, document_repo.get(document_id))
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        db.close()
+
+
+async def process_document_streaming(
+    document_repo: DocumentRepository,
+    document_id: str,
+    file_path: str,
+    file_type: str,
+    processing_start_time: float,
+    control: JobControl,
+):
+    """
+    Process a large document as a stream of pages.
+
+    Result batches are stored as soon as they are produced and assembled
+    into the document when it is complete, so neither the raw text nor the
+    results of the whole document are held in memory.
+    """
+    metadata = {}
+    totals = {"raw_text": 0, "chunks": 0, "entities": 0, "sentences": 0}
+
+    # Clear results of a previous run before appending
+    document_repo.update_processing_status(
+        document_id,
+        DocumentStatus.PROCESSING,
+        raw_text=None,
+        cleaned_text=None,
+        sentence_offsets=None,
+        chunk_offsets=None,
+        processed_chunks=None,
+        entities=[],
+        key_phrases=[],
+        sections=[],
+        word_count=0,
+        sentence_count=0,
+        error_message=None,
+    )
+    document_repo.clear_processing_batches(document_id)
+
+    text_index = TextIndexBuilder()
+    units = control.units(document_processor.stream_text_units(file_path, file_type, metadata))
+    seq = 0
+    async for batch in document_processor.preprocess_stream(units, _analyze_windows(control)):
+        control.checkpoint()
+        batch.update(text_index.add(batch["sentences"], batch["chunks"]))
+        document_repo.append_processing_batch(document_id, seq, batch)
+        seq += 1
+        totals["raw_text"] += len(batch["raw_text"])
+        totals["chunks"] += len(batch["chunks"])
+        totals["entities"] += len(batch["entities"])
+        totals["sentences"] += batch["sentence_count"]
+
+    document_repo.finish_processing_batches(document_id)
+    processing_time = int(time.time() - processing_start_time)
+    document_repo.update_processing_status(
+        document_id,
+        DocumentStatus.COMPLETED,
+        document_metadata=metadata,
+        processed=True,
+        processing_time=processing_time,
+        processing_stages={stage: RAN for stage in PIPELINE_STAGES},
+    )
+
+    logger.info(f"Document {document_id} processed successfully (streamed):")
+    logger.info(f"- Raw text length: {totals['raw_text']}")
+    logger.info(f"- Sentences: {totals['sentences']}")
+    logger.info(f"- Chunks: {totals['chunks']}")
+    logger.info(f"- Entities: {totals['entities']}")
+    logger.info(f"- Processing time: {processing_time}s")
+
+
+async def process_document_incremental(
+    db: Session,
+    document_repo: DocumentRepository,
+    document_id: str,
+    file_path: str,
+    file_type: str,
+    processing_start_time: float,
+    control: JobControl,
+):
+    """
+    Process the current version of a document, reusing unchanged blocks.
+
+    Units are hashed as they are extracted and grouped into blocks. Blocks
+    whose hash appears in this version's earlier run or in the newest
+    earlier version processed by the same clean and NLP stages take their
+    sentences, entities and noun chunks from there; the other blocks are
+    cleaned and take their NLP output from the stage cache, or are
+    analysed. Chunks and key phrases are derived again for every block.
+    Result batches and blocks are stored as they are produced and the
+    batches are assembled into the document at the end, so the time taken grows with the size of the
+    change rather than the document.
+    """
+    version_repo = DocumentVersionRepository(db)
+    document = document_repo.get(document_id)
+    version = version_repo.get_current(document)
+    block_version = document_processor.block_pipeline_version
+
+    # Stored blocks stay valid as long as the stages analysing them are unchanged
+    if version.pipeline_version != block_version:
+        version_repo.clear_blocks(version, block_version)
+    previous = version_repo.get_latest_processed(document.id, version.version, block_version)
+    sources = [version.id] + ([previous.id] if previous else [])
+    known_hashes = set().union(*(version_repo.get_block_hashes(source) for source in sources))
+
+    report = {}
+    # Clear results of a previous run before appending
+    document_repo.update_processing_status(
+        document_id,
+        DocumentStatus.PROCESSING,
+        raw_text=None,
+        cleaned_text=None,
+        sentence_offsets=None,
+        chunk_offsets=None,
+        processed_chunks=None,
+        entities=[],
+        key_phrases=[],
+        sections=[],
+        word_count=0,
+        sentence_count=0,
+        error_message=None,
+    )
+    document_repo.clear_processing_batches(document_id)
+
+    analyze_windows = _analyze_windows(control)
+    metadata = {}
+    counts = {"blocks": 0, "reused": 0, "cached": 0, "chunks": 0, "sentences": 0, "batches": 0}
+    seen_phrases = set()
+    pending = []
+    text_index = TextIndexBuilder()
+
+    async def flush():
+        # Carry over the reusable blocks of the batch with a single query
+        reusable = {block["hash"] for block in pending if block["hash"] in known_hashes}
+        stored = version_repo.get_block_results(sources, reusable) if reusable else {}
+        reused = {block_hash: decode_block(**row) for block_hash, row in stored.items()}
+
+        batch = {
+            "raw_text": "", "sentences": [], "chunks": [], "entities": [], "key_phrases": [], "sections": [],
+            "word_count": 0, "sentence_count": 0,
+        }
+        rows = []
+        for block in pending:
+            result = reused.get(block["hash"])
+            if result is None:
+                block_report = {}
+                result = await analyze_block(db, block["units"], analyze_windows, block_report)
+                if block_report["nlp"] == REUSED:
+                    counts["cached"] += 1
+            else:
+                counts["reused"] += 1
+            chunked = document_processor.chunk_stage(result)
+            sentence_count = len(result["sentences"])
+
+            # Block-local chunk and sentence numbers continue the document's
+            for chunk in chunked["chunks"]:
+                batch["chunks"].append({
+                    **chunk,
+                    "id": counts["chunks"] + chunk["id"],
+                    "start_sentence": counts["sentences"] + chunk["start_sentence"],
+                    "end_sentence": counts["sentences"] + chunk["end_sentence"],
+                })
+            counts["chunks"] += len(chunked["chunks"])
+            counts["sentences"] += sentence_count
+            batch["sentences"].extend(result["sentences"])
+
+            batch["raw_text"] += "".join(unit["raw"] for unit in block["units"])
+            batch["entities"].extend(result["entities"])
+            batch["key_phrases"].extend(phrase for phrase in chunked["key_phrases"] if phrase not in seen_phrases)
+            seen_phrases.update(chunked["key_phrases"])
+            batch["sections"].extend(result["sections"])
+            batch["word_count"] += result["word_count"]
+            batch["sentence_count"] += sentence_count
+
+            rows.append({
+                "position": counts["blocks"],
+                "block_hash": block["hash"],
+                "unit_count": len(block["units"]),
+                **encode_block(result["text"], result),
+            })
+            counts["blocks"] += 1
+
+        control.checkpoint()
+        batch.update(text_index.add(batch["sentences"], batch["chunks"]))
+        document_repo.append_processing_batch(document_id, counts["batches"], batch)
+        counts["batches"] += 1
+        version_repo.replace_blocks(version.id, rows)
+        pending.clear()
+
+    units = extract_stage(db, document.content_hash, file_path, file_type, metadata, control, report)
+    pending_chars = 0
+    async for block in document_processor.stream_blocks(units):
+        pending.append(block)
+        pending_chars += sum(len(unit["text"]) for unit in block["units"])
+        if pending_chars >= settings.NLP_WINDOW_CHARS:
+            await flush()
+            pending_chars = 0
+    if pending:
+        await flush()
+    version_repo.truncate_blocks(version.id, counts["blocks"])
+
+    # Blocks stand in for the clean and NLP stages; chunking always runs
+    reused = counts["reused"] + counts["cached"]
+    if counts["blocks"] and reused == counts["blocks"]:
+        analysed = REUSED
+    else:
+        analysed = PARTIAL if reused else RAN
+    report.update(clean=analysed, nlp=analysed, chunk=RAN, persist=RAN)
+    report["blocks"] = {"total": counts["blocks"], "reused": counts["reused"], "cached": counts["cached"]}
+
+    document_repo.finish_processing_batches(document_id)
+    processing_time = int(time.time() - processing_start_time)
+    document_repo.update_processing_status(
+        document_id,
+        DocumentStatus.COMPLETED,
+        document_metadata=metadata,
+        processed=True,
+        processing_time=processing_time,
+        processing_stages=report,
+    )
+    version_repo.update(version, {
+        "block_count": counts["blocks"],
+        "reused_blocks": counts["reused"],
+    })
+    # Later versions only reuse blocks of this one
+    version_repo.delete_blocks_before(document.id, version.version)
+
+    logger.info(f"Document {document_id} version {version.version} processed incrementally:")
+    logger.info(
+        f"- Blocks: {counts['blocks']} ({counts['reused']} reused from version "
+        f"{previous.version if previous else '-'}, {counts['cached']} from the stage cache)"
+    )
+    logger.info(f"- Sentences: {counts['sentences']}")
+    logger.info(f"- Chunks: {counts['chunks']}")
+    logger.info(f"- Processing time: {processing_time}s")
+
+
+async def analyze_block(
+    db: Session,
+    units: List[Dict[str, Any]],
+    analyze_windows,
+    report: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Clean and analyse one block, as stored for reuse by later versions.
+
+    The NLP output is looked up in the stage cache under the hash of the
+    block's clean output, like a whole document's, so a block analysed in
+    any document is not analysed again.
+
+    Returns:
+        The block's cleaned text, sentences, entities, noun chunks, sections and word count
+    """
+    cleaned = document_processor.clean_block(units)
+
+    async def analyse():
+        return await document_processor.nlp_stage(cleaned["cleaned_text"], cleaned["page_starts"], analyze_windows)
+
+    analysis, _ = await stage_cache.run(db, "nlp", output_hash(cleaned), analyse, report)
+    return {
+        "text": cleaned["cleaned_text"],
+        "sentences": analysis["sentences"],
+        "entities": [[entity_text, label] for entity_text, label in analysis["entities"]],
+        "noun_chunks": analysis["noun_chunks"],
+        "sections": cleaned["sections"],
+        "word_count": analysis["word_count"],
+    }
+
+
+async def extract_stage(
+    db: Session,
+    content_hash: Optional[str],
+    file_path: str,
+    file_type: str,
+    metadata: Dict[str, Any],
+    control: JobControl,
+    report: Dict[str, Any],
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield the text units of a file from the extract stage's cache, or extract them.
+
+    Extracted units are cached for the file's content once extraction
+    finishes, unless they grow beyond what the stage cache keeps; only
+    that much is held in memory.
+    """
+    cached = stage_cache.lookup(db, "extract", content_hash)
+    if cached is not None:
+        output, _ = cached
+        metadata.update(output["metadata"])
+        report["extract"] = REUSED
+        for unit in output["units"]:
+            control.checkpoint()
+            yield unit
+        return
+
+    report["extract"] = RAN
+    units = []
+    size = 0
+    async for unit in control.units(document_processor.stream_text_units(file_path, file_type, metadata)):
+        if units is not None:
+            units.append(unit)
+            size += len(unit["text"]) + len(unit["raw"])
+            if size > settings.STAGE_CACHE_MAX_ENTRY_BYTES:
+                units = None
+        yield unit
+
+    if units is not None:
+        # The clean stage consumes the raw text, so that is what its key hashes
+        raw_text = "".join(unit["raw"] for unit in units)
+        stage_cache.store(db, "extract", content_hash, {"units": units, "metadata": metadata}, output_hash(raw_text))
+
+
+def _analyze_windows(control: JobControl):
+    # Window analysis in the NLP pool, batched with the windows of concurrent
+    # jobs, timed and charged to the NLP budget
+    analyze = nlp_batcher.analyze_windows if settings.NLP_BATCHING_ENABLED else nlp_pool.analyze_windows
+
+    def analyze_windows(items):
+        return control.step(NLP, analyze(items), steps=len(items))
+    return analyze_windows
+
+
+def mark_document_failed(document_id: str, reason: str) -> None:
+    """Mark a document as failed after its job has given up."""
+    db = create_db_session()
+    try:
+        DocumentRepository(db).update_processing_status(
+            document_id, DocumentStatus.FAILED, error_message=reason
+        )
+    except Exception as e:
+        logger.error(f"Failed to update document status to failed: {e}")
+    finally:
+        db.close()
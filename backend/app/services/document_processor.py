@@ -2,32 +2,112 @@
 Document processing service for extracting and preprocessing text from various file formats.
 """
 
+import hashlib
 import os
 import re
-from typing import Dict, List, Optional, Tuple
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
 import asyncio
 from pathlib import Path
 
-import spacy
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import sent_tokenize, word_tokenize
-from pypdf import PdfReader
-from docx import Document as DocxDocument
-from pptx import Presentation
 from loguru import logger
 
 from app.core.config import settings
+from app.services.nlp_pool import nlp_pool
+from app.services.pdf_extraction import pdf_shard_pool
+
+
+# Processing stages in order; persisting the results is never cached
+PIPELINE_STAGES = ("extract", "clean", "nlp", "chunk", "persist")
+
+# Bump a stage's version when a change to it alters its output; cached
+# outputs of other versions are discarded. Stage outputs are keyed by their
+# input, so later stages are still reused if the output did not change.
+STAGE_VERSIONS = {"extract": 1, "clean": 1, "nlp": 1, "chunk": 2}
+
+# spaCy components needed for sentences, noun chunks and entities; the rest
+# of the pipeline (e.g. the lemmatizer) is disabled while processing
+NLP_REQUIRED_PIPES = ("tok2vec", "tagger", "attribute_ruler", "parser", "ner")
+
+# Page and slide markers inserted by the PDF and PPTX extractors
+PAGE_BREAK_PATTERN = re.compile(r'--- (?:Page|Slide) \d+ ---')
+
+# Upper bound for one TXT unit when a file has no blank lines
+TXT_MAX_UNIT_CHARS = 64 * 1024
+
+# A paragraph ends a block when its hash is divisible by this, so blocks of
+# paragraphs average this many paragraphs beyond the minimum block size
+BLOCK_BOUNDARY_MODULUS = 4
 
 
 class DocumentProcessor:
     """Professional document processing service."""
     
     def __init__(self):
-        """Initialize the document processor."""
-        self.nlp = spacy.load("en_core_web_sm")
-        self.stop_words = set(stopwords.words('english'))
+        """
+        Initialize the document processor.
+        
+        The spaCy model, NLTK stopwords and the document format libraries are
+        loaded on first use (or by ``warm_up``), so importing this module and
+        creating the processor stay cheap.
+        """
+        self._nlp = None
+        self._stop_words: Optional[Set[str]] = None
+        self._load_lock = threading.Lock()
         self.supported_formats = ['.pdf', '.docx', '.txt', '.pptx']
+    
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first use."""
+        if self._nlp is None:
+            with self._load_lock:
+                if self._nlp is None:
+                    import spacy
+                    
+                    logger.info("Loading spaCy model en_core_web_sm")
+                    self._nlp = spacy.load("en_core_web_sm")
+        return self._nlp
+    
+    @property
+    def stop_words(self) -> Set[str]:
+        """NLTK English stopwords, loaded on first use."""
+        if self._stop_words is None:
+            from nltk.corpus import stopwords
+            
+            self._stop_words = set(stopwords.words('english'))
+        return self._stop_words
+    
+    @property
+    def is_warm(self) -> bool:
+        """Whether the NLP models are loaded."""
+        return self._nlp is not None and self._stop_words is not None
+    
+    def warm_up(self) -> None:
+        """Load the NLP models now instead of on first use."""
+        self.nlp
+        self.stop_words
+    
+    def stage_version(self, stage: str) -> str:
+        """Version of one processing stage, including settings that change its output."""
+        version = str(STAGE_VERSIONS[stage])
+        if stage == "nlp":
+            version += f"-en_core_web_sm-w{settings.NLP_WINDOW_CHARS}-o{settings.NLP_WINDOW_OVERLAP_CHARS}"
+        return version
+    
+    @property
+    def pipeline_version(self) -> str:
+        """Version of the whole processing pipeline."""
+        return ".".join(f"{stage}{self.stage_version(stage)}" for stage in STAGE_VERSIONS)
+    
+    @property
+    def block_pipeline_version(self) -> str:
+        """
+        Version of the stages whose output is stored per block; blocks are keyed by their extracted text.
+        
+        Chunking is derived again from the stored output on every run, so
+        a new chunk stage version keeps the blocks.
+        """
+        return ".".join(f"{stage}{self.stage_version(stage)}" for stage in ("clean", "nlp"))
         
     async def extract_text(self, file_path: str, file_type: str) -> Dict[str, any]:
         """
@@ -40,159 +120,610 @@ class DocumentProcessor:
         Returns:
             Dictionary containing raw text and metadata
         """
+        def extract_sync():
+            metadata = {}
+            raw_text = "".join(
+                unit["raw"] for unit in self.iter_text_units(file_path, file_type, metadata)
+            )
+            return {"raw_text": raw_text, "metadata": metadata}
+        
         try:
-            if file_type.lower() == 'pdf':
-                return await self._extract_pdf_text(file_path)
-            elif file_type.lower() == 'docx':
-                return await self._extract_docx_text(file_path)
-            elif file_type.lower() == 'txt':
-                return await self._extract_txt_text(file_path)
-            elif file_type.lower() == 'pptx':
-                return await self._extract_pptx_text(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {file_type}")
-                
+            return await self._run_blocking(extract_sync)
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
             raise
     
-    async def _extract_pdf_text(self, file_path: str) -> Dict[str, any]:
-        """Extract text from PDF files."""
-        def extract_sync():
-            reader = PdfReader(file_path)
-            text = ""
-            metadata = {
-                "pages": len(reader.pages),
-                "title": reader.metadata.get('/Title', '') if reader.metadata else '',
-                "author": reader.metadata.get('/Author', '') if reader.metadata else '',
-            }
-            
-            for page_num, page in enumerate(reader.pages, 1):
-                try:
-                    page_text = page.extract_text()
-                    text += f"\n--- Page {page_num} ---\n{page_text}"
-                except Exception as e:
-                    logger.warning(f"Could not extract text from page {page_num}: {e}")
-                    
-            return {"raw_text": text.strip(), "metadata": metadata}
+    async def stream_text_units(
+        self, file_path: str, file_type: str, metadata: Dict[str, any]
+    ) -> AsyncIterator[Dict[str, any]]:
+        """
+        Asynchronously yield text units of a document as they are extracted.
         
-        return await asyncio.get_event_loop().run_in_executor(None, extract_sync)
+        Extraction runs in the default thread pool one unit at a time, so a
+        large document starts producing text immediately and never has to be
+        held in memory as a whole.
+        """
+        units = self.iter_text_units(file_path, file_type, metadata)
+        
+        try:
+            while True:
+                unit = await self._run_blocking(next, units, None)
+                if unit is None:
+                    break
+                yield unit
+        except Exception as e:
+            logger.error(f"Error extracting text from {file_path}: {str(e)}")
+            raise
+        finally:
+            units.close()
     
-    async def _extract_docx_text(self, file_path: str) -> Dict[str, any]:
-        """Extract text from DOCX files."""
-        def extract_sync():
-            doc = DocxDocument(file_path)
-            paragraphs = []
-            headings = []
-            
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    # Check if paragraph is a heading
-                    if paragraph.style.name.startswith('Heading'):
-                        headings.append({
-                            "text": paragraph.text.strip(),
-                            "level": int(paragraph.style.name.split()[-1])
-                        })
-                    paragraphs.append(paragraph.text.strip())
-            
-            metadata = {
-                "paragraphs": len(paragraphs),
-                "headings": headings
-            }
-            
-            return {
-                "raw_text": "\n\n".join(paragraphs),
-                "metadata": metadata
-            }
+    async def _run_blocking(self, func, *args):
+        """Run blocking work in the default thread pool."""
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+    
+    def iter_text_units(
+        self, file_path: str, file_type: str, metadata: Dict[str, any]
+    ) -> Iterator[Dict[str, any]]:
+        """
+        Yield the text of a document one unit at a time.
         
-        return await asyncio.get_event_loop().run_in_executor(None, extract_sync)
+        Units are pages for PDF, slides for PPTX and paragraphs for DOCX and
+        TXT. Each unit is a dictionary with ``kind``, ``index``, ``text`` and
+        ``raw``; joining the ``raw`` values reproduces the document's raw text
+        including page and slide markers.
+        
+        Args:
+            file_path: Path to the document file
+            file_type: Type of the document (pdf, docx, txt, pptx)
+            metadata: Dictionary filled with document metadata during extraction
+        """
+        extractors = {
+            'pdf': self._iter_pdf_units,
+            'docx': self._iter_docx_units,
+            'txt': self._iter_txt_units,
+            'pptx': self._iter_pptx_units,
+        }
+        extractor = extractors.get(file_type.lower())
+        if extractor is None:
+            raise ValueError(f"Unsupported file type: {file_type}")
+        
+        return extractor(file_path, metadata)
     
-    async def _extract_txt_text(self, file_path: str) -> Dict[str, any]:
-        """Extract text from TXT files."""
-        def extract_sync():
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                text = file.read()
+    def _iter_pdf_units(self, file_path: str, metadata: Dict[str, any]) -> Iterator[Dict[str, any]]:
+        """
+        Yield the text of PDF files page by page.
+        
+        Large PDFs are extracted in parallel page-range shards by the PDF
+        extraction pool; pages are still yielded in order.
+        """
+        from pypdf import PdfReader
+        
+        reader = PdfReader(file_path)
+        page_count = len(reader.pages)
+        metadata.update({
+            "pages": page_count,
+            "title": reader.metadata.get('/Title', '') if reader.metadata else '',
+            "author": reader.metadata.get('/Author', '') if reader.metadata else '',
+        })
+        
+        if pdf_shard_pool.should_shard(page_count):
+            pages = pdf_shard_pool.iter_pages(file_path, page_count)
+        else:
+            pages = self._iter_pdf_pages(reader)
+        
+        separator = ""
+        for page_num, page_text in pages:
+            if page_text is None:
+                continue
             
-            lines = text.split('\n')
-            metadata = {
-                "lines": len(lines),
-                "characters": len(text)
+            yield {
+                "kind": "page",
+                "index": page_num,
+                "text": page_text,
+                "raw": f"{separator}--- Page {page_num} ---\n{page_text}",
             }
-            
-            return {"raw_text": text, "metadata": metadata}
+            separator = "\n"
+    
+    def _iter_pdf_pages(self, reader) -> Iterator[Tuple[int, Optional[str]]]:
+        """Extract PDF pages in-process; failed pages yield ``None``."""
+        for page_num, page in enumerate(reader.pages, 1):
+            try:
+                yield page_num, page.extract_text()
+            except Exception as e:
+                logger.warning(f"Could not extract text from page {page_num}: {e}")
+                yield page_num, None
+    
+    def _iter_docx_units(self, file_path: str, metadata: Dict[str, any]) -> Iterator[Dict[str, any]]:
+        """Yield the text of DOCX files paragraph by paragraph."""
+        from docx import Document as DocxDocument
         
-        return await asyncio.get_event_loop().run_in_executor(None, extract_sync)
+        doc = DocxDocument(file_path)
+        headings = []
+        metadata.update({"paragraphs": 0, "headings": headings})
+        
+        for paragraph in doc.paragraphs:
+            text = paragraph.text.strip()
+            if not text:
+                continue
+            
+            # Check if paragraph is a heading
+            if paragraph.style.name.startswith('Heading'):
+                headings.append({
+                    "text": text,
+                    "level": int(paragraph.style.name.split()[-1])
+                })
+            
+            metadata["paragraphs"] += 1
+            yield {
+                "kind": "paragraph",
+                "index": metadata["paragraphs"],
+                "text": text,
+                "raw": text if metadata["paragraphs"] == 1 else f"\n\n{text}",
+            }
     
-    async def _extract_pptx_text(self, file_path: str) -> Dict[str, any]:
-        """Extract text from PPTX files."""
-        def extract_sync():
-            presentation = Presentation(file_path)
-            slides_text = []
+    def _iter_txt_units(self, file_path: str, metadata: Dict[str, any]) -> Iterator[Dict[str, any]]:
+        """Yield the text of TXT files in blank-line separated paragraphs."""
+        metadata.update({"lines": 1, "characters": 0})
+        
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+            index = 0
+            block = []
+            block_chars = 0
             
-            for slide_num, slide in enumerate(presentation.slides, 1):
-                slide_text = f"--- Slide {slide_num} ---\n"
-                
-                for shape in slide.shapes:
-                    if hasattr(shape, "text") and shape.text.strip():
-                        slide_text += shape.text + "\n"
+            for line in file:
+                metadata["characters"] += len(line)
+                metadata["lines"] += line.count('\n')
+                block.append(line)
+                block_chars += len(line)
                 
-                slides_text.append(slide_text)
+                if not line.strip() or block_chars >= TXT_MAX_UNIT_CHARS:
+                    index += 1
+                    text = "".join(block)
+                    yield {"kind": "paragraph", "index": index, "text": text, "raw": text}
+                    block = []
+                    block_chars = 0
             
-            metadata = {
-                "slides": len(presentation.slides)
-            }
+            if block:
+                text = "".join(block)
+                yield {"kind": "paragraph", "index": index + 1, "text": text, "raw": text}
+    
+    def _iter_pptx_units(self, file_path: str, metadata: Dict[str, any]) -> Iterator[Dict[str, any]]:
+        """Yield the text of PPTX files slide by slide."""
+        from pptx import Presentation
+        
+        presentation = Presentation(file_path)
+        metadata.update({"slides": len(presentation.slides)})
+        
+        for slide_num, slide in enumerate(presentation.slides, 1):
+            slide_text = "".join(
+                shape.text + "\n"
+                for shape in slide.shapes
+                if hasattr(shape, "text") and shape.text.strip()
+            )
+            marker = f"--- Slide {slide_num} ---\n"
             
-            return {
-                "raw_text": "\n\n".join(slides_text),
-                "metadata": metadata
+            yield {
+                "kind": "slide",
+                "index": slide_num,
+                "text": slide_text,
+                "raw": marker + slide_text if slide_num == 1 else f"\n\n{marker}{slide_text}",
             }
-        
-        return await asyncio.get_event_loop().run_in_executor(None, extract_sync)
     
-    async def preprocess_text(self, raw_text: str) -> Dict[str, any]:
+    async def preprocess_stream(
+        self,
+        units: AsyncIterator[Dict[str, any]],
+        analyze_windows: Optional[Callable[[List[Tuple[str, Tuple[int, int, int, int]]]], Awaitable[List[Dict[str, any]]]]] = None,
+    ) -> AsyncIterator[Dict[str, any]]:
         """
-        Preprocess extracted text for better analysis.
+        Preprocess a document incrementally while its text is being extracted.
+        
+        Cleaned units are buffered until a full window plus its overlap is
+        available; ready windows are analysed in the NLP worker pool and
+        their sentences are chunked straight away. Only the text of windows
+        not yet analysed is kept, so memory stays flat regardless of the
+        document length.
         
         Args:
-            raw_text: Raw extracted text
+            units: Text units as produced by ``stream_text_units``
+            analyze_windows: Coroutine function analysing a group of windows
+                (default: the NLP worker pool); lets callers time and cancel
+                the analysis between window groups
             
-        Returns:
-            Dictionary containing processed text components
+        Yields:
+            Result batches with the raw text, sentences, chunks, entities,
+            newly seen key phrases, sections and word/sentence counts
+            produced since the previous batch
         """
-        try:
-            # Clean and normalize text
-            cleaned_text = self._clean_text(raw_text)
-            
-            # Split into sentences
-            sentences = sent_tokenize(cleaned_text)
-            
-            # Extract headings and sections
-            sections = self._extract_sections(cleaned_text)
+        analyze_windows = analyze_windows or nlp_pool.analyze_windows
+        overlap = settings.NLP_WINDOW_OVERLAP_CHARS
+        buffer = ""
+        buffer_base = 0  # document offset of buffer[0]
+        next_region = 0  # buffer offset of the first region not analysed yet
+        page_starts: List[int] = []
+        raw_parts: List[str] = []
+        sections: List[Dict[str, str]] = []
+        accumulator = self._new_accumulator()
+        chunker = ChunkStream()
+        seen_phrases = set()
+        
+        async def with_end_marker():
+            async for unit in units:
+                yield unit, False
+            yield None, True
+        
+        async for unit, final in with_end_marker():
+            if unit is not None:
+                raw_parts.append(unit["raw"])
+                cleaned_unit = self._clean_text(PAGE_BREAK_PATTERN.sub('', unit["text"]))
+                if cleaned_unit:
+                    if buffer:
+                        buffer += " "
+                    page_starts.append(len(buffer))
+                    buffer += cleaned_unit
+                    sections.extend(self._extract_sections(cleaned_unit))
+                
+                if len(buffer) - next_region < settings.NLP_WINDOW_CHARS + overlap:
+                    continue
             
-            # Process with spaCy for advanced NLP
-            doc = self.nlp(cleaned_text)
+            windows = self._plan_windows(buffer, page_starts, next_region)
+            if not final:
+                # The right-hand context of the last windows is not extracted yet
+                windows = [window for window in windows if window[3] + overlap <= len(buffer)]
             
-            # Extract entities and key phrases
-            entities = [(ent.text, ent.label_) for ent in doc.ents]
-            key_phrases = self._extract_key_phrases(doc)
+            if windows:
+                items = [
+                    (buffer[window[0]:window[1]], tuple(offset + buffer_base for offset in window))
+                    for window in windows
+                ]
+                for spans in await analyze_windows(items):
+                    self._merge_spans(spans, accumulator)
+                
+                next_region = windows[-1][3]
+                keep_from = max(0, next_region - overlap)
+                buffer = buffer[keep_from:]
+                buffer_base += keep_from
+                next_region -= keep_from
+                page_starts = [start - keep_from for start in page_starts if start >= keep_from]
             
-            # Create text chunks for processing
-            chunks = self._create_chunks(sentences)
+            sentences = accumulator["sentences"]
+            entities = accumulator["entities"]
+            key_phrases = [
+                phrase
+                for phrase in self._extract_key_phrases(accumulator["noun_chunks"], entities)
+                if phrase not in seen_phrases
+            ]
+            seen_phrases.update(key_phrases)
+            chunks = chunker.add(sentences)
+            if final:
+                chunks += chunker.finish()
             
-            return {
-                "cleaned_text": cleaned_text,
+            yield {
+                "raw_text": "".join(raw_parts),
                 "sentences": sentences,
-                "sections": sections,
+                "chunks": chunks,
                 "entities": entities,
                 "key_phrases": key_phrases,
-                "chunks": chunks,
-                "word_count": len(doc),
-                "sentence_count": len(sentences)
+                "sections": sections,
+                "word_count": accumulator["word_count"],
+                "sentence_count": len(sentences),
             }
             
-        except Exception as e:
-            logger.error(f"Error preprocessing text: {str(e)}")
-            raise
+            raw_parts = []
+            sections = []
+            accumulator.update(sentences=[], entities=[], noun_chunks=[], word_count=0)
+    
+    async def stream_blocks(self, units: AsyncIterator[Dict[str, any]]) -> AsyncIterator[Dict[str, any]]:
+        """
+        Group text units into blocks for incremental processing.
+        
+        Every unit is hashed as extracted. Blocks end at pages and slides and
+        at content-defined paragraph boundaries once they hold at least
+        INCREMENTAL_BLOCK_MIN_CHARS, so an edit only changes the blocks
+        around it, and inserting or removing units does not shift the
+        boundaries of the rest of the document.
+        
+        Yields:
+            Blocks with their ``units`` and a ``hash`` over the unit hashes
+        """
+        block_units = []
+        block_hash = hashlib.sha256()
+        block_chars = 0
+        
+        async for unit in units:
+            unit_hash = hashlib.sha256(unit["text"].encode("utf-8", "replace")).hexdigest()
+            block_units.append(unit)
+            block_hash.update(unit_hash.encode())
+            block_chars += len(unit["text"])
+            
+            if block_chars >= settings.NLP_WINDOW_CHARS or (
+                block_chars >= settings.INCREMENTAL_BLOCK_MIN_CHARS
+                and (unit["kind"] != "paragraph" or int(unit_hash[:8], 16) % BLOCK_BOUNDARY_MODULUS == 0)
+            ):
+                yield {"hash": block_hash.hexdigest(), "units": block_units}
+                block_units = []
+                block_hash = hashlib.sha256()
+                block_chars = 0
+        
+        if block_units:
+            yield {"hash": block_hash.hexdigest(), "units": block_units}
+    
+    def clean_block(self, units: List[Dict[str, any]]) -> Dict[str, any]:
+        """
+        Clean stage of one block on its own.
+        
+        The output has the form of ``clean_stage``'s and depends only on the
+        block's units, so the block's NLP output can be stored and reused for
+        any later version containing the same block.
+        
+        Args:
+            units: Text units of the block
+        """
+        text = ""
+        page_starts: List[int] = []
+        sections: List[Dict[str, str]] = []
+        
+        for unit in units:
+            cleaned_unit = self._clean_text(PAGE_BREAK_PATTERN.sub('', unit["text"]))
+            if cleaned_unit:
+                if text:
+                    text += " "
+                page_starts.append(len(text))
+                text += cleaned_unit
+                sections.extend(self._extract_sections(cleaned_unit))
+        
+        return {"cleaned_text": text, "page_starts": page_starts, "sections": sections}
+    
+    def clean_stage(self, raw_text: str) -> Dict[str, any]:
+        """Clean stage: normalised text, page offsets and sections of a raw text."""
+        cleaned_text, page_starts = self._clean_pages(raw_text)
+        return {
+            "cleaned_text": cleaned_text,
+            "page_starts": page_starts,
+            "sections": self._extract_sections(cleaned_text),
+        }
+    
+    async def nlp_stage(
+        self,
+        cleaned_text: str,
+        page_starts: List[int],
+        analyze_windows: Optional[Callable[[List[Tuple[str, Tuple[int, int, int, int]]]], Awaitable[List[Dict[str, any]]]]] = None,
+    ) -> Dict[str, any]:
+        """
+        NLP stage: sentences, entities and noun chunks of a cleaned text.
+        
+        Sentences come from the dependency parser in the same spaCy pass, so
+        sentence splitting is part of this stage.
+        
+        Args:
+            cleaned_text: Output of the clean stage
+            page_starts: Offsets in ``cleaned_text`` where pages start
+            analyze_windows: Coroutine function analysing a group of windows
+                (default: the NLP worker pool)
+        """
+        analyze_windows = analyze_windows or nlp_pool.analyze_windows
+        items = self._window_items(cleaned_text, page_starts)
+        return self._merge_analysis(await analyze_windows(items) if items else [])
+    
+    def nlp_stage_sync(self, cleaned_text: str, page_starts: List[int]) -> Dict[str, any]:
+        """NLP stage on the calling thread, for callers without an event loop such as the backfill."""
+        items = self._window_items(cleaned_text, page_starts)
+        return self._merge_analysis(self.analyze_windows_sync(items) if items else [])
+    
+    def _window_items(self, cleaned_text: str, page_starts: List[int]) -> List[Tuple[str, Tuple[int, int, int, int]]]:
+        """The planned windows of a cleaned text, with their text."""
+        return [
+            (cleaned_text[window[0]:window[1]], window)
+            for window in self._plan_windows(cleaned_text, page_starts)
+        ]
+    
+    def _merge_analysis(self, window_spans: List[Dict[str, any]]) -> Dict[str, any]:
+        """Output of the NLP stage from the spans of all windows, in order."""
+        accumulator = self._new_accumulator()
+        for spans in window_spans:
+            self._merge_spans(spans, accumulator)
+        
+        return {
+            "sentences": accumulator["sentences"],
+            "entities": accumulator["entities"],
+            "noun_chunks": accumulator["noun_chunks"],
+            "word_count": accumulator["word_count"],
+        }
+    
+    def chunk_stage(self, analysis: Dict[str, any]) -> Dict[str, any]:
+        """Chunk stage: sentence chunks and key phrases from the output of the NLP stage."""
+        return {
+            "chunks": self._create_chunks(analysis["sentences"]),
+            "key_phrases": self._extract_key_phrases(analysis["noun_chunks"], analysis["entities"]),
+        }
+    
+    def _active_pipes(self) -> List[str]:
+        """Pipeline components required for sentences, entities and noun chunks."""
+        return [name for name in self.nlp.pipe_names if name in NLP_REQUIRED_PIPES]
+    
+    def _clean_pages(self, raw_text: str) -> Tuple[str, List[int]]:
+        """
+        Clean text page by page.
+        
+        Returns:
+            The cleaned text and the offsets in it where each page or slide starts
+        """
+        pages = []
+        page_starts = []
+        offset = 0
+        
+        for page in PAGE_BREAK_PATTERN.split(raw_text):
+            cleaned_page = self._clean_text(page)
+            if not cleaned_page:
+                continue
+            if pages:
+                offset += 1  # joining space
+            page_starts.append(offset)
+            pages.append(cleaned_page)
+            offset += len(cleaned_page)
+        
+        return " ".join(pages), page_starts
+    
+    def _plan_windows(
+        self, text: str, page_starts: List[int], start: int = 0
+    ) -> List[Tuple[int, int, int, int]]:
+        """
+        Plan the spaCy windows for a cleaned document.
+        
+        The text from ``start`` onwards is partitioned into owned regions of
+        at most NLP_WINDOW_CHARS, cut at page boundaries where possible and at
+        sentence ends otherwise. Each window extends NLP_WINDOW_OVERLAP_CHARS
+        into its neighbours so entities and sentences spanning a seam are
+        seen whole.
+        
+        Returns:
+            (start, end, own_start, own_end) character offsets per window
+        """
+        max_chars = settings.NLP_WINDOW_CHARS
+        overlap = settings.NLP_WINDOW_OVERLAP_CHARS
+        
+        cuts = [start]
+        last_fit = start
+        for boundary in [p for p in page_starts if p > start] + [len(text)]:
+            while boundary - cuts[-1] > max_chars:
+                if last_fit > cuts[-1]:
+                    cuts.append(last_fit)
+                else:
+                    cuts.append(self._find_cut(text, cuts[-1], cuts[-1] + max_chars))
+            last_fit = boundary
+        if cuts[-1] < len(text):
+            cuts.append(len(text))
+        
+        windows = []
+        for own_start, own_end in zip(cuts, cuts[1:]):
+            window_start = max(0, own_start - overlap)
+            if window_start > 0:
+                space = text.find(' ', window_start, own_start)
+                window_start = space + 1 if space != -1 else own_start
+            
+            window_end = min(len(text), own_end + overlap)
+            if window_end < len(text):
+                space = text.rfind(' ', own_end, window_end)
+                window_end = space if space != -1 else own_end
+            
+            windows.append((window_start, window_end, own_start, own_end))
+        
+        return windows
+    
+    @staticmethod
+    def _find_cut(text: str, start: int, end: int) -> int:
+        """Find a cut point before ``end``, preferring sentence ends over word breaks."""
+        cut = text.rfind('. ', start, end)
+        if cut <= start:
+            cut = text.rfind(' ', start, end)
+        return cut + 1 if cut > start else end
+    
+    @staticmethod
+    def _new_accumulator() -> Dict[str, any]:
+        return {
+            "sentences": [],
+            "entities": [],
+            "noun_chunks": [],
+            "word_count": 0,
+            "last_sentence_end": 0,
+        }
+    
+    def _window_spans(self, doc, window: Tuple[int, int, int, int]) -> Dict[str, any]:
+        """
+        Extract the results of one spaCy window in document coordinates.
+        
+        Entities, noun chunks and tokens are kept only when they start inside
+        the window's owned region, so each is counted exactly once. Sentences
+        are returned with their offsets so ``_merge_spans`` can join those
+        cut by a seam.
+        """
+        start, _, own_start, own_end = window
+        
+        return {
+            "sentences": [
+                (start + sent.start_char, start + sent.end_char, sent.text)
+                for sent in doc.sents
+                if start + sent.start_char < own_end
+            ],
+            "entities": [
+                (ent.text, ent.label_)
+                for ent in doc.ents
+                if own_start <= start + ent.start_char < own_end
+            ],
+            "noun_chunks": [
+                chunk.text
+                for chunk in doc.noun_chunks
+                if own_start <= start + chunk.start_char < own_end
+            ],
+            "word_count": sum(1 for token in doc if own_start <= start + token.idx < own_end),
+        }
+    
+    def _merge_spans(self, spans: Dict[str, any], accumulator: Dict[str, any]) -> None:
+        """
+        Merge the results of one window into the document accumulator.
+        
+        Windows must be merged in document order. Sentences are kept from
+        where the previous window's last sentence ended, which joins
+        sentences cut by a seam instead of duplicating them.
+        """
+        for sent_start, sent_end, text in spans["sentences"]:
+            if sent_end <= accumulator["last_sentence_end"]:
+                continue
+            
+            sentence = text[max(0, accumulator["last_sentence_end"] - sent_start):].strip()
+            if sentence:
+                accumulator["sentences"].append(sentence)
+            accumulator["last_sentence_end"] = sent_end
+        
+        accumulator["entities"].extend(spans["entities"])
+        accumulator["noun_chunks"].extend(spans["noun_chunks"])
+        accumulator["word_count"] += spans["word_count"]
+    
+    def analyze_windows_sync(self, items: List[Tuple[str, Tuple[int, int, int, int]]]) -> List[Dict[str, any]]:
+        """
+        Run spaCy over planned windows and return their spans in order.
+        
+        This is executed inside NLP worker processes by the streaming
+        pipeline; merging happens in the caller.
+        """
+        return self.analyze_window_batch_sync([items])[0]
+    
+    def analyze_window_batch_sync(
+        self,
+        groups: List[List[Tuple[str, Tuple[int, int, int, int]]]],
+        batch_size: Optional[int] = None,
+        n_process: Optional[int] = None,
+    ) -> List[List[Dict[str, any]]]:
+        """
+        Run spaCy over the windows of several documents with one batched pass.
+        
+        The windows of all groups are streamed through ``nlp.pipe`` together,
+        with only the pipeline components the NLP stage needs enabled.
+        
+        Args:
+            groups: Planned windows of each document, with their text
+            batch_size: Windows per ``nlp.pipe`` batch (default from settings)
+            n_process: spaCy worker processes (default from settings)
+            
+        Returns:
+            The spans of each group's windows, in input order
+        """
+        results = [[] for _ in groups]
+        pieces = (
+            (text, (group_index, window))
+            for group_index, items in enumerate(groups)
+            for text, window in items
+        )
+        
+        with self.nlp.select_pipes(enable=self._active_pipes()):
+            for doc, (group_index, window) in self.nlp.pipe(
+                pieces,
+                as_tuples=True,
+                batch_size=batch_size or settings.NLP_PIPE_BATCH_SIZE,
+                n_process=n_process or settings.NLP_PIPE_N_PROCESS,
+            ):
+                results[group_index].append(self._window_spans(doc, window))
+        
+        return results
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text."""
@@ -250,40 +781,78 @@ class DocumentProcessor:
         
         return sections
     
-    def _extract_key_phrases(self, doc) -> List[str]:
-        """Extract key phrases using spaCy."""
+    def _extract_key_phrases(self, noun_chunks: List[str], entities: List[Tuple[str, str]]) -> List[str]:
+        """Extract key phrases from spaCy noun chunks and named entities."""
         key_phrases = []
         
         # Extract noun phrases
-        for chunk in doc.noun_chunks:
-            if len(chunk.text.split()) > 1 and chunk.text.lower() not in self.stop_words:
-                key_phrases.append(chunk.text)
+        for chunk in noun_chunks:
+            if len(chunk.split()) > 1 and chunk.lower() not in self.stop_words:
+                key_phrases.append(chunk)
         
         # Extract named entities
-        for ent in doc.ents:
-            if ent.label_ in ['PERSON', 'ORG', 'GPE', 'PRODUCT', 'EVENT']:
-                key_phrases.append(ent.text)
+        for text, label in entities:
+            if label in ['PERSON', 'ORG', 'GPE', 'PRODUCT', 'EVENT']:
+                key_phrases.append(text)
         
         return list(set(key_phrases))
     
     def _create_chunks(self, sentences: List[str], chunk_size: int = 5) -> List[Dict[str, any]]:
-        """Create overlapping text chunks for processing."""
+        """Create overlapping sentence chunks; their text is sliced from the stored text on demand."""
+        chunker = ChunkStream(chunk_size)
+        return chunker.add(sentences) + chunker.finish()
+
+
+class ChunkStream:
+    """
+    Incrementally builds overlapping sentence chunks.
+    
+    Consecutive chunks share one sentence. Chunks refer to their sentences
+    by number instead of copying their text. Sentences can be added in any
+    number of calls; only the sentences of the chunk being built are kept.
+    """
+    
+    def __init__(self, chunk_size: int = 5):
+        self.chunk_size = chunk_size
+        self.step = chunk_size - 1
+        self.sentences: List[str] = []
+        self.base = 0  # index of self.sentences[0] in the document
+        self.next_start = 0
+    
+    def add(self, sentences: List[str]) -> List[Dict[str, any]]:
+        """Add sentences and return the chunks that are now complete."""
+        self.sentences.extend(sentences)
+        return self._emit(final=False)
+    
+    def finish(self) -> List[Dict[str, any]]:
+        """Return the remaining chunks once all sentences have been added."""
+        return self._emit(final=True)
+    
+    def _emit(self, final: bool) -> List[Dict[str, any]]:
         chunks = []
+        total = self.base + len(self.sentences)
         
-        for i in range(0, len(sentences), chunk_size - 1):
-            chunk_sentences = sentences[i:i + chunk_size]
-            chunk_text = " ".join(chunk_sentences)
+        while self.next_start < total:
+            end = self.next_start + self.chunk_size
+            if end > total and not final:
+                break
+            if final and self.next_start > 0 and self.next_start - self.step + self.chunk_size >= total:
+                # The previous chunk already reached the last sentence
+                break
             
+            chunk_sentences = self.sentences[self.next_start - self.base:end - self.base]
             chunks.append({
-                "id": i // (chunk_size - 1),
-                "text": chunk_text,
-                "start_sentence": i,
-                "end_sentence": min(i + chunk_size - 1, len(sentences) - 1),
+                "id": self.next_start // self.step,
+                "start_sentence": self.next_start,
+                "end_sentence": min(end - 1, total - 1),
                 "sentence_count": len(chunk_sentences)
             })
-            
-            if i + chunk_size >= len(sentences):
-                break
+            self.next_start += self.step
+        
+        drop = min(self.next_start, total) - self.base
+        if drop > 0:
+            del self.sentences[:drop]
+            self.base += drop
         
         return chunks
 
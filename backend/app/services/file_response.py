@@ -0,0 +1,180 @@
+"""
+File downloads with byte ranges, conditional requests and zero-copy sending.
+"""
+
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+
+
+# ASGI extension for handing a file descriptor to the server's sendfile(2)
+ZERO_COPY_EXTENSION = "http.response.zerocopysend"
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class RangeNotSatisfiableError(Exception):
+    """Raised when a requested byte range lies outside the file."""
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a ``Range`` header for a file of ``size`` bytes.
+
+    Only single ranges are served; for anything else the whole file is sent,
+    which the HTTP specification allows.
+
+    Returns:
+        The first and last byte position (inclusive), or ``None`` to send the whole file
+
+    Raises:
+        RangeNotSatisfiableError: If the range starts beyond the end of the file
+    """
+    match = RANGE_PATTERN.fullmatch(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiableError()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiableError()
+    if start > end:
+        return None
+    return start, end
+
+
+def content_disposition(filename: str) -> str:
+    """``Content-Disposition`` header value for downloading a file under its original name."""
+    return f"attachment; filename*=UTF-8''{quote(filename)}"
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison, as If-None-Match requires
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in (c.removeprefix("W/") for c in candidates)
+
+
+def _not_modified_since(header: str, last_modified: float) -> bool:
+    try:
+        return int(last_modified) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class RangeFileResponse(Response):
+    """
+    Send a local file, honouring ``Range``, ``If-Range``, ``If-None-Match``
+    and ``If-Modified-Since``.
+
+    When the server offers the ``http.response.zerocopysend`` ASGI
+    extension the file descriptor is handed to it and the kernel copies the
+    data to the socket; otherwise the file is streamed in chunks.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        request_headers: Mapping[str, str],
+        media_type: str,
+        filename: str,
+        etag: Optional[str] = None,
+        chunk_size: int = settings.DOWNLOAD_CHUNK_SIZE,
+    ):
+        self.path = path
+        self.media_type = media_type
+        self.background = None
+        self.chunk_size = chunk_size
+
+        stat = os.stat(path)
+        size = stat.st_size
+        etag = etag or f'"{size:x}-{stat.st_mtime_ns:x}"'
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": formatdate(stat.st_mtime, usegmt=True),
+            "content-disposition": content_disposition(filename),
+        }
+
+        self.status_code = 200
+        self.start, self.length = 0, size
+
+        if_none_match = request_headers.get("if-none-match")
+        if_modified_since = request_headers.get("if-modified-since")
+        if (if_none_match and _etag_matches(if_none_match, etag)) or (
+            not if_none_match and if_modified_since and _not_modified_since(if_modified_since, stat.st_mtime)
+        ):
+            self.status_code, self.length = 304, 0
+        elif "range" in request_headers and self._range_applies(request_headers, etag, stat.st_mtime):
+            try:
+                requested = parse_range(request_headers["range"], size)
+            except RangeNotSatisfiableError:
+                self.status_code, self.length = 416, 0
+                headers["content-range"] = f"bytes */{size}"
+                requested = None
+            if requested is not None:
+                first, last = requested
+                self.status_code = 206
+                self.start, self.length = first, last - first + 1
+                headers["content-range"] = f"bytes {first}-{last}/{size}"
+
+        if self.status_code != 304:
+            headers["content-length"] = str(self.length)
+        self.init_headers(headers)
+
+    @staticmethod
+    def _range_applies(request_headers: Mapping[str, str], etag: str, last_modified: float) -> bool:
+        # A Range with If-Range is only honoured while the file is unchanged
+        if_range = request_headers.get("if-range")
+        if not if_range:
+            return True
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            return not if_range.startswith("W/") and if_range == etag
+        return _not_modified_since(if_range, last_modified)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if ZERO_COPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": ZERO_COPY_EXTENSION,
+                    "file": file,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # The file shrank while it was sent; end the response
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
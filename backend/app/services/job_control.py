@@ -0,0 +1,119 @@
+"""
+Cooperative cancellation and time budgets for document processing jobs.
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+EXTRACTION = "extraction"
+NLP = "nlp"
+
+
+class JobCancelledError(Exception):
+    """Raised at a checkpoint when the job has been cancelled."""
+
+
+class JobTimeoutError(Exception):
+    """Raised when a processing step, a stage or the whole job exceeds its time budget."""
+
+    def __init__(self, stage: str, limit: float, scope: str):
+        what = "job" if scope == "job" else f"{stage} {scope}"
+        super().__init__(f"Timed out: {what} exceeded {limit:g}s")
+        self.stage = stage
+        self.limit = limit
+        self.scope = scope
+
+
+class JobControl:
+    """
+    Cancellation checks and time budgets of one processing job.
+
+    Work is run as steps (one page, one group of NLP windows) with a timeout
+    each, and the time of all steps of a stage is charged to the stage's
+    budget. Between steps, a checkpoint raises ``JobCancelledError`` if
+    ``is_cancelled`` reports so; the callback is polled at most once per
+    ``check_interval`` seconds.
+
+    Limits are cooperative, so they hold in any thread: an overrunning step
+    is abandoned with ``asyncio.wait_for`` while the pool process or thread
+    running its blocking work finishes in the background. With
+    ``job_timeout`` set, steps and checkpoints also stop the job once that
+    much time has passed since it started, which stands in for Celery's
+    time limits where the worker pool does not enforce them.
+    """
+
+    def __init__(
+        self,
+        is_cancelled: Callable[[], bool],
+        stage_budgets: Dict[str, float],
+        step_timeouts: Dict[str, float],
+        check_interval: float = 1.0,
+        job_timeout: Optional[float] = None,
+    ):
+        self.is_cancelled = is_cancelled
+        self.stage_budgets = stage_budgets
+        self.step_timeouts = step_timeouts
+        self.check_interval = check_interval
+        self.job_timeout = job_timeout
+        self.spent = {stage: 0.0 for stage in stage_budgets}
+        self._started = time.monotonic()
+        self._last_check = 0.0
+
+    def checkpoint(self, stage: Optional[str] = None) -> None:
+        """Raise if the job was cancelled, ran out of time or ``stage`` has used up its budget."""
+        if self.job_timeout is not None and time.monotonic() - self._started > self.job_timeout:
+            raise JobTimeoutError(stage or "", self.job_timeout, "job")
+        if stage is not None and self.spent[stage] > self.stage_budgets[stage]:
+            raise JobTimeoutError(stage, self.stage_budgets[stage], "stage")
+
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if self.is_cancelled():
+                raise JobCancelledError()
+
+    async def step(self, stage: str, awaitable: Awaitable[T], steps: int = 1) -> T:
+        """
+        Run one step of ``stage`` within its timeout and charge its time.
+
+        Args:
+            stage: Stage the step belongs to
+            awaitable: The step's work
+            steps: Number of units of work in the step, scaling its timeout
+        """
+        step_limit = self.step_timeouts[stage] * steps
+        started = time.monotonic()
+        # Time left in each scope; the step ends at the first one to run out
+        limits = {"step": step_limit, "stage": self.stage_budgets[stage] - self.spent[stage]}
+        if self.job_timeout is not None:
+            limits["job"] = self.job_timeout - (started - self._started)
+        scope = min(limits, key=limits.get)
+
+        try:
+            result = await asyncio.wait_for(awaitable, max(limits[scope], 0))
+        except asyncio.TimeoutError:
+            budgets = {"step": step_limit, "stage": self.stage_budgets[stage], "job": self.job_timeout}
+            raise JobTimeoutError(stage, budgets[scope], scope)
+        finally:
+            self.spent[stage] += time.monotonic() - started
+
+        self.checkpoint(stage)
+        return result
+
+    async def units(self, units: AsyncIterator[T]) -> AsyncIterator[T]:
+        """Pull extracted units one extraction step at a time."""
+        self.checkpoint(EXTRACTION)
+        iterator = units.__aiter__()
+
+        try:
+            while True:
+                try:
+                    unit = await self.step(EXTRACTION, iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield unit
+        finally:
+            await iterator.aclose()
@@ -0,0 +1,392 @@
+"""
+Fair-share scheduling and admission control for document processing jobs.
+"""
+
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import create_db_session
+from app.models.database import Document, DocumentStatus, ProcessingJob, ProcessingJobStatus
+from app.repositories.document_repository import DocumentRepository
+from app.repositories.processing_job_repository import ProcessingJobRepository
+from app.services.result_cache import RESULT_FIELDS
+
+
+# Priority lanes; within a user, jobs in lower lanes are dispatched first
+LANE_SMALL = 0
+LANE_NORMAL = 1
+LANE_LARGE = 2
+
+
+class QueueFullError(Exception):
+    """Raised when a new job would exceed the allowed processing backlog."""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+def next_job(candidates, running: Dict[Any, int]):
+    """
+    The queued job that gets the next free slot.
+
+    Args:
+        candidates: The oldest queued job of each user in each lane
+        running: Number of running jobs per user ID
+    """
+    return min(candidates, key=lambda job: (running.get(job.user_id, 0), job.lane, job.created_at))
+
+
+class JobScheduler:
+    """
+    Holds processing jobs in the database and releases them to the job queue.
+
+    At most ``max_running`` jobs are handed to the workers at a time. A free
+    slot goes to the user with the fewest running jobs, and within that to
+    the lowest lane and then the oldest job, so a user with a large backlog
+    cannot starve everyone else and small files overtake large ones.
+
+    Processing is single-flight: a document has at most one unfinished job,
+    and a job for content that is already queued or running attaches to
+    that leader job and receives a copy of its results instead of running.
+    """
+
+    def __init__(
+        self,
+        max_running: int,
+        max_queued: int,
+        max_queued_per_user: int,
+        small_file_size: int,
+        large_file_size: int,
+        default_duration: int,
+    ):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.small_file_size = small_file_size
+        self.large_file_size = large_file_size
+        self.default_duration = default_duration
+        self._local_jobs: Optional[ThreadPoolExecutor] = None
+        self._local_jobs_lock = threading.Lock()
+
+    def lane_for(self, file_type: str, file_size: int) -> int:
+        """Priority lane of a document, by type and size."""
+        if file_type == "txt" or file_size <= self.small_file_size:
+            return LANE_SMALL
+        if file_size >= self.large_file_size:
+            return LANE_LARGE
+        return LANE_NORMAL
+
+    def check_admission(self, db: Session, user_id) -> None:
+        """
+        Refuse new work while the backlog is over its limits.
+
+        Raises:
+            QueueFullError: With the estimated seconds until a retry may succeed
+        """
+        job_repo = ProcessingJobRepository(db)
+
+        queued = job_repo.count_with_status(ProcessingJobStatus.QUEUED)
+        if queued >= self.max_queued:
+            raise QueueFullError(
+                self._retry_after(job_repo, queued - self.max_queued + 1),
+                "Processing queue is full",
+            )
+
+        queued_for_user = job_repo.count_with_status(ProcessingJobStatus.QUEUED, user_id)
+        if queued_for_user >= self.max_queued_per_user:
+            raise QueueFullError(
+                self._retry_after(job_repo, queued_for_user - self.max_queued_per_user + 1),
+                f"Too many documents waiting for processing (limit {self.max_queued_per_user})",
+            )
+
+    def submit(self, db: Session, document: Document) -> ProcessingJob:
+        """
+        Queue a processing job for a document.
+
+        Returns:
+            The document's unfinished job if it has one; otherwise a new job,
+            attached to the leader job if identical content is in flight
+        """
+        job_repo = ProcessingJobRepository(db)
+
+        job = job_repo.get_active_for_document(document.id)
+        if job:
+            return job
+
+        try:
+            return self._create_job(db, document)
+        except IntegrityError:
+            # A concurrent request created the document's job, or the leader
+            # job for its content, first
+            job = job_repo.get_active_for_document(document.id)
+            return job or self._create_job(db, document)
+
+    def dispatch(self) -> int:
+        """
+        Hand queued jobs to the workers while slots are free.
+
+        Jobs are claimed under a database lock shared by all processes and
+        sent after the claim is committed.
+
+        Returns:
+            The number of jobs dispatched
+        """
+        db = create_db_session()
+        try:
+            job_repo = ProcessingJobRepository(db)
+            job_repo.lock_dispatch()
+
+            running = job_repo.running_counts_by_user()
+            free_slots = self.max_running - sum(running.values())
+            claimed = []
+
+            while free_slots > 0:
+                candidates = job_repo.next_queued_per_user()
+                if not candidates:
+                    break
+
+                job = next_job(candidates, running)
+                job.status = ProcessingJobStatus.RUNNING
+                job.started_at = datetime.utcnow()
+                db.flush()
+
+                running[job.user_id] = running.get(job.user_id, 0) + 1
+                claimed.append(job)
+                free_slots -= 1
+
+            # Releases the lock
+            db.commit()
+
+            for job in claimed:
+                self._send(job_repo, job)
+
+            return len(claimed)
+        finally:
+            db.close()
+
+    def cancel(self, db: Session, document_id) -> bool:
+        """
+        Cancel the unfinished job of a document.
+
+        A running job stops at its next checkpoint; its slot is free at once.
+
+        Returns:
+            Whether there was a job to cancel
+        """
+        job_repo = ProcessingJobRepository(db)
+        job = job_repo.get_active_for_document(document_id)
+        if job is None:
+            return False
+
+        job_repo.update(job, {"status": ProcessingJobStatus.CANCELLED, "finished_at": datetime.utcnow()})
+        self._settle_attached(db, job)
+        logger.info(f"Cancelled processing job {job.id} of document {document_id}")
+        return True
+
+    def is_running(self, job_id: str) -> bool:
+        """Whether a job currently holds a slot; false for duplicate deliveries."""
+        db = create_db_session()
+        try:
+            job = ProcessingJobRepository(db).get(job_id)
+            return job is not None and job.status == ProcessingJobStatus.RUNNING
+        finally:
+            db.close()
+
+    def finish(self, job_id: str, succeeded: bool) -> None:
+        """
+        Release the slot of a finished job and dispatch the next ones.
+
+        Jobs attached to it receive its results, or after a failure, one of
+        them is queued to try again.
+        """
+        db = create_db_session()
+        try:
+            job_repo = ProcessingJobRepository(db)
+            job = job_repo.get(job_id)
+            if job:
+                job_repo.update(job, {
+                    "status": ProcessingJobStatus.COMPLETED if succeeded else ProcessingJobStatus.FAILED,
+                    "finished_at": datetime.utcnow(),
+                })
+                self._settle_attached(db, job)
+        finally:
+            db.close()
+
+        self.dispatch()
+
+    def recover_stale(self, stale_after_seconds: int) -> int:
+        """
+        Queue work again that has not progressed for too long.
+
+        Running jobs whose document has not been updated are put back in the
+        queue, and documents stuck in processing without any job (e.g. from
+        before the scheduler existed) get a new one.
+
+        Returns:
+            The number of jobs queued again
+        """
+        db = create_db_session()
+        try:
+            job_repo = ProcessingJobRepository(db)
+            cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+
+            stale_jobs = job_repo.get_stale_running(cutoff)
+            for job in stale_jobs:
+                job_repo.update(job, {"status": ProcessingJobStatus.QUEUED, "started_at": None})
+
+            orphaned = job_repo.get_stale_documents_without_job(cutoff)
+            for document in orphaned:
+                self.submit(db, document)
+
+            # Attached jobs whose leader was deleted with its document
+            leaderless = job_repo.get_orphaned_attached()
+            if leaderless:
+                self._promote(job_repo, leaderless)
+
+            recovered = len(stale_jobs) + len(orphaned) + len(leaderless)
+        finally:
+            db.close()
+
+        self.dispatch()
+        return recovered
+
+    def stats(self, db: Session, user_id=None) -> Dict[str, Any]:
+        """Queue depth, running jobs and waiting times, overall and per user."""
+        job_repo = ProcessingJobRepository(db)
+        now = datetime.utcnow()
+
+        users = []
+        for row in job_repo.stats_by_user(since=now - timedelta(hours=1), user_id=user_id):
+            oldest = row["oldest_queued_at"]
+            average_wait = row["avg_wait_seconds"]
+            users.append({
+                "user_id": str(row["user_id"]),
+                "queued": row["queued"],
+                "running": row["running"],
+                "oldest_wait_seconds": int((now - oldest).total_seconds()) if oldest else 0,
+                "avg_wait_seconds": round(float(average_wait), 1) if average_wait is not None else None,
+            })
+
+        return {
+            "max_running": self.max_running,
+            "running": job_repo.count_with_status(ProcessingJobStatus.RUNNING),
+            "queued": job_repo.count_with_status(ProcessingJobStatus.QUEUED),
+            "users": users,
+        }
+
+    def _create_job(self, db: Session, document: Document) -> ProcessingJob:
+        job_repo = ProcessingJobRepository(db)
+        data = {
+            "document_id": document.id,
+            "user_id": document.uploaded_by,
+            "lane": self.lane_for(Path(document.file_path).suffix[1:], document.file_size),
+            "content_hash": document.content_hash,
+            "status": ProcessingJobStatus.QUEUED,
+        }
+
+        leader = job_repo.get_leader_for_content(document.content_hash) if document.content_hash else None
+        if leader is None:
+            return job_repo.create(data)
+
+        job = job_repo.create({**data, "status": ProcessingJobStatus.ATTACHED, "leader_id": leader.id})
+        logger.info(f"Document {document.id} attached to in-flight job {leader.id} for identical content")
+
+        # The leader may have finished before it could see this job
+        db.refresh(leader)
+        if leader.status not in (ProcessingJobStatus.QUEUED, ProcessingJobStatus.RUNNING):
+            self._settle_attached(db, leader)
+            db.refresh(job)
+        return job
+
+    def _settle_attached(self, db: Session, leader: ProcessingJob) -> None:
+        # Hand the leader's outcome to the jobs waiting for it
+        job_repo = ProcessingJobRepository(db)
+        attached = job_repo.get_attached(leader.id)
+        if not attached:
+            return
+
+        if leader.status != ProcessingJobStatus.COMPLETED:
+            self._promote(job_repo, attached)
+            return
+
+        document_repo = DocumentRepository(db)
+        source = document_repo.get(leader.document_id)
+        results = {field: getattr(source, field) for field in RESULT_FIELDS}
+
+        for job in attached:
+            document_repo.update_processing_status(
+                job.document_id,
+                DocumentStatus.COMPLETED,
+                processed=True,
+                processing_time=source.processing_time,
+                **results,
+            )
+            job_repo.update(job, {"status": ProcessingJobStatus.COMPLETED, "finished_at": datetime.utcnow()})
+
+        logger.info(f"Results of job {leader.id} copied to {len(attached)} attached documents")
+
+    def _promote(self, job_repo: ProcessingJobRepository, attached: list) -> None:
+        # The first waiting job becomes the new leader for the others
+        leader, followers = attached[0], attached[1:]
+        job_repo.update(leader, {"status": ProcessingJobStatus.QUEUED, "leader_id": None})
+        for job in followers:
+            job_repo.update(job, {"leader_id": leader.id})
+
+    def _retry_after(self, job_repo: ProcessingJobRepository, excess_jobs: int) -> int:
+        # Seconds until enough slots have turned over for the excess to drain
+        duration = job_repo.average_duration() or self.default_duration
+        return max(1, math.ceil(duration * excess_jobs / max(self.max_running, 1)))
+
+    def _send(self, job_repo: ProcessingJobRepository, job: ProcessingJob) -> None:
+        # Celery is imported on first use to keep it out of the API's import time
+        from app.worker import process_document_task
+
+        document = job.document
+        kwargs = {
+            "job_id": str(job.id),
+            "document_id": str(document.id),
+            "file_path": document.file_path,
+            "file_type": Path(document.file_path).suffix[1:],
+            "original_filename": document.file_name,
+        }
+        try:
+            if settings.JOB_QUEUE_BACKEND == "memory":
+                self._run_locally(process_document_task, kwargs)
+            else:
+                process_document_task.apply_async(kwargs=kwargs)
+            logger.info(f"Dispatched processing job {job.id} for document {document.id}")
+        except Exception as e:
+            logger.error(f"Could not send processing job {job.id} to the queue: {e}")
+            job_repo.update(job, {"status": ProcessingJobStatus.QUEUED, "started_at": None})
+
+    def _run_locally(self, task, kwargs: Dict[str, Any]) -> None:
+        # Without a broker, jobs run on threads of this process. Neither the
+        # request that queued a job nor the job whose finish dispatched it
+        # waits for it, so finishing a job never nests the next one.
+        with self._local_jobs_lock:
+            if self._local_jobs is None:
+                self._local_jobs = ThreadPoolExecutor(
+                    max_workers=max(self.max_running, 1), thread_name_prefix="local-job"
+                )
+        self._local_jobs.submit(task.apply, kwargs=kwargs)
+
+
+# Global instance
+job_scheduler = JobScheduler(
+    max_running=settings.JOB_MAX_RUNNING,
+    max_queued=settings.JOB_MAX_QUEUED,
+    max_queued_per_user=settings.JOB_MAX_QUEUED_PER_USER,
+    small_file_size=settings.JOB_SMALL_FILE_SIZE,
+    large_file_size=settings.STREAMING_MIN_FILE_SIZE,
+    default_duration=settings.JOB_DEFAULT_DURATION_SECONDS,
+)
@@ -0,0 +1,96 @@
+"""
+Cross-document batching of NLP window analysis.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.services.nlp_pool import NLPWorkerPool, nlp_pool
+
+
+# Planned text windows of one document, as analysed by the NLP stage
+WindowItems = List[Tuple[str, Tuple[int, int, int, int]]]
+
+
+class NLPBatcher:
+    """
+    Groups window analysis requests of concurrent jobs that arrive close together.
+
+    Requests are collected until ``max_docs`` of them are pending or
+    ``max_wait_ms`` has passed since the first one, then sent to the NLP
+    worker pool as a single batch so spaCy can process the windows of all
+    of them with one ``nlp.pipe`` call.
+    """
+
+    def __init__(self, pool: NLPWorkerPool, max_docs: int, max_wait_ms: int):
+        self.pool = pool
+        self.max_docs = max_docs
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[WindowItems, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def analyze_windows(self, items: WindowItems) -> List[Dict[str, Any]]:
+        """Queue a document's windows for the next batch and await their spans."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((items, future))
+
+        if len(self._pending) >= self.max_docs:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # Requests whose job stopped waiting (cancelled or timed out) are dropped
+        batch = [(items, future) for items, future in self._pending if not future.done()]
+        self._pending = []
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[WindowItems, asyncio.Future]]) -> None:
+        try:
+            results = await self.pool.analyze_window_batch([items for items, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._set_exception(batch[0][1], e)
+                return
+
+            # Retry one by one so a single bad document does not fail the others
+            logger.warning(f"Batch of {len(batch)} documents failed, retrying individually: {e}")
+            await asyncio.gather(*(self._run_single(items, future) for items, future in batch))
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_single(self, items: WindowItems, future: asyncio.Future) -> None:
+        try:
+            result = await self.pool.analyze_windows(items)
+        except Exception as e:
+            self._set_exception(future, e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _set_exception(future: asyncio.Future, exc: Exception) -> None:
+        if not future.done():
+            future.set_exception(exc)
+
+
+# Global instance
+nlp_batcher = NLPBatcher(
+    pool=nlp_pool,
+    max_docs=settings.NLP_BATCH_MAX_DOCS,
+    max_wait_ms=settings.NLP_BATCH_MAX_WAIT_MS,
+)
@@ -0,0 +1,124 @@
+"""
+Process pool for running NLP preprocessing outside the web worker's event loop.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+# Document processor owned by the current worker process
+_worker_processor = None
+
+
+def _init_worker():
+    """Preload the spaCy model once when a worker process starts."""
+    global _worker_processor
+    from app.services.document_processor import document_processor
+
+    document_processor.warm_up()
+    _worker_processor = document_processor
+    logger.info("NLP worker ready")
+
+
+def _get_worker_processor():
+    if _worker_processor is None:
+        _init_worker()
+    return _worker_processor
+
+
+def _warm_up_worker() -> int:
+    """Make sure the calling worker process has loaded its models."""
+    _get_worker_processor()
+    return os.getpid()
+
+
+def _analyze_windows_in_worker(items: List[Tuple[str, Tuple[int, int, int, int]]]) -> List[Dict[str, Any]]:
+    """Analyse planned text windows of a streamed document inside a worker process."""
+    return _get_worker_processor().analyze_windows_sync(items)
+
+
+def _analyze_window_batch_in_worker(
+    groups: List[List[Tuple[str, Tuple[int, int, int, int]]]]
+) -> List[List[Dict[str, Any]]]:
+    """Analyse the windows of several documents with one batched call inside a worker process."""
+    return _get_worker_processor().analyze_window_batch_sync(groups)
+
+
+class NLPWorkerPool:
+    """Bounded pool of NLP worker processes, each with its own spaCy model."""
+
+    def __init__(self, workers: int, queue_size: int, start_method: str = "spawn"):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def start(self) -> None:
+        """Create the worker processes if they are not running yet."""
+        if self._executor is not None or self.workers <= 0:
+            return
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+        )
+        logger.info(f"Started NLP worker pool with {self.workers} processes")
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("NLP worker pool stopped")
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a picklable function in the pool and await its result.
+
+        At most ``workers + queue_size`` calls are in flight; further callers
+        wait here without blocking the event loop, which keeps the pool's
+        queue bounded while text extraction for the next document proceeds.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(self.workers, 1) + self.queue_size)
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            if self.workers <= 0:
+                return await loop.run_in_executor(None, func, *args)
+
+            self.start()
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def warm_up(self) -> None:
+        """Start the worker processes and wait until their models are loaded."""
+        await asyncio.gather(*(self.run(_warm_up_worker) for _ in range(max(self.workers, 1))))
+
+    async def analyze_windows(
+        self, items: List[Tuple[str, Tuple[int, int, int, int]]]
+    ) -> List[Dict[str, Any]]:
+        """Analyse text windows of a streamed document in a worker process."""
+        return await self.run(_analyze_windows_in_worker, items)
+
+    async def analyze_window_batch(
+        self, groups: List[List[Tuple[str, Tuple[int, int, int, int]]]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Analyse the windows of several documents with one batched call in a worker process."""
+        return await self.run(_analyze_window_batch_in_worker, groups)
+
+
+# Global instance
+nlp_pool = NLPWorkerPool(
+    workers=settings.NLP_WORKERS,
+    queue_size=settings.NLP_QUEUE_SIZE,
+    start_method=settings.NLP_POOL_START_METHOD,
+)
@@ -0,0 +1,100 @@
+"""
+Parallel text extraction for large PDF files, sharded by page range.
+"""
+
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+def extract_page_range(file_path: str, first_page: int, last_page: int) -> List[Tuple[int, Optional[str]]]:
+    """
+    Extract the text of pages ``first_page`` to ``last_page`` (1-based, inclusive).
+
+    Runs in a worker process that opens the file independently. Pages that
+    cannot be extracted are returned with ``None`` as their text.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    pages = []
+
+    for page_num in range(first_page, last_page + 1):
+        try:
+            pages.append((page_num, reader.pages[page_num - 1].extract_text()))
+        except Exception as e:
+            logger.warning(f"Could not extract text from page {page_num}: {e}")
+            pages.append((page_num, None))
+
+    return pages
+
+
+class PdfShardPool:
+    """Process pool that extracts page ranges of large PDFs in parallel."""
+
+    def __init__(self, workers: int, shard_pages: int, min_pages: int):
+        self.workers = workers
+        self.shard_pages = shard_pages
+        self.min_pages = min_pages
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def should_shard(self, page_count: int) -> bool:
+        """Small PDFs are cheaper to extract in-process than to ship to the pool."""
+        return self.workers > 0 and page_count >= self.min_pages
+
+    def iter_pages(self, file_path: str, page_count: int) -> Iterator[Tuple[int, Optional[str]]]:
+        """
+        Yield ``(page number, text)`` for every page, in page order.
+
+        Shards are submitted ahead of consumption, but no more than two per
+        worker are in flight, so results of a huge PDF do not pile up in
+        memory faster than they are consumed.
+        """
+        executor = self._get_executor()
+        in_flight = deque()
+
+        try:
+            for first_page in range(1, page_count + 1, self.shard_pages):
+                last_page = min(first_page + self.shard_pages - 1, page_count)
+                in_flight.append(executor.submit(extract_page_range, file_path, first_page, last_page))
+
+                if len(in_flight) >= self.workers * 2:
+                    yield from in_flight.popleft().result()
+
+            while in_flight:
+                yield from in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Extraction runs in threads of the default executor, so guard creation
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                logger.info(f"Started PDF extraction pool with {self.workers} processes")
+            return self._executor
+
+
+# Global instance
+pdf_shard_pool = PdfShardPool(
+    workers=settings.PDF_EXTRACTION_WORKERS,
+    shard_pages=settings.PDF_SHARD_PAGES,
+    min_pages=settings.PDF_SHARD_MIN_PAGES,
+)
@@ -0,0 +1,195 @@
+"""
+Cache of document processing results keyed by file content.
+"""
+
+import base64
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from loguru import logger
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import Document
+from app.repositories.document_repository import DocumentRepository
+from app.repositories.processing_cache_repository import ProcessingCacheRepository
+from app.services.document_processor import document_processor
+
+
+# Document columns that are stored in and restored from the cache
+CACHED_FIELDS = (
+    "sentence_offsets",
+    "chunk_offsets",
+    "processed_chunks",
+    "document_metadata",
+    "entities",
+    "key_phrases",
+    "sections",
+    "word_count",
+    "sentence_count",
+)
+
+# Document columns read from the document an entry was stored from, so the
+# texts are not stored twice
+TEXT_FIELDS = ("raw_text", "cleaned_text")
+
+# All result columns of a processed document
+RESULT_FIELDS = TEXT_FIELDS + CACHED_FIELDS
+
+# Packed offsets, stored base64-encoded in the JSONB result
+BINARY_FIELDS = ("sentence_offsets", "chunk_offsets")
+
+
+class ResultCache:
+    """
+    Processing results keyed by the SHA-256 of a file and the pipeline version.
+
+    Identical uploads reuse a completed result instead of running extraction
+    and NLP again. Entries written by another pipeline version are never
+    returned and are purged by eviction; entries unused for ``ttl_days``
+    or beyond ``max_entries`` are evicted least recently used first.
+    Eviction runs after a store at most every ``evict_interval`` seconds
+    per process. Results larger than ``max_entry_bytes`` are not stored.
+
+    An entry holds the document's offsets and arrays; its raw and cleaned
+    text are read from the document it was stored from, and the entry
+    misses once that document is gone, reprocessing or holds another file.
+    """
+
+    def __init__(self, enabled: bool, max_entries: int, max_entry_bytes: int, ttl_days: int, evict_interval: int):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl_days = ttl_days
+        self.evict_interval = evict_interval
+        self._evicted_at: Optional[float] = None
+
+    def lookup(self, db: Session, content_hash: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return the cached document fields for ``content_hash``, if any."""
+        if not self.enabled or not content_hash:
+            return None
+
+        try:
+            cache_repo = ProcessingCacheRepository(db)
+            entry = cache_repo.get_entry(content_hash, document_processor.pipeline_version)
+            if entry is None:
+                return None
+
+            result = dict(entry.result)
+            source_document_id = result.pop("source_document_id", None)
+            if source_document_id is not None:
+                texts = DocumentRepository(db).get_completed_texts(source_document_id, content_hash)
+                if texts is None:
+                    return None
+                result.update(zip(TEXT_FIELDS, texts))
+
+            cache_repo.record_hit(entry)
+            logger.info(f"Processing cache hit for content {content_hash[:12]}")
+            for field in BINARY_FIELDS:
+                if result.get(field) is not None:
+                    result[field] = base64.b64decode(result[field])
+            return result
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Processing cache lookup failed: {e}")
+            return None
+
+    def store(self, db: Session, document: Optional[Document]) -> None:
+        """Store the results of a completed document and, when due, evict old entries."""
+        if not self.enabled or document is None:
+            return
+
+        entry = self._entry(document)
+        if entry is None:
+            return
+
+        try:
+            ProcessingCacheRepository(db).upsert(**entry)
+            if self._eviction_due():
+                self.evict(db)
+        except IntegrityError:
+            # Another worker stored the same content concurrently
+            db.rollback()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to store processing result in cache: {e}")
+
+    def store_many(self, db: Session, documents: Iterable[Document]) -> None:
+        """
+        Store the results of several completed documents with one statement.
+
+        Only the ``content_hash`` and ``CACHED_FIELDS`` of the documents are
+        read. Of documents with the same content, the last one is stored.
+        """
+        if not self.enabled:
+            return
+
+        entries = {}
+        for document in documents:
+            entry = self._entry(document)
+            if entry is not None:
+                entries[entry["content_hash"]] = entry
+        if not entries:
+            return
+
+        try:
+            ProcessingCacheRepository(db).upsert_many(list(entries.values()))
+            if self._eviction_due():
+                self.evict(db)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to store {len(entries)} processing results in cache: {e}")
+
+    def _entry(self, document: Document) -> Optional[Dict[str, Any]]:
+        # The cache entry of a document's results, unless it has no content hash or is too large
+        if not document.content_hash:
+            return None
+
+        result = {field: getattr(document, field) for field in CACHED_FIELDS}
+        for field in BINARY_FIELDS:
+            if result[field] is not None:
+                result[field] = base64.b64encode(result[field]).decode()
+        result["source_document_id"] = str(document.id)
+
+        size_bytes = len(json.dumps(result, default=str))
+        if size_bytes > self.max_entry_bytes:
+            return None
+        return {
+            "content_hash": document.content_hash,
+            "pipeline_version": document_processor.pipeline_version,
+            "result": result,
+            "size_bytes": size_bytes,
+        }
+
+    def evict(self, db: Session) -> None:
+        """Drop entries of other pipeline versions, stale entries and LRU overflow."""
+        cache_repo = ProcessingCacheRepository(db)
+        invalidated = cache_repo.delete_other_versions(document_processor.pipeline_version)
+        expired = cache_repo.delete_unused_since(datetime.utcnow() - timedelta(days=self.ttl_days))
+        overflow = cache_repo.delete_least_recently_used(self.max_entries)
+
+        if invalidated or expired or overflow:
+            logger.info(
+                f"Processing cache eviction: {invalidated} invalidated, "
+                f"{expired} expired, {overflow} over capacity"
+            )
+
+    def _eviction_due(self) -> bool:
+        now = time.monotonic()
+        if self._evicted_at is not None and now - self._evicted_at < self.evict_interval:
+            return False
+        self._evicted_at = now
+        return True
+
+
+# Global instance
+result_cache = ResultCache(
+    enabled=settings.RESULT_CACHE_ENABLED,
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_entry_bytes=settings.RESULT_CACHE_MAX_ENTRY_BYTES,
+    ttl_days=settings.RESULT_CACHE_TTL_DAYS,
+    evict_interval=settings.CACHE_EVICTION_INTERVAL_SECONDS,
+)
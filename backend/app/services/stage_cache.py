@@ -0,0 +1,185 @@
+"""
+Content-addressed cache of the outputs of individual processing stages.
+"""
+
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.repositories.processing_cache_repository import ProcessingCacheRepository
+from app.services.document_processor import document_processor
+
+
+# Outcome of a stage in a run's report
+REUSED = "reused"
+RAN = "ran"
+PARTIAL = "partial"  # some blocks reused, the others analysed
+BY_BLOCK = "by_block"  # planned: reused for the blocks that did not change
+
+
+def output_hash(output: Any) -> str:
+    """Hash of a stage output, which is the input key of the next stage."""
+    return hashlib.sha256(json.dumps(output, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class StageCache:
+    """
+    Outputs of the processing stages keyed by stage version and input hash.
+
+    Each stage has its own namespace in the processing cache. A stage's
+    input hash is the file's SHA-256 for extraction and the hash of the
+    previous stage's output otherwise, so a reprocess reruns a stage only
+    when its version or its input changed. Outputs larger than
+    ``max_entry_bytes`` are not stored, and a stage's entries are evicted
+    at most every ``evict_interval`` seconds per process.
+    """
+
+    def __init__(self, enabled: bool, max_entries: int, max_entry_bytes: int, ttl_days: int, evict_interval: int):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl_days = ttl_days
+        self.evict_interval = evict_interval
+        self._evicted_at: Dict[str, float] = {}
+
+    def lookup(self, db: Session, stage: str, input_hash: Optional[str]) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Return the cached output of ``stage`` for ``input_hash`` and its output hash, if any."""
+        if not self.enabled or not input_hash:
+            return None
+
+        try:
+            cache_repo = ProcessingCacheRepository(db)
+            entry = cache_repo.get_entry(input_hash, document_processor.stage_version(stage), _namespace(stage))
+            if entry is None:
+                return None
+
+            cache_repo.record_hit(entry)
+            return dict(entry.result), entry.output_hash
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Stage cache lookup for {stage} failed: {e}")
+            return None
+
+    def store(self, db: Session, stage: str, input_hash: Optional[str], output: Dict[str, Any], hashed: str) -> None:
+        """Store the output of ``stage`` for ``input_hash`` and, when due, evict old entries of the stage."""
+        if not self.enabled or not input_hash:
+            return
+
+        size_bytes = len(json.dumps(output, default=str))
+        if size_bytes > self.max_entry_bytes:
+            return
+
+        try:
+            cache_repo = ProcessingCacheRepository(db)
+            cache_repo.upsert(
+                input_hash,
+                document_processor.stage_version(stage),
+                output,
+                size_bytes=size_bytes,
+                namespace=_namespace(stage),
+                output_hash=hashed,
+            )
+            if self._eviction_due(stage):
+                self.evict(db, stage)
+        except IntegrityError:
+            # Another worker stored the same output concurrently
+            db.rollback()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to store output of stage {stage}: {e}")
+
+    async def run(
+        self,
+        db: Session,
+        stage: str,
+        input_hash: Optional[str],
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        report: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Return the output of a stage, from the cache or by running ``compute``.
+
+        Args:
+            db: Database session
+            stage: Stage name
+            input_hash: Hash of the stage's input
+            compute: Coroutine function producing the output on a miss
+            report: Filled with whether the stage was reused or ran
+
+        Returns:
+            The stage output and its hash
+        """
+        cached = self.lookup(db, stage, input_hash)
+        if cached is not None and cached[1]:
+            report[stage] = REUSED
+            return cached
+
+        output = await compute()
+        hashed = output_hash(output)
+        self.store(db, stage, input_hash, output, hashed)
+        report[stage] = RAN
+        return output, hashed
+
+    def plan(self, db: Session, content_hash: Optional[str], stages) -> Dict[str, str]:
+        """
+        Which of ``stages`` a run would reuse for a file, without loading any output.
+
+        The chain of output hashes is followed from the file's hash until
+        the first stage without a cached output; that stage and all later
+        ones would run.
+        """
+        cache_repo = ProcessingCacheRepository(db)
+        plan = {}
+        input_hash = content_hash if self.enabled else None
+
+        for stage in stages:
+            if input_hash:
+                input_hash = cache_repo.get_output_hash(
+                    input_hash, document_processor.stage_version(stage), _namespace(stage)
+                )
+            plan[stage] = REUSED if input_hash else RAN
+
+        return plan
+
+    def evict(self, db: Session, stage: str) -> None:
+        """Drop a stage's entries of other versions, stale entries and LRU overflow."""
+        cache_repo = ProcessingCacheRepository(db)
+        namespace = _namespace(stage)
+        invalidated = cache_repo.delete_other_versions(document_processor.stage_version(stage), namespace)
+        expired = cache_repo.delete_unused_since(datetime.utcnow() - timedelta(days=self.ttl_days), namespace)
+        overflow = cache_repo.delete_least_recently_used(self.max_entries, namespace)
+
+        if invalidated or expired or overflow:
+            logger.info(
+                f"Stage cache eviction for {stage}: {invalidated} invalidated, "
+                f"{expired} expired, {overflow} over capacity"
+            )
+
+    def _eviction_due(self, stage: str) -> bool:
+        now = time.monotonic()
+        evicted_at = self._evicted_at.get(stage)
+        if evicted_at is not None and now - evicted_at < self.evict_interval:
+            return False
+        self._evicted_at[stage] = now
+        return True
+
+
+def _namespace(stage: str) -> str:
+    return f"stage:{stage}"
+
+
+# Global instance
+stage_cache = StageCache(
+    enabled=settings.STAGE_CACHE_ENABLED,
+    max_entries=settings.STAGE_CACHE_MAX_ENTRIES,
+    max_entry_bytes=settings.STAGE_CACHE_MAX_ENTRY_BYTES,
+    ttl_days=settings.RESULT_CACHE_TTL_DAYS,
+    evict_interval=settings.CACHE_EVICTION_INTERVAL_SECONDS,
+)
@@ -0,0 +1,238 @@
+"""
+Sentences and chunks of a processed document as offsets into its cleaned text.
+
+A document's cleaned text is stored once, as its sentences joined by a
+space. Sentences are stored as the packed start offset of each sentence in
+that text, and chunks as the packed first and last sentence number of each
+chunk, so a chunk is one contiguous slice of the text and no sentence is
+stored twice. Offsets are unsigned 32-bit little-endian integers.
+
+Blocks stored for reuse by later versions keep their cleaned text the same
+way, with their sentences, entities and noun chunks as offsets into it.
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+SENTENCE_SEPARATOR = " "
+OFFSET_TYPECODE = "I"  # unsigned 32-bit
+
+
+def pack_offsets(values: Iterable[int]) -> bytes:
+    """Pack integers as unsigned 32-bit little-endian offsets."""
+    offsets = array(OFFSET_TYPECODE, values)
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def offsets_view(data: Optional[bytes]) -> Sequence[int]:
+    """Packed offsets as a sequence of integers, without copying them on little-endian platforms."""
+    if not data:
+        return ()
+    if sys.byteorder == "little":
+        return memoryview(data).cast(OFFSET_TYPECODE)
+    offsets = array(OFFSET_TYPECODE)
+    offsets.frombytes(bytes(data))
+    offsets.byteswap()
+    return offsets
+
+
+class TextIndexBuilder:
+    """
+    Builds the cleaned text and packed offsets of a document in parts.
+
+    Each call to ``add`` returns what to append to the stored columns, so
+    results streamed in batches never need the text stored so far.
+    """
+
+    def __init__(self):
+        self.length = 0  # characters of cleaned text so far
+
+    def add(self, sentences: List[str], chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Text and offsets for the next sentences and chunks.
+
+        Chunks must number their sentences across the whole document.
+
+        Returns:
+            ``cleaned_text``, ``sentence_offsets`` and ``chunk_offsets`` to append
+        """
+        parts = []
+        starts = []
+        for sentence in sentences:
+            if self.length:
+                parts.append(SENTENCE_SEPARATOR)
+                self.length += len(SENTENCE_SEPARATOR)
+            starts.append(self.length)
+            parts.append(sentence)
+            self.length += len(sentence)
+
+        return {
+            "cleaned_text": "".join(parts),
+            "sentence_offsets": pack_offsets(starts),
+            "chunk_offsets": pack_offsets(
+                bound for chunk in chunks for bound in (chunk["start_sentence"], chunk["end_sentence"])
+            ),
+        }
+
+
+def build_text_index(sentences: List[str], chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cleaned text and packed offsets of a whole document."""
+    return TextIndexBuilder().add(sentences, chunks)
+
+
+def _locate(text: str, part: str, position: int) -> Optional[int]:
+    """Offset of ``part`` in ``text``, searching from ``position`` first."""
+    start = text.find(part, position)
+    if start < 0:
+        start = text.find(part)
+    return start if start >= 0 else None
+
+
+def encode_block(text: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stored form of an analysed block: its cleaned text once, with its spans as offsets into it.
+
+    Sentences become packed start and end offsets; entities become
+    ``[start, end, label]`` and noun chunks ``[start, end]``. A span not
+    found in the text is kept as text.
+
+    Returns:
+        ``text``, ``sentence_offsets`` and ``result`` columns of the block
+    """
+    bounds = []
+    position = 0
+    for sentence in analysis["sentences"]:
+        start = _locate(text, sentence, position)
+        if start is None:
+            bounds = None
+            break
+        position = start + len(sentence)
+        bounds.extend((start, position))
+
+    def spans(parts):
+        encoded = []
+        position = 0
+        for part, tail in parts:
+            start = _locate(text, part, position)
+            if start is None:
+                encoded.append([part, *tail])
+                continue
+            position = start + len(part)
+            encoded.append([start, position, *tail])
+        return encoded
+
+    result = {
+        "entities": spans((entity_text, [label]) for entity_text, label in analysis["entities"]),
+        "noun_chunks": spans((chunk, []) for chunk in analysis["noun_chunks"]),
+        "sections": analysis["sections"],
+        "word_count": analysis["word_count"],
+    }
+    if bounds is None:
+        result["sentences"] = analysis["sentences"]
+    return {"text": text, "sentence_offsets": pack_offsets(bounds or ()), "result": result}
+
+
+def decode_block(text: str, sentence_offsets: Optional[bytes], result: Dict[str, Any]) -> Dict[str, Any]:
+    """Sentences, entities, noun chunks, sections and word count of a stored block."""
+    bounds = offsets_view(sentence_offsets)
+    if "sentences" in result:
+        sentences = result["sentences"]
+    else:
+        sentences = [text[bounds[index]:bounds[index + 1]] for index in range(0, len(bounds), 2)]
+    return {
+        "text": text,
+        "sentences": sentences,
+        "entities": [
+            [text[entity[0]:entity[1]], entity[2]] if len(entity) == 3 else entity
+            for entity in result["entities"]
+        ],
+        "noun_chunks": [
+            text[chunk[0]:chunk[1]] if len(chunk) == 2 else chunk[0]
+            for chunk in result["noun_chunks"]
+        ],
+        "sections": result["sections"],
+        "word_count": result["word_count"],
+    }
+
+
+class TextIndex:
+    """
+    Read access to the sentences and chunks of a stored document.
+
+    The offsets are read in place from the stored bytes; only the
+    sentences and chunks asked for are sliced out of the text. ``text``
+    may be just the part of the text starting at ``text_start`` that the
+    requested sentences and chunks lie in (see ``sentences_range`` and
+    ``chunks_range``), with ``text_length`` the length of the whole text.
+    """
+
+    def __init__(
+        self,
+        text: Optional[str],
+        sentence_offsets: Optional[bytes],
+        chunk_offsets: Optional[bytes],
+        text_start: int = 0,
+        text_length: Optional[int] = None,
+    ):
+        self.text = text or ""
+        self.sentence_starts = offsets_view(sentence_offsets)
+        self.chunk_bounds = offsets_view(chunk_offsets)
+        self.text_start = text_start
+        self.text_length = len(self.text) if text_length is None else text_length
+
+    @property
+    def sentence_count(self) -> int:
+        return len(self.sentence_starts)
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self.chunk_bounds) // 2
+
+    def sentence_span(self, index: int) -> Tuple[int, int]:
+        """Start and end offset of a sentence in the text."""
+        start = self.sentence_starts[index]
+        if index + 1 < self.sentence_count:
+            return start, self.sentence_starts[index + 1] - len(SENTENCE_SEPARATOR)
+        return start, self.text_length
+
+    def _slice(self, start: int, end: int) -> str:
+        return self.text[start - self.text_start:end - self.text_start]
+
+    def sentences_range(self, start: int = 0, stop: Optional[int] = None) -> Tuple[int, int]:
+        """Part of the text holding the sentences numbered ``start`` up to ``stop``."""
+        indices = range(self.sentence_count)[start:stop]
+        if not indices:
+            return 0, 0
+        return self.sentence_span(indices[0])[0], self.sentence_span(indices[-1])[1]
+
+    def chunks_range(self, start: int = 0, stop: Optional[int] = None) -> Tuple[int, int]:
+        """Part of the text holding the chunks numbered ``start`` up to ``stop``."""
+        indices = range(self.chunk_count)[start:stop]
+        if not indices:
+            return 0, 0
+        first, last = self.chunk_bounds[2 * indices[0]], self.chunk_bounds[2 * indices[-1] + 1]
+        return self.sentence_span(first)[0], self.sentence_span(last)[1]
+
+    def sentences(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """The sentences numbered ``start`` up to ``stop`` (exclusive)."""
+        indices = range(self.sentence_count)[start:stop]
+        return [self._slice(*self.sentence_span(index)) for index in indices]
+
+    def chunk(self, index: int) -> Dict[str, Any]:
+        """One chunk, in the form the API returns."""
+        first, last = self.chunk_bounds[2 * index], self.chunk_bounds[2 * index + 1]
+        return {
+            "id": index,
+            "text": self._slice(self.sentence_span(first)[0], self.sentence_span(last)[1]),
+            "start_sentence": first,
+            "end_sentence": last,
+            "sentence_count": last - first + 1,
+        }
+
+    def chunks(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The chunks numbered ``start`` up to ``stop`` (exclusive)."""
+        return [self.chunk(index) for index in range(self.chunk_count)[start:stop]]
@@ -0,0 +1,346 @@
+"""
+Streaming storage of uploaded files.
+"""
+
+import hashlib
+import mimetypes
+import os
+import tempfile
+import uuid
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiofiles
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import settings
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured maximum size."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"Upload exceeds maximum size of {max_size} bytes")
+        self.max_size = max_size
+
+
+def save_upload_stream(
+    source: BinaryIO,
+    destination: Path,
+    max_size: int = settings.MAX_FILE_SIZE,
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE,
+) -> Tuple[int, str]:
+    """
+    Stream a file-like upload to ``destination`` in fixed-size chunks.
+
+    The data is written to a temporary file next to the destination while its
+    size is checked and its SHA-256 is computed, then moved into place
+    atomically. Nothing is left behind if the upload is aborted. Blocking;
+    run it in a thread.
+
+    Returns:
+        The file size in bytes and the hex SHA-256 of its content
+
+    Raises:
+        UploadTooLargeError: As soon as more than ``max_size`` bytes arrive
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=destination.parent, prefix=".upload-", suffix=".part")
+
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(max_size)
+                hasher.update(chunk)
+                out.write(chunk)
+
+        os.replace(temp_path, destination)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+    return size, hasher.hexdigest()
+
+
+# Room for the boundaries and part headers around the file of a multipart upload
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadFormError(Exception):
+    """Raised when a multipart upload has no usable file part."""
+
+
+@dataclass
+class ReceivedFile:
+    """The file part of a multipart upload, received at ``path``."""
+
+    filename: str
+    content_type: Optional[str]
+    path: Path
+    size: int
+    content_hash: str
+
+
+class _PartEvents:
+    """Callbacks of ``MultipartParser``, collected as events to handle after each write."""
+
+    def __init__(self):
+        self.events: List[Tuple[str, Any]] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+
+    def callbacks(self) -> Dict[str, Callable]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field = self._value = b""
+
+    def on_headers_finished(self) -> None:
+        self.events.append(("headers", self._headers))
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self.events.append(("data", data[start:end]))
+
+    def on_part_end(self) -> None:
+        self.events.append(("end", None))
+
+    def pop(self) -> List[Tuple[str, Any]]:
+        events, self.events = self.events, []
+        return events
+
+
+async def receive_multipart_file(
+    chunks: AsyncIterator[bytes],
+    content_type: str,
+    field_name: str,
+    path_for: Callable[[str], Path],
+    extensions: Iterable[str],
+    max_size: int = settings.MAX_FILE_SIZE,
+) -> ReceivedFile:
+    """
+    Write the file part ``field_name`` of a multipart body to disk as the body arrives.
+
+    The file is hashed and its size checked while it is written to
+    ``path_for(extension)``; other parts are skipped. Nothing is left
+    behind if the upload is rejected or aborted.
+
+    Raises:
+        UploadTooLargeError: As soon as the file, or the body around it,
+            grows beyond ``max_size``
+        UploadFormError: If the body is not multipart, has no file in
+            ``field_name`` or the file's type is not one of ``extensions``
+    """
+    _, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise UploadFormError("Expected a multipart/form-data body")
+
+    part_events = _PartEvents()
+    parser = MultipartParser(boundary, part_events.callbacks())
+    received = 0
+    out = None
+    path = None
+    received_file = None
+
+    try:
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > max_size + MULTIPART_OVERHEAD:
+                raise UploadTooLargeError(max_size)
+            parser.write(chunk)
+
+            for event, value in part_events.pop():
+                if event == "headers" and out is None and received_file is None:
+                    _, disposition = parse_options_header(value.get(b"content-disposition", b""))
+                    if disposition.get(b"name", b"").decode() != field_name or b"filename" not in disposition:
+                        continue
+                    filename = disposition[b"filename"].decode("utf-8", "replace")
+                    if not filename:
+                        raise UploadFormError("No filename provided")
+                    extension = Path(filename).suffix.lower()
+                    if extension not in extensions:
+                        raise UploadFormError(f"File type {extension} not supported. Allowed: {list(extensions)}")
+
+                    path = path_for(extension)
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    out = await aiofiles.open(path, "wb")
+                    hasher = hashlib.sha256()
+                    size = 0
+                    part_type = value.get(b"content-type")
+                elif event == "data" and out is not None:
+                    size += len(value)
+                    if size > max_size:
+                        raise UploadTooLargeError(max_size)
+                    hasher.update(value)
+                    await out.write(value)
+                elif event == "end" and out is not None:
+                    await out.close()
+                    out = None
+                    received_file = ReceivedFile(
+                        filename=filename,
+                        content_type=part_type.decode() if part_type else None,
+                        path=path,
+                        size=size,
+                        content_hash=hasher.hexdigest(),
+                    )
+        parser.finalize()
+        if received_file is None:
+            raise UploadFormError(f"No file in form field '{field_name}'")
+    except BaseException:
+        if out is not None:
+            await out.close()
+        if path is not None:
+            path.unlink(missing_ok=True)
+        raise
+
+    return received_file
+
+
+class UploadRangeError(Exception):
+    """Raised when the body of a chunk does not match its declared byte range."""
+
+
+def create_partial_file(path: Path, size: int) -> None:
+    """Create the file a resumable upload is written into, already at its final size."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as out:
+        # Sparse on most file systems; ranges are filled in as they arrive
+        out.truncate(size)
+
+
+async def write_range(
+    chunks: AsyncIterator[bytes],
+    path: Path,
+    start: int,
+    length: int,
+) -> None:
+    """
+    Write a chunk of a resumable upload at its offset in the partial file.
+
+    Raises:
+        UploadRangeError: If the body is longer or shorter than ``length``
+    """
+    written = 0
+    async with aiofiles.open(path, "r+b") as out:
+        await out.seek(start)
+        async for data in chunks:
+            written += len(data)
+            if written > length:
+                raise UploadRangeError(f"Chunk is longer than its range of {length} bytes")
+            await out.write(data)
+
+    if written != length:
+        raise UploadRangeError(f"Chunk has {written} bytes, its range has {length}")
+
+
+def hash_file(path: Path, chunk_size: int = settings.UPLOAD_CHUNK_SIZE) -> str:
+    """Hex SHA-256 of a file's content, read in chunks. Blocking; run it in a thread."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as source:
+        while chunk := source.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def save_zip_entries(
+    archive: BinaryIO,
+    destination_dir: Path,
+    max_entries: int,
+    max_total_size: int,
+    max_size: int = settings.MAX_FILE_SIZE,
+    chunk_size: int = settings.UPLOAD_CHUNK_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Store the supported files of a ZIP archive under new IDs in ``destination_dir``.
+
+    Only the archive's central directory is read up front; each entry is
+    then decompressed in chunks straight to its own file, so neither the
+    archive nor an entry is held in memory. Sizes are checked against the
+    bytes actually decompressed, not the sizes the archive declares.
+    Blocking; run it in a thread.
+
+    Returns:
+        One dictionary per file entry, with ``filename`` and either
+        ``error`` or ``id``, ``file_path``, ``file_size``, ``content_hash``
+        and ``mime_type``
+    """
+    entries = []
+    total_size = 0
+    stored = 0
+
+    try:
+        zip_file = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        return [{"filename": "", "error": "Not a valid ZIP archive"}]
+
+    with zip_file:
+        for info in zip_file.infolist():
+            name = PurePosixPath(info.filename)
+            # Skip folders and the resource forks and hidden files of macOS archives
+            if info.is_dir() or name.name.startswith(".") or "__MACOSX" in name.parts:
+                continue
+
+            extension = name.suffix.lower()
+            if extension not in settings.ALLOWED_EXTENSIONS:
+                entries.append({"filename": info.filename, "error": f"File type {extension} not supported"})
+                continue
+            if stored >= max_entries:
+                entries.append({"filename": info.filename, "error": "Too many files in one upload"})
+                continue
+            if info.flag_bits & 0x1:
+                entries.append({"filename": info.filename, "error": "Encrypted entries are not supported"})
+                continue
+
+            document_id = uuid.uuid4()
+            destination = destination_dir / f"{document_id}{extension}"
+            limit = min(max_size, max_total_size - total_size)
+            try:
+                with zip_file.open(info) as source:
+                    size, content_hash = save_upload_stream(source, destination, limit, chunk_size)
+            except UploadTooLargeError:
+                reason = "File too large" if limit == max_size else "Upload exceeds the total size limit"
+                entries.append({"filename": info.filename, "error": reason})
+                continue
+            except (zipfile.BadZipFile, OSError, NotImplementedError) as e:
+                entries.append({"filename": info.filename, "error": f"Could not extract: {e}"})
+                continue
+
+            total_size += size
+            stored += 1
+            entries.append({
+                "filename": info.filename,
+                "id": document_id,
+                "file_name": name.name,
+                "file_path": str(destination),
+                "file_size": size,
+                "content_hash": content_hash,
+                "mime_type": mimetypes.guess_type(name.name)[0] or "application/octet-stream",
+            })
+
+    return entries
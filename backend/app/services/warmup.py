@@ -0,0 +1,60 @@
+"""
+Optional background warm-up of NLP models at application startup.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.services.document_processor import document_processor
+from app.services.nlp_pool import nlp_pool
+
+
+class WarmupState:
+    """Progress of the startup warm-up, reported by the readiness endpoint."""
+
+    def __init__(self):
+        self.started = False
+        self.completed = False
+        self.error: Optional[str] = None
+        self.duration: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "completed": self.completed,
+            "error": self.error,
+            "duration": self.duration,
+        }
+
+
+warmup_state = WarmupState()
+
+
+async def warm_up_models() -> None:
+    """
+    Load the NLP models before the first document arrives.
+
+    With an NLP worker pool the worker processes are started and load their
+    own models; otherwise the model is loaded in this process, in a thread
+    so the event loop keeps serving requests meanwhile.
+    """
+    warmup_state.started = True
+    start_time = time.time()
+    logger.info("Warming up NLP models...")
+
+    try:
+        if nlp_pool.workers > 0:
+            await nlp_pool.warm_up()
+        else:
+            await asyncio.get_event_loop().run_in_executor(None, document_processor.warm_up)
+    except Exception as e:
+        warmup_state.error = str(e)
+        logger.error(f"NLP model warm-up failed: {e}")
+        return
+
+    warmup_state.duration = time.time() - start_time
+    warmup_state.completed = True
+    logger.info(f"NLP models warm after {warmup_state.duration:.1f}s")
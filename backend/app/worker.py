@@ -0,0 +1,213 @@
+"""
+Celery application running document processing jobs.
+
+Usage (from the backend directory):
+    celery -A app.worker worker --loglevel=INFO
+
+Jobs are acknowledged only after they finish, so a job whose worker dies
+is delivered again: immediately when the worker process is lost, or after
+``JOB_VISIBILITY_TIMEOUT`` when the whole node goes away. Failed jobs are
+retried with exponential backoff and the document is marked as failed only
+when the retries are exhausted.
+
+Jobs run in threads of one worker process per node (``JOB_WORKER_POOL``,
+``threads`` by default) and share an event loop, so they use the NLP
+worker pool and parallel PDF extraction like the API process does; a
+prefork pool could not, as its processes are daemonic and cannot start
+process pools. With ``WARMUP_ON_STARTUP`` the worker loads the models and
+starts its NLP processes before it takes the first job. With
+``JOB_WORKER_PRELOAD_MODELS`` the models are loaded in the worker process
+first and the NLP processes are forked from it, sharing the model pages
+copy-on-write.
+
+A page or window that overruns its time budget is abandoned and the job
+fails; the work already handed to a pool process still runs to its end.
+
+``JOB_QUEUE_BACKEND`` selects the broker:
+    redis    ``REDIS_URL`` (production)
+    sqlite   a local SQLite file, for development without Redis
+    memory   no broker; jobs run on threads of the process that dispatches them, for tests
+"""
+
+import asyncio
+import gc
+import threading
+from typing import Any, Coroutine, Optional
+
+from celery import Celery, Task
+from celery.exceptions import Ignore, SoftTimeLimitExceeded
+from celery.signals import worker_init, worker_ready, worker_shutdown
+from loguru import logger
+
+from app.core.config import settings
+from app.services.document_jobs import mark_document_failed, process_document_job
+from app.services.job_control import EXTRACTION, NLP, JobCancelledError, JobControl, JobTimeoutError
+from app.services.job_scheduler import job_scheduler
+
+
+# Time limits of a whole job, beyond the budgets of its stages; the job
+# enforces the soft limit itself, as the threads and solo pools do not
+JOB_SOFT_TIME_LIMIT = settings.EXTRACTION_JOB_TIMEOUT + settings.NLP_JOB_TIMEOUT + settings.JOB_TIME_LIMIT_GRACE
+JOB_HARD_TIME_LIMIT = JOB_SOFT_TIME_LIMIT + settings.JOB_TIME_LIMIT_GRACE
+
+
+def _broker_url() -> str:
+    backend = settings.JOB_QUEUE_BACKEND
+    if backend == "redis":
+        return settings.REDIS_URL
+    if backend == "sqlite":
+        return f"sqla+sqlite:///{settings.JOB_SQLITE_PATH}"
+    if backend == "memory":
+        return "memory://"
+    raise ValueError(f"Unknown JOB_QUEUE_BACKEND: {backend}")
+
+
+celery_app = Celery("mindmap", broker=_broker_url())
+celery_app.conf.update(
+    task_default_queue="documents",
+    task_ignore_result=True,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Jobs are long; a worker process should not reserve jobs it cannot start
+    worker_prefetch_multiplier=1,
+    worker_pool=settings.JOB_WORKER_POOL,
+    worker_concurrency=settings.JOB_WORKER_CONCURRENCY,
+    broker_connection_retry_on_startup=True,
+    broker_transport_options={"visibility_timeout": settings.JOB_VISIBILITY_TIMEOUT},
+)
+
+
+# One event loop per process, in its own thread, shared by the jobs of all
+# worker threads so that loop-bound helpers such as the NLP pool's slots
+# bound the NLP work of the whole process
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _job_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="job-loop", daemon=True).start()
+        return _loop
+
+
+def _run(coro: Coroutine) -> Any:
+    """Run a coroutine on the shared job loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _job_loop()).result()
+
+
+class DocumentTask(Task):
+    """
+    Base task that releases the job's scheduler slot when it finishes.
+
+    The document is marked as failed once retries are exhausted.
+    """
+
+    def on_success(self, retval, task_id, args, kwargs):
+        job_scheduler.finish(kwargs["job_id"], succeeded=True)
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        if isinstance(exc, JobTimeoutError):
+            reason = str(exc)
+        elif isinstance(exc, SoftTimeLimitExceeded):
+            reason = f"Timed out: job exceeded {JOB_SOFT_TIME_LIMIT}s"
+        else:
+            reason = f"Processing failed: {exc}"
+
+        logger.error(f"Processing of document {kwargs.get('document_id')} failed permanently: {reason}")
+        mark_document_failed(kwargs["document_id"], reason)
+        job_scheduler.finish(kwargs["job_id"], succeeded=False)
+
+
+def _job_control(job_id: str) -> JobControl:
+    return JobControl(
+        # Cancelling or deleting the document takes the job out of running
+        is_cancelled=lambda: not job_scheduler.is_running(job_id),
+        stage_budgets={EXTRACTION: settings.EXTRACTION_JOB_TIMEOUT, NLP: settings.NLP_JOB_TIMEOUT},
+        step_timeouts={EXTRACTION: settings.EXTRACTION_PAGE_TIMEOUT, NLP: settings.NLP_WINDOW_TIMEOUT},
+        check_interval=settings.JOB_CANCEL_CHECK_INTERVAL,
+        # The threads and solo pools do not enforce the task's time limits
+        job_timeout=JOB_SOFT_TIME_LIMIT,
+    )
+
+
+@celery_app.task(
+    bind=True,
+    base=DocumentTask,
+    name="documents.process",
+    autoretry_for=(Exception,),
+    # Cancellations, timeouts and missing files would only fail the same way again
+    dont_autoretry_for=(FileNotFoundError, JobCancelledError, JobTimeoutError, SoftTimeLimitExceeded),
+    max_retries=settings.JOB_MAX_RETRIES,
+    retry_backoff=settings.JOB_RETRY_BACKOFF,
+    retry_backoff_max=settings.JOB_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    soft_time_limit=JOB_SOFT_TIME_LIMIT,
+    time_limit=JOB_HARD_TIME_LIMIT,
+)
+def process_document_task(
+    self,
+    job_id: str,
+    document_id: str,
+    file_path: str,
+    file_type: str,
+    original_filename: str,
+):
+    """Extract and analyse an uploaded document."""
+    if not job_scheduler.is_running(job_id):
+        # Redelivered after the job was finished or recovered elsewhere
+        logger.warning(f"Skipping duplicate delivery of processing job {job_id}")
+        raise Ignore()
+
+    if self.request.retries:
+        logger.info(f"Retrying document {document_id} (attempt {self.request.retries + 1})")
+    try:
+        _run(process_document_job(
+            document_id, file_path, file_type, original_filename, _job_control(job_id)
+        ))
+    except JobCancelledError:
+        # The slot was released when the job was cancelled
+        logger.info(f"Processing job {job_id} for document {document_id} cancelled")
+        raise Ignore()
+
+
+@worker_init.connect
+def _start_pools(**kwargs):
+    """
+    Load the models and start the NLP processes before the first job.
+
+    With ``JOB_WORKER_PRELOAD_MODELS`` the models are loaded here and frozen,
+    and the NLP processes are forked from this process so they share them.
+    """
+    from app.services.document_processor import document_processor
+    from app.services.nlp_pool import nlp_pool
+
+    if settings.JOB_WORKER_PRELOAD_MODELS:
+        document_processor.warm_up()
+        gc.collect()
+        gc.freeze()
+        nlp_pool.start_method = "fork"
+
+    if settings.WARMUP_ON_STARTUP or settings.JOB_WORKER_PRELOAD_MODELS:
+        # Starts the NLP processes now, before any job thread is running
+        _run(nlp_pool.warm_up())
+        logger.info("NLP models warm; taking jobs")
+
+
+@worker_shutdown.connect
+def _stop_pools(**kwargs):
+    from app.services.nlp_pool import nlp_pool
+    from app.services.pdf_extraction import pdf_shard_pool
+
+    nlp_pool.shutdown()
+    pdf_shard_pool.shutdown()
+
+
+@worker_ready.connect
+def _recover_stale_jobs(**kwargs):
+    """Queue again the work of jobs that were lost, and fill free slots."""
+    recovered = job_scheduler.recover_stale(settings.JOB_STALE_AFTER_SECONDS)
+    if recovered:
+        logger.warning(f"Queued {recovered} stalled processing jobs again")
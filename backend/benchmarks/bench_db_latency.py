@@ -0,0 +1,114 @@
+"""
+Benchmark request latency under concurrent load with synchronous and async database sessions.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_db_latency --concurrency 50 --requests 2000
+    python -m benchmarks.bench_db_latency --slow-fraction 0.05 --slow-ms 200
+
+Each simulated request reads a page of documents and counts them, as
+``GET /api/v1/documents`` does, from coroutines sharing one event loop.
+In the synchronous mode the queries run on ``SessionLocal`` inside the
+coroutine, as the endpoints did, so every query stalls all other
+requests; in the async mode they run on ``AsyncSessionLocal``. A fraction
+of the requests also run a slow query (``pg_sleep``) to show how one slow
+request delays the rest. Needs the database from ``DATABASE_URL``.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import List
+
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.repositories.document_repository import AsyncDocumentRepository, DocumentRepository
+
+
+def sync_request(page_size: int, slow_seconds: float) -> None:
+    db = SessionLocal()
+    try:
+        repo = DocumentRepository(db)
+        if slow_seconds:
+            db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": slow_seconds})
+        repo.get_multi(limit=page_size)
+        repo.count()
+    finally:
+        db.close()
+
+
+async def async_request(page_size: int, slow_seconds: float) -> None:
+    async with AsyncSessionLocal() as db:
+        repo = AsyncDocumentRepository(db)
+        if slow_seconds:
+            await db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": slow_seconds})
+        await repo.get_multi(limit=page_size)
+        await repo.count()
+
+
+async def run(mode: str, args: argparse.Namespace) -> List[float]:
+    """Send all requests from ``--concurrency`` clients and return their latencies in seconds."""
+    rng = random.Random(42)
+    slow = [rng.random() < args.slow_fraction for _ in range(args.requests)]
+    pending = iter(range(args.requests))
+    latencies = []
+
+    async def client() -> None:
+        for index in pending:
+            slow_seconds = args.slow_ms / 1000 if slow[index] else 0.0
+            start = time.perf_counter()
+            if mode == "sync":
+                sync_request(args.page_size, slow_seconds)
+            else:
+                await async_request(args.page_size, slow_seconds)
+            latencies.append(time.perf_counter() - start)
+            # Yield like a real server between requests
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    return latencies
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def measure(args: argparse.Namespace) -> None:
+    # Open the connections so pool start-up is not attributed to the first mode
+    sync_request(args.page_size, 0.0)
+    await async_request(args.page_size, 0.0)
+
+    print(f"requests: {args.requests}, concurrency: {args.concurrency}, "
+          f"slow: {args.slow_fraction:.0%} x {args.slow_ms} ms")
+    print(f"{'mode':<6} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'req/s':>9}")
+    for mode in ("sync", "async"):
+        start = time.perf_counter()
+        latencies = await run(mode, args)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{mode:<6} {statistics.median(latencies) * 1000:9.1f} "
+            f"{percentile(latencies, 0.99) * 1000:9.1f} {max(latencies) * 1000:9.1f} "
+            f"{len(latencies) / elapsed:9.1f}"
+        )
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per mode")
+    parser.add_argument("--page-size", type=int, default=10, help="documents read per request")
+    parser.add_argument("--slow-fraction", type=float, default=0.02, help="fraction of requests with a slow query")
+    parser.add_argument("--slow-ms", type=int, default=100, help="duration of the slow query")
+    args = parser.parse_args()
+
+    asyncio.run(measure(args))
+
+
+if __name__ == "__main__":
+    main()
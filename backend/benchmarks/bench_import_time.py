@@ -0,0 +1,99 @@
+"""
+Import-time regression benchmark for ``app.main``.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --runs 10 --max-seconds 1.5
+
+Each run imports ``app.main`` in a fresh interpreter and measures the wall
+time. The benchmark fails (exit code 1) when the median exceeds
+``--max-seconds`` or when a heavy NLP/document library is imported eagerly.
+With ``--profile`` the slowest modules reported by ``-X importtime`` are listed.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must only be imported when a document is actually processed
+HEAVY_MODULES = ["spacy", "nltk", "torch", "transformers", "pypdf", "docx", "pptx"]
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure_once() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int) -> list:
+    """Return (cumulative microseconds, module) for the slowest imports."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # Format: "import time: <self us> | <cumulative us> | <indented module>"
+        _, cumulative, module = (part.strip() for part in line[len("import time:"):].split("|"))
+        timings.append((int(cumulative), module))
+
+    return sorted(timings, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="fail above this median import time")
+    parser.add_argument("--profile", action="store_true", help="list the slowest imported modules")
+    args = parser.parse_args()
+
+    results = [measure_once() for _ in range(args.runs)]
+    median = statistics.median(result["seconds"] for result in results)
+    heavy = sorted({name for result in results for name in result["heavy"]})
+
+    print(f"import app.main: median {median:.3f}s over {args.runs} runs "
+          f"(min {min(r['seconds'] for r in results):.3f}s, max {max(r['seconds'] for r in results):.3f}s)")
+
+    if args.profile:
+        for cumulative, module in slowest_imports(15):
+            print(f"  {cumulative / 1e6:8.3f}s  {module}")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(heavy)}")
+        failed = True
+    if median > args.max_seconds:
+        print(f"FAIL: median import time above {args.max_seconds:.2f}s")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
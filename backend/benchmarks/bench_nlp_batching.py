@@ -0,0 +1,100 @@
+"""
+Benchmark NLP stage throughput with and without cross-document batching.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_nlp_batching --docs 64 --batch-docs 8
+    python -m benchmarks.bench_nlp_batching --corpus-dir ./samples --n-process 2
+
+Documents are read from ``--corpus-dir`` (``*.txt`` files) when given,
+otherwise synthetic lecture-style documents are generated. Documents are
+cleaned and cut into windows up front; only the spaCy pass of the NLP
+stage is timed, as the job workers' batcher runs it.
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from app.services.document_processor import DocumentProcessor
+
+
+TOPICS = [
+    "Photosynthesis converts light energy into chemical energy in plants.",
+    "The University of Cambridge published a study on climate models in 2019.",
+    "Newton's second law relates force, mass and acceleration.",
+    "Marie Curie received the Nobel Prize for her research on radioactivity.",
+    "Supply and demand determine the market price of a product.",
+    "The French Revolution began in 1789 and reshaped European politics.",
+    "Binary search finds an element in a sorted array in logarithmic time.",
+    "Mitochondria produce most of the chemical energy needed by the cell.",
+]
+
+
+def synthetic_corpus(count: int, sentences: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(TOPICS) for _ in range(sentences))
+        for _ in range(count)
+    ]
+
+
+def load_corpus(corpus_dir: Path) -> List[str]:
+    return [
+        path.read_text(encoding="utf-8", errors="ignore")
+        for path in sorted(corpus_dir.glob("*.txt"))
+    ]
+
+
+def plan_windows(processor: DocumentProcessor, docs: List[str]) -> List[List[Tuple[str, Tuple[int, int, int, int]]]]:
+    """The NLP stage's input for each document: its planned windows with their text."""
+    groups = []
+    for doc in docs:
+        cleaned = processor.clean_stage(doc)
+        groups.append(processor._window_items(cleaned["cleaned_text"], cleaned["page_starts"]))
+    return groups
+
+
+def run(processor: DocumentProcessor, groups: List[List[Tuple[str, Tuple[int, int, int, int]]]],
+        batch_docs: int, pipe_batch_size: int, n_process: int) -> float:
+    """Analyse all documents and return throughput in documents per minute."""
+    start = time.perf_counter()
+    for i in range(0, len(groups), batch_docs):
+        processor.analyze_window_batch_sync(
+            groups[i:i + batch_docs],
+            batch_size=pipe_batch_size,
+            n_process=n_process,
+        )
+    elapsed = time.perf_counter() - start
+    return len(groups) / elapsed * 60
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=int, default=64, help="synthetic documents to generate")
+    parser.add_argument("--sentences", type=int, default=200, help="sentences per synthetic document")
+    parser.add_argument("--corpus-dir", type=Path, help="directory of .txt documents to use instead")
+    parser.add_argument("--batch-docs", type=int, default=8, help="documents per batched call")
+    parser.add_argument("--pipe-batch-size", type=int, default=32, help="nlp.pipe batch_size")
+    parser.add_argument("--n-process", type=int, default=1, help="nlp.pipe n_process")
+    args = parser.parse_args()
+
+    docs = load_corpus(args.corpus_dir) if args.corpus_dir else synthetic_corpus(args.docs, args.sentences)
+    processor = DocumentProcessor()
+    groups = plan_windows(processor, docs)
+
+    # Warm up the model so loading time is not attributed to the first run
+    processor.analyze_windows_sync(groups[0])
+
+    unbatched = run(processor, groups, 1, args.pipe_batch_size, args.n_process)
+    batched = run(processor, groups, args.batch_docs, args.pipe_batch_size, args.n_process)
+
+    print(f"documents:            {len(docs)}")
+    print(f"without batching:     {unbatched:10.1f} docs/minute")
+    print(f"with batching (x{args.batch_docs:<3}): {batched:10.1f} docs/minute")
+    print(f"speedup:              {batched / unbatched:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Measure per-process memory of a job worker's NLP processes with and without model preloading.
+
+Usage (from the backend directory, Linux only, with the broker and database reachable):
+    python -m benchmarks.bench_worker_memory --workers 4
+
+For each mode a Celery worker is started with ``WARMUP_ON_STARTUP=1`` and
+``NLP_WORKERS`` set to ``--workers``; the script waits until its NLP
+processes have loaded the models and their memory has settled, then reads
+``/proc/<pid>/smaps_rollup`` of the worker and each NLP process:
+
+    RSS   resident memory, counting shared pages in full for every process
+    PSS   proportional share; shared pages are divided between the sharers
+    USS   private memory that would be freed if the process exited
+
+USS per NLP process is the memory each additional process costs; the
+difference between the two modes is what copy-on-write sharing of the
+models saves.
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def read_smaps_rollup(pid: int) -> Dict[str, int]:
+    """Return RSS, PSS and USS of a process in kB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1])
+
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    """Return the NLP processes of a worker, leaving out multiprocessing helpers."""
+    children = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        for child in (task / "children").read_text().split():
+            cmdline = Path(f"/proc/{child}/cmdline").read_bytes()
+            if b"resource_tracker" not in cmdline:
+                children.append(int(child))
+    return children
+
+
+def wait_until_settled(pid: int, workers: int, timeout: float) -> None:
+    """Wait until all NLP processes exist and their memory stops growing."""
+    deadline = time.time() + timeout
+    previous = None
+    stable_rounds = 0
+
+    while time.time() < deadline:
+        children = child_pids(pid)
+        if len(children) >= workers:
+            total = sum(read_smaps_rollup(child)["rss"] for child in children)
+            # Loading the models grows the processes; three quiet seconds mean it is done
+            if previous is not None and abs(total - previous) <= previous // 100:
+                stable_rounds += 1
+                if stable_rounds >= 3:
+                    return
+            else:
+                stable_rounds = 0
+            previous = total
+        time.sleep(1)
+
+    raise TimeoutError(f"NLP processes not settled after {timeout}s")
+
+
+def measure(preload: bool, workers: int, timeout: float) -> Dict[str, Dict[str, int]]:
+    env = dict(
+        os.environ,
+        WARMUP_ON_STARTUP="1",
+        NLP_WORKERS=str(workers),
+        JOB_WORKER_PRELOAD_MODELS="1" if preload else "0",
+    )
+    worker = subprocess.Popen(
+        [
+            sys.executable, "-m", "celery", "-A", "app.worker", "worker",
+            "--pool=threads", "--loglevel=WARNING",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        wait_until_settled(worker.pid, workers, timeout)
+
+        parent = read_smaps_rollup(worker.pid)
+        worker_stats = [read_smaps_rollup(pid) for pid in child_pids(worker.pid)]
+    finally:
+        worker.send_signal(signal.SIGTERM)
+        worker.wait(timeout=30)
+
+    def average(key):
+        return sum(stats[key] for stats in worker_stats) // max(len(worker_stats), 1)
+
+    return {
+        "parent": parent,
+        "worker_avg": {key: average(key) for key in ("rss", "pss", "uss")},
+        "total": {
+            key: parent[key] + sum(stats[key] for stats in worker_stats)
+            for key in ("pss", "uss")
+        },
+    }
+
+
+def print_result(label: str, result: Dict[str, Dict[str, int]]) -> None:
+    mb = lambda kb: f"{kb / 1024:8.1f} MB"
+    print(f"{label}")
+    print(f"  parent        RSS {mb(result['parent']['rss'])}  PSS {mb(result['parent']['pss'])}  USS {mb(result['parent']['uss'])}")
+    print(f"  per NLP proc  RSS {mb(result['worker_avg']['rss'])}  PSS {mb(result['worker_avg']['pss'])}  USS {mb(result['worker_avg']['uss'])}")
+    print(f"  all processes PSS {mb(result['total']['pss'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=180.0, help="seconds to wait for warm models")
+    args = parser.parse_args()
+
+    per_worker = measure(preload=False, workers=args.workers, timeout=args.timeout)
+    preloaded = measure(preload=True, workers=args.workers, timeout=args.timeout)
+
+    print_result("models loaded per NLP process (JOB_WORKER_PRELOAD_MODELS=0)", per_worker)
+    print_result("models preloaded in the worker (JOB_WORKER_PRELOAD_MODELS=1)", preloaded)
+
+    saved_per_worker = per_worker["worker_avg"]["uss"] - preloaded["worker_avg"]["uss"]
+    saved_total = per_worker["total"]["pss"] - preloaded["total"]["pss"]
+    print(f"private memory saved per NLP process: {saved_per_worker / 1024:.1f} MB")
+    print(f"total memory saved with {args.workers} NLP processes: {saved_total / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
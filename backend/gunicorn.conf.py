@@ -0,0 +1,55 @@
+"""
+Gunicorn configuration that shares the NLP models between workers.
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The application is preloaded in the master and all objects are moved to
+the permanent GC generation before workers are forked, so the workers share
+the imported code copy-on-write. Where jobs run in the API process
+(``JOB_QUEUE_BACKEND=memory``), the spaCy model and NLTK data are loaded in
+the master as well and shared the same way; otherwise documents are
+processed by the Celery workers (``app/worker.py``), which share the models
+between their NLP processes.
+
+Environment variables:
+    BIND               address to listen on (default 0.0.0.0:8000)
+    WEB_CONCURRENCY    number of workers (default: CPU count)
+    GUNICORN_PRELOAD   set to 0 to load the application and models per worker
+"""
+
+import gc
+import multiprocessing
+import os
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# NLP runs in threads of each worker against the inherited model. A spawned
+# NLP pool would load a private model per process and defeat the sharing;
+# NLP_POOL_START_METHOD=fork keeps it shared if a pool is still wanted.
+if os.getenv("NLP_POOL_START_METHOD", "spawn") != "fork":
+    os.environ.setdefault("NLP_WORKERS", "0")
+
+
+def when_ready(server):
+    """Load the models in the master, after preloading and before forking."""
+    if not preload_app:
+        return
+
+    from app.core.config import settings
+
+    if settings.JOB_QUEUE_BACKEND == "memory":
+        from app.services.document_processor import document_processor
+
+        document_processor.warm_up()
+
+    # Objects created so far are never collected; freezing them keeps the
+    # collector from writing to their pages in the workers, which would
+    # otherwise un-share them page by page.
+    gc.collect()
+    gc.freeze()
+    server.log.info("Application preloaded in master and frozen for copy-on-write sharing")
@@ -0,0 +1,28 @@
+import pytest
+
+from app.core.config import settings
+from app.services import document_processor as processor_module
+from app.services.document_processor import document_processor
+from app.services.nlp_batcher import nlp_batcher
+from tests.fake_spacy import FakeNlp
+
+
+@pytest.fixture
+def fake_nlp(monkeypatch):
+    """Run the document processor on the fake pipeline, inline, with small windows."""
+    nlp = FakeNlp()
+    monkeypatch.setattr(document_processor, "_nlp", nlp)
+    monkeypatch.setattr(document_processor, "_stop_words", {"the", "and"})
+    monkeypatch.setattr(settings, "NLP_WINDOW_CHARS", 200)
+    monkeypatch.setattr(settings, "NLP_WINDOW_OVERLAP_CHARS", 80)
+
+    async def analyze_windows(items):
+        return document_processor.analyze_windows_sync(items)
+
+    async def analyze_window_batch(groups):
+        return document_processor.analyze_window_batch_sync(groups)
+
+    monkeypatch.setattr(processor_module.nlp_pool, "analyze_windows", analyze_windows)
+    monkeypatch.setattr(processor_module.nlp_pool, "analyze_window_batch", analyze_window_batch)
+    monkeypatch.setattr(nlp_batcher, "max_wait", 0.001)
+    return nlp
@@ -0,0 +1,70 @@
+"""
+Stand-ins for spaCy's ``Language`` and ``Doc`` with predictable analysis,
+for testing how the processor windows, merges and batches text.
+"""
+
+import contextlib
+import re
+
+
+class FakeSpan:
+    def __init__(self, doc_text, start, end, label=""):
+        self.start_char = start
+        self.end_char = end
+        self.text = doc_text[start:end]
+        self.label_ = label
+
+
+class FakeToken:
+    def __init__(self, idx):
+        self.idx = idx
+
+
+class FakeDoc:
+    """
+    Sentences end at ". ", every word is a token and every capitalised word
+    is an entity.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        words = [match.span() for match in re.finditer(r"\S+", text)]
+        self.tokens = [FakeToken(start) for start, _ in words]
+        self.ents = [FakeSpan(text, start, end, "PERSON") for start, end in words if text[start].isupper()]
+        self.noun_chunks = []
+        self.sents = []
+        start = 0
+        for match in re.finditer(r"\. ", text):
+            self.sents.append(FakeSpan(text, start, match.start() + 1))
+            start = match.end()
+        if start < len(text):
+            self.sents.append(FakeSpan(text, start, len(text)))
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+    def __len__(self):
+        return len(self.tokens)
+
+
+class FakeNlp:
+    """Records the texts of each ``pipe`` call and the components enabled for it."""
+
+    pipe_names = ["tok2vec", "tagger", "parser", "ner", "lemmatizer"]
+
+    def __init__(self):
+        self.pipe_calls = []
+        self.enabled_pipes = None
+
+    def select_pipes(self, enable):
+        self.enabled_pipes = list(enable)
+        return contextlib.nullcontext()
+
+    def pipe(self, items, as_tuples=False, batch_size=None, n_process=None):
+        items = list(items)
+        self.pipe_calls.append([text for text, _ in items] if as_tuples else items)
+        for item in items:
+            if as_tuples:
+                yield FakeDoc(item[0]), item[1]
+            else:
+                yield FakeDoc(item)
@@ -0,0 +1,70 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.database import _async_database_url
+from app.models.database import DocumentStatus
+from app.repositories.document_repository import AsyncDocumentRepository
+from app.repositories.upload_session_repository import AsyncUploadSessionRepository
+
+
+class FakeAsyncSession:
+    """Records the statements an async repository awaits."""
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def sql(self, index=-1):
+        return str(self.statements[index].compile(dialect=postgresql.dialect()))
+
+    async def scalars(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: [])
+
+    async def scalar(self, statement):
+        self.statements.append(statement)
+        return 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_async_database_url_uses_asyncpg():
+    assert _async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert _async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+@pytest.mark.asyncio
+async def test_queries_are_awaited_on_the_session():
+    db = FakeAsyncSession()
+    document_repo = AsyncDocumentRepository(db)
+
+    assert await document_repo.get_by_user("user-id", skip=20, limit=10) == []
+    sql = db.sql()
+    assert "LEFT OUTER JOIN users" in sql and "documents.uploaded_by = %(uploaded_by_1)s" in sql
+    assert "LIMIT %(param_1)s OFFSET %(param_2)s" in sql
+
+    assert await document_repo.count({"status": DocumentStatus.COMPLETED, "unknown": 1}) == 0
+    assert "WHERE documents.status = %(status_1)s" in db.sql()
+
+
+@pytest.mark.asyncio
+async def test_chunk_ranges_are_merged_under_a_row_lock():
+    stored = SimpleNamespace(id="session-id", received=[[0, 10]], expires_at=None)
+    db = FakeAsyncSession()
+
+    async def scalars(statement):
+        db.statements.append(statement)
+        return SimpleNamespace(one=lambda: stored)
+
+    db.scalars = scalars
+    expires_at = datetime(2024, 1, 2)
+
+    received = await AsyncUploadSessionRepository(db).add_range(stored, 10, 20, expires_at)
+
+    assert received == stored.received == [[0, 20]]
+    assert stored.expires_at == expires_at
+    assert db.sql().endswith("FOR UPDATE") and db.commits == 1
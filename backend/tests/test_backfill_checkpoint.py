@@ -0,0 +1,33 @@
+from app.backfill import Checkpoint
+
+
+def test_confirms_only_without_gaps(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json")
+    for document_id in ["a", "b", "c", "d"]:
+        checkpoint.submit(document_id)
+
+    checkpoint.finish("b")
+    checkpoint.finish("c")
+    assert checkpoint.confirm() is None
+
+    checkpoint.finish("a")
+    assert checkpoint.confirm() == "c"
+
+    checkpoint.finish("d")
+    assert checkpoint.confirm() == "d"
+    assert not checkpoint.submitted and not checkpoint.finished
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    checkpoint = Checkpoint(path)
+    checkpoint.submit("a")
+    checkpoint.finish("a")
+    checkpoint.confirm()
+    checkpoint.processed, checkpoint.failed, checkpoint.failed_ids = 3, 1, ["x"]
+    checkpoint.save()
+
+    loaded = Checkpoint(path)
+    loaded.load()
+    assert (loaded.last_id, loaded.processed, loaded.failed, loaded.failed_ids) == ("a", 3, 1, ["x"])
+    assert not path.with_suffix(".json.tmp").exists()
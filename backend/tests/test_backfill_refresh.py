@@ -0,0 +1,40 @@
+import uuid
+from types import SimpleNamespace
+
+from app import backfill
+from app.repositories import document_repository, document_version_repository
+from app.services import result_cache as result_cache_module
+from app.services.result_cache import CACHED_FIELDS, TEXT_FIELDS
+
+
+def test_derived_state_is_refreshed_per_batch(monkeypatch):
+    document_ids = [uuid.uuid4() for _ in range(3)]
+    calls = []
+
+    class FakeDocumentRepository:
+        def __init__(self, db):
+            pass
+
+        def get_many(self, ids, fields=None):
+            calls.append(("get_many", list(ids), fields))
+            return [SimpleNamespace(id=document_id) for document_id in ids]
+
+    class FakeVersionRepository:
+        def __init__(self, db):
+            pass
+
+        def delete_blocks_of_documents(self, ids):
+            calls.append(("delete_blocks", list(ids)))
+
+    monkeypatch.setattr(document_repository, "DocumentRepository", FakeDocumentRepository)
+    monkeypatch.setattr(document_version_repository, "DocumentVersionRepository", FakeVersionRepository)
+    monkeypatch.setattr(
+        result_cache_module.result_cache, "store_many", lambda db, documents: calls.append(("store", len(documents)))
+    )
+
+    backfill.refresh_derived_state(SimpleNamespace(expunge_all=lambda: None), document_ids)
+
+    [(_, loaded, fields), store, delete_blocks] = calls
+    assert loaded == document_ids and not set(TEXT_FIELDS) & set(fields) and set(CACHED_FIELDS) <= set(fields)
+    assert store == ("store", 3)
+    assert delete_blocks == ("delete_blocks", document_ids)
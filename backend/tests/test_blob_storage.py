@@ -0,0 +1,133 @@
+import hashlib
+import io
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+from app.services import blob_storage as blob_storage_module
+from app.services.blob_storage import BlobStore, LocalStorage, S3Storage, blob_key
+
+
+@pytest.fixture
+def refs(monkeypatch):
+    """In-memory blobs table behind BlobRepository."""
+    counts = {}
+
+    class FakeBlobRepository:
+        def __init__(self, db):
+            pass
+
+        def acquire(self, key, content_hash, size):
+            counts[key] = counts.get(key, 0) + 1
+            return counts[key]
+
+        def release(self, key, delete_blob):
+            counts[key] = counts.get(key, 0) - 1
+            if counts[key] <= 0:
+                delete_blob(key)
+                del counts[key]
+                return 0
+            return counts[key]
+
+    monkeypatch.setattr(blob_storage_module, "BlobRepository", FakeBlobRepository)
+    return counts
+
+
+DB = SimpleNamespace(rollback=lambda: None)
+
+
+def _store(store, content):
+    incoming = store.incoming_path(".txt")
+    incoming.parent.mkdir(parents=True, exist_ok=True)
+    incoming.write_bytes(content)
+    return store.store(DB, incoming, hashlib.sha256(content).hexdigest(), len(content), ".TXT")
+
+
+def test_identical_content_is_stored_once(refs, tmp_path):
+    store = BlobStore(LocalStorage(tmp_path / "blobs"), incoming_dir=tmp_path / "incoming")
+
+    key = _store(store, b"content")
+    assert _store(store, b"content") == key == blob_key(hashlib.sha256(b"content").hexdigest(), ".txt")
+    assert refs == {key: 2}
+    assert [path.name for path in (tmp_path / "blobs").rglob("*") if path.is_file()] == [key.split("/")[-1]]
+    assert not list((tmp_path / "incoming").iterdir())
+
+    store.release(DB, key)
+    assert store.exists(key)
+    store.release(DB, key)
+    assert not store.exists(key) and refs == {}
+
+
+def test_failed_write_gives_the_reference_back(refs, tmp_path):
+    class FailingStorage(LocalStorage):
+        def put(self, source, key):
+            raise OSError("disk full")
+
+    store = BlobStore(FailingStorage(tmp_path / "blobs"), incoming_dir=tmp_path / "incoming")
+    with pytest.raises(OSError):
+        _store(store, b"content")
+    assert refs == {}
+
+
+def test_files_from_before_content_addressing(refs, tmp_path):
+    store = BlobStore(LocalStorage(tmp_path / "blobs"), incoming_dir=tmp_path / "incoming")
+    legacy = tmp_path / "uploads" / "document.pdf"
+    legacy.parent.mkdir()
+    legacy.write_bytes(b"old")
+
+    with store.local_path(str(legacy)) as path:
+        assert path == legacy
+    store.release(DB, str(legacy))
+    assert not legacy.exists() and refs == {}
+
+
+class FakeS3Client:
+    def __init__(self):
+        self.objects = {}
+        self.uploads = 0
+
+    def _missing(self, operation):
+        return ClientError({"Error": {"Code": "404"}}, operation)
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self._missing("HeadObject")
+
+    def upload_file(self, filename, bucket, key):
+        self.uploads += 1
+        with open(filename, "rb") as source:
+            self.objects[key] = source.read()
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self._missing("GetObject")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+def test_s3_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "downloads"))
+    storage = S3Storage(bucket="bucket", prefix="uploads/")
+    storage._client = client = FakeS3Client()
+    key = blob_key("a" * 64, ".pdf")
+
+    for _ in range(2):
+        source = tmp_path / "incoming.pdf"
+        source.write_bytes(b"pdf")
+        storage.put(source, key)
+        assert not source.exists()
+    # The second upload of the same content is skipped
+    assert client.uploads == 1 and list(client.objects) == [f"uploads/{key}"]
+
+    with storage.local_path(key) as path:
+        assert path.read_bytes() == b"pdf"
+    assert not path.exists()
+
+    storage.delete(key)
+    assert not storage.exists(key)
+    with pytest.raises(FileNotFoundError):
+        storage.open(key)
@@ -0,0 +1,44 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.api_v1.endpoints import documents
+from app.models.database import UserRole
+
+
+OWNER = SimpleNamespace(id=uuid.uuid4(), role=UserRole.STUDENT)
+DOCUMENT_ID = str(uuid.uuid4())
+
+
+@pytest.fixture(autouse=True)
+def stored_document(monkeypatch):
+    document = SimpleNamespace(id=uuid.UUID(DOCUMENT_ID), uploaded_by=OWNER.id, title="Notes")
+
+    class FakeRepository:
+        def __init__(self, db):
+            pass
+
+        async def get(self, document_id, fields=None):
+            return document if document_id == document.id else None
+
+    monkeypatch.setattr(documents, "AsyncDocumentRepository", FakeRepository)
+    return document
+
+
+@pytest.mark.asyncio
+async def test_only_the_owner_or_an_admin_reads_a_document():
+    assert await documents.get_document_by_id(DOCUMENT_ID, "title", False, None, OWNER) == {"title": "Notes"}
+
+    admin = SimpleNamespace(id=uuid.uuid4(), role=UserRole.ADMIN)
+    assert await documents.get_document_by_id(DOCUMENT_ID, "title", False, None, admin) == {"title": "Notes"}
+
+    other = SimpleNamespace(id=uuid.uuid4(), role=UserRole.STUDENT)
+    with pytest.raises(HTTPException) as error:
+        await documents.get_document_by_id(DOCUMENT_ID, "title", False, None, other)
+    assert error.value.status_code == 403
+
+    with pytest.raises(HTTPException) as error:
+        await documents.get_document_by_id(str(uuid.uuid4()), "title", False, None, OWNER)
+    assert error.value.status_code == 404
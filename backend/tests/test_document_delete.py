@@ -0,0 +1,64 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.api_v1.endpoints import documents
+
+
+DOCUMENT_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Records the row delete and blob releases of a document with two versions."""
+    log = []
+    document = SimpleNamespace(id=DOCUMENT_ID, version=2, file_path="v2-key")
+    failing = set()
+
+    class FakeRepository:
+        def __init__(self, db):
+            pass
+
+        def get(self, document_id):
+            return document
+
+        def delete(self, document_id):
+            log.append(("delete", document_id))
+            return True
+
+    class FakeVersionRepository:
+        def __init__(self, db):
+            pass
+
+        def get_for_document(self, document_id):
+            return [SimpleNamespace(version=1, file_path="v1-key")]
+
+    def release(db, key):
+        if key in failing:
+            raise OSError("storage unavailable")
+        log.append(("release", key))
+
+    monkeypatch.setattr(documents, "DocumentRepository", FakeRepository)
+    monkeypatch.setattr(documents, "DocumentVersionRepository", FakeVersionRepository)
+    monkeypatch.setattr(documents, "job_scheduler", SimpleNamespace(cancel=lambda db, document_id: False))
+    monkeypatch.setattr(documents, "blob_store", SimpleNamespace(release=release))
+    return SimpleNamespace(log=log, failing=failing)
+
+
+def test_files_are_released_after_the_row_is_deleted(events):
+    documents.delete_document(str(DOCUMENT_ID), None)
+
+    assert events.log == [("delete", DOCUMENT_ID), ("release", "v1-key"), ("release", "v2-key")]
+
+
+def test_files_that_cannot_be_released_fail_the_request(events):
+    events.failing.add("v1-key")
+
+    with pytest.raises(HTTPException) as error:
+        documents.delete_document(str(DOCUMENT_ID), None)
+
+    assert error.value.status_code == 500 and "1 of its files" in error.value.detail
+    # The other files are still released
+    assert events.log == [("delete", DOCUMENT_ID), ("release", "v2-key")]
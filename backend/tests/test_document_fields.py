@@ -0,0 +1,37 @@
+import uuid
+
+import pytest
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.api.api_v1.endpoints.documents import PROCESSED_DOCUMENT_FIELDS
+from app.models.database import Document
+from app.services.text_index import build_text_index
+
+
+STORED = build_text_index(["First sentence.", "Second one."], [{"start_sentence": 0, "end_sentence": 1}])
+
+
+def _sparse(columns, stored):
+    # A document with only ``columns`` loaded; reading any other column raises,
+    # as it does on the async session instead of lazy loading
+    document = Document(id=uuid.uuid4())
+    for column in columns:
+        if column != "id":
+            setattr(document, column, stored.get(column))
+    make_transient_to_detached(document)
+    return document
+
+
+@pytest.mark.parametrize("stored", [STORED, {}], ids=["offsets", "legacy"])
+@pytest.mark.parametrize("field", sorted(PROCESSED_DOCUMENT_FIELDS))
+def test_field_reads_only_its_columns(field, stored):
+    columns, value = PROCESSED_DOCUMENT_FIELDS[field]
+
+    value(_sparse(columns, stored))
+
+
+def test_sentences_without_chunk_offsets():
+    columns, value = PROCESSED_DOCUMENT_FIELDS["sentences"]
+
+    assert "chunk_offsets" not in columns
+    assert value(_sparse(columns, STORED)) == ["First sentence.", "Second one."]
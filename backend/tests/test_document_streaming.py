@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from app.models.database import DocumentStatus
+from app.services import document_jobs
+from app.services.document_processor import ChunkStream, document_processor
+from app.services.job_control import EXTRACTION, NLP, JobControl
+
+
+PARAGRAPHS = [
+    " ".join(f"Paragraph {p} sentence {s} names Alice and bob." for s in range(4))
+    for p in range(12)
+]
+
+
+class RecordingRepository:
+    def __init__(self):
+        self.calls = []
+
+    def update_processing_status(self, document_id, status, **fields):
+        self.calls.append(("status", status, fields))
+
+    def clear_processing_batches(self, document_id):
+        self.calls.append(("clear", None))
+
+    def append_processing_batch(self, document_id, seq, batch):
+        self.calls.append(("append", (seq, batch)))
+
+    def finish_processing_batches(self, document_id):
+        self.calls.append(("finish", None))
+
+
+def test_chunk_stream_matches_whole_document_chunks():
+    sentences = [f"Sentence {i}." for i in range(23)]
+    chunker = ChunkStream()
+
+    chunks = []
+    for start in range(0, len(sentences), 3):
+        chunks += chunker.add(sentences[start:start + 3])
+    chunks += chunker.finish()
+
+    assert chunks == document_processor._create_chunks(sentences)
+
+
+@pytest.mark.asyncio
+async def test_streamed_batches_add_up_to_the_whole_document(fake_nlp, tmp_path):
+    path = tmp_path / "document.txt"
+    path.write_text("\n\n".join(PARAGRAPHS) + "\n")
+    raw_text = path.read_text()
+
+    batches = [
+        batch
+        async for batch in document_processor.preprocess_stream(
+            document_processor.stream_text_units(str(path), "txt", {})
+        )
+    ]
+    cleaned = document_processor.clean_stage(raw_text)
+    analysis = document_processor.nlp_stage_sync(cleaned["cleaned_text"], cleaned["page_starts"])
+    whole = {
+        "chunks": document_processor.chunk_stage(analysis)["chunks"],
+        "entities": analysis["entities"],
+        "sentence_count": len(analysis["sentences"]),
+        "word_count": analysis["word_count"],
+    }
+
+    # Results arrive in several batches while the text is still being read
+    assert len(batches) > 2
+    assert "".join(batch["raw_text"] for batch in batches) == raw_text
+    assert [chunk for batch in batches for chunk in batch["chunks"]] == whole["chunks"]
+    assert [entity for batch in batches for entity in batch["entities"]] == whole["entities"]
+    assert sum(batch["sentence_count"] for batch in batches) == whole["sentence_count"]
+    assert sum(batch["word_count"] for batch in batches) == whole["word_count"]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_persisted_as_they_arrive(fake_nlp, tmp_path):
+    path = tmp_path / "document.txt"
+    path.write_text("\n\n".join(PARAGRAPHS) + "\n")
+    repository = RecordingRepository()
+    control = JobControl(
+        lambda: False, stage_budgets={EXTRACTION: 60, NLP: 60}, step_timeouts={EXTRACTION: 10, NLP: 10}
+    )
+
+    await document_jobs.process_document_streaming(
+        repository, "document-id", str(path), "txt", time.time(), control
+    )
+
+    first, clear, *appends, finish, last = repository.calls
+    # Results of an earlier run are cleared before the first batch is stored
+    assert first[:2] == ("status", DocumentStatus.PROCESSING) and first[2]["raw_text"] is None
+    assert clear[0] == "clear"
+    assert len(appends) > 2 and all(kind == "append" for kind, _ in appends)
+    assert [seq for _, (seq, _) in appends] == list(range(len(appends)))
+    assert "".join(batch["raw_text"] for _, (_, batch) in appends) == path.read_text()
+    # The batches are assembled into the document before it is completed
+    assert finish[0] == "finish"
+    assert last[:2] == ("status", DocumentStatus.COMPLETED) and last[2]["processed"]
@@ -0,0 +1,55 @@
+import pytest
+
+from app.core.config import settings
+from app.services.document_processor import document_processor
+from tests.fake_spacy import FakeDoc
+
+
+TEXT = " ".join(f"Sentence {i} is about Alice and bob." for i in range(20))
+
+
+@pytest.fixture
+def small_windows(monkeypatch):
+    monkeypatch.setattr(settings, "NLP_WINDOW_CHARS", 100)
+    monkeypatch.setattr(settings, "NLP_WINDOW_OVERLAP_CHARS", 50)
+
+
+def _analyse(text, page_starts):
+    accumulator = document_processor._new_accumulator()
+    for window in document_processor._plan_windows(text, page_starts):
+        spans = document_processor._window_spans(FakeDoc(text[window[0]:window[1]]), window)
+        document_processor._merge_spans(spans, accumulator)
+    return accumulator
+
+
+def test_owned_regions_partition_the_text(small_windows):
+    windows = document_processor._plan_windows(TEXT, [0])
+
+    assert len(windows) > 1
+    assert windows[0][2] == 0 and windows[-1][3] == len(TEXT)
+    for previous, following in zip(windows, windows[1:]):
+        assert previous[3] == following[2]
+    for start, end, own_start, own_end in windows:
+        assert own_end - own_start <= 100
+        assert start <= own_start < own_end <= end
+
+
+def test_windows_are_cut_at_page_starts(small_windows):
+    pages = [" ".join(f"Page {page} line {line}." for line in range(4)) for page in range(5)]
+    raw_text = "".join(f"\n--- Page {page + 1} ---\n{text}\n" for page, text in enumerate(pages))
+
+    cleaned_text, page_starts = document_processor._clean_pages(raw_text)
+    windows = document_processor._plan_windows(cleaned_text, page_starts)
+
+    assert cleaned_text == " ".join(pages)
+    assert {own_start for _, _, own_start, _ in windows} <= set(page_starts)
+
+
+def test_overlaps_are_merged_without_duplicates(small_windows):
+    whole = FakeDoc(TEXT)
+
+    accumulator = _analyse(TEXT, [0])
+
+    assert accumulator["sentences"] == [sentence.text for sentence in whole.sents]
+    assert accumulator["entities"] == [(ent.text, ent.label_) for ent in whole.ents]
+    assert accumulator["word_count"] == len(whole.tokens)
@@ -0,0 +1,85 @@
+from email.utils import formatdate
+
+import pytest
+
+from app.services.file_response import (
+    RangeFileResponse,
+    RangeNotSatisfiableError,
+    _etag_matches,
+    _not_modified_since,
+    content_disposition,
+    parse_range,
+)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=10-5", None),
+    ("bytes=0-1,5-10", None),
+    ("bytes=-", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range(header, 1000)
+
+
+def test_etag_matches():
+    assert _etag_matches('"abc"', '"abc"')
+    assert _etag_matches('"x", W/"abc"', '"abc"')
+    assert _etag_matches("*", '"abc"')
+    assert not _etag_matches('"abd"', '"abc"')
+
+
+def test_not_modified_since():
+    assert _not_modified_since(formatdate(1_700_000_000, usegmt=True), 1_700_000_000.5)
+    assert not _not_modified_since(formatdate(1_700_000_000, usegmt=True), 1_700_000_001)
+    assert not _not_modified_since("yesterday", 1_700_000_000)
+
+
+def test_content_disposition_quotes_name():
+    assert content_disposition("report ä.pdf") == "attachment; filename*=UTF-8''report%20%C3%A4.pdf"
+
+
+@pytest.fixture
+def file_path(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(bytes(range(100)))
+    return path
+
+
+def _response(path, **headers):
+    return RangeFileResponse(path, headers, media_type="application/octet-stream", filename="file.bin", etag='"hash"')
+
+
+def test_range_response(file_path):
+    response = _response(file_path, range="bytes=10-19")
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/100"
+    assert response.headers["content-length"] == "10"
+
+
+def test_if_range_with_stale_etag_sends_whole_file(file_path):
+    response = _response(file_path, **{"range": "bytes=10-19", "if-range": '"other"'})
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "100"
+
+
+def test_unsatisfiable_range_response(file_path):
+    response = _response(file_path, range="bytes=200-")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */100"
+
+
+def test_if_none_match(file_path):
+    assert _response(file_path, **{"if-none-match": '"hash"'}).status_code == 304
+    assert _response(file_path, **{"if-none-match": '"other"'}).status_code == 200
@@ -0,0 +1,219 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import document_jobs
+from app.services import document_processor as processor_module
+from app.services.document_processor import document_processor
+from app.services.job_control import EXTRACTION, NLP, JobControl
+from app.services.stage_cache import stage_cache
+from app.services.text_index import decode_block
+
+
+PARAGRAPHS = [
+    " ".join(f"Paragraph {p} sentence {s} names Alice and bob." for s in range(4))
+    for p in range(12)
+]
+
+
+class FakeVersionRepository:
+    """Versions and their blocks, kept in memory across repository instances."""
+
+    versions = []
+    blocks = {}
+
+    def __init__(self, db):
+        pass
+
+    def get_current(self, document):
+        for version in self.versions:
+            if (version.document_id, version.version) == (document.id, document.version):
+                return version
+        version = SimpleNamespace(
+            id=uuid.uuid4(), document_id=document.id, version=document.version, pipeline_version=None
+        )
+        self.versions.append(version)
+        return version
+
+    def get_latest_processed(self, document_id, before_version, pipeline_version):
+        matching = [
+            version for version in self.versions
+            if version.document_id == document_id and version.version < before_version
+            and version.pipeline_version == pipeline_version
+        ]
+        return max(matching, key=lambda version: version.version, default=None)
+
+    def get_block_hashes(self, version_id):
+        return {block["block_hash"] for block in self.blocks.get(version_id, {}).values()}
+
+    def get_block_results(self, version_ids, block_hashes):
+        return {
+            block["block_hash"]: {field: block[field] for field in ("text", "sentence_offsets", "result")}
+            for version_id in version_ids for block in self.blocks.get(version_id, {}).values()
+            if block["block_hash"] in block_hashes
+        }
+
+    def replace_blocks(self, version_id, blocks):
+        self.blocks.setdefault(version_id, {}).update((block["position"], block) for block in blocks)
+
+    def truncate_blocks(self, version_id, block_count):
+        stored = self.blocks.get(version_id, {})
+        for position in [position for position in stored if position >= block_count]:
+            del stored[position]
+
+    def clear_blocks(self, version, pipeline_version):
+        self.blocks.pop(version.id, None)
+        version.pipeline_version = pipeline_version
+
+    def delete_blocks_before(self, document_id, version):
+        for older in self.versions:
+            if older.document_id == document_id and older.version < version:
+                self.blocks.pop(older.id, None)
+
+    def update(self, version, data):
+        for field, value in data.items():
+            setattr(version, field, value)
+
+
+class RecordingRepository:
+    def __init__(self, document):
+        self.document = document
+        self.batches = []
+
+    def get(self, document_id):
+        return self.document
+
+    def update_processing_status(self, document_id, status, **fields):
+        pass
+
+    def clear_processing_batches(self, document_id):
+        self.batches.clear()
+
+    def append_processing_batch(self, document_id, seq, batch):
+        assert seq == len(self.batches)
+        self.batches.append(batch)
+
+    def finish_processing_batches(self, document_id):
+        pass
+
+
+@pytest.fixture
+def versions(fake_nlp, monkeypatch):
+    monkeypatch.setattr(FakeVersionRepository, "versions", [])
+    monkeypatch.setattr(FakeVersionRepository, "blocks", {})
+    monkeypatch.setattr(document_jobs, "DocumentVersionRepository", FakeVersionRepository)
+    monkeypatch.setattr(stage_cache, "enabled", False)
+    # One block per paragraph
+    monkeypatch.setattr(settings, "INCREMENTAL_BLOCK_MIN_CHARS", 1)
+    monkeypatch.setattr(processor_module, "BLOCK_BOUNDARY_MODULUS", 1)
+
+    analysed = []
+    analyze_block = document_jobs.analyze_block
+
+    async def counting_analyze_block(db, units, analyze_windows, report):
+        analysed.append(units)
+        return await analyze_block(db, units, analyze_windows, report)
+
+    monkeypatch.setattr(document_jobs, "analyze_block", counting_analyze_block)
+    return analysed
+
+
+async def _process(document, paragraphs, tmp_path):
+    path = tmp_path / f"{document.id}-{document.version}.txt"
+    path.write_text("\n\n".join(paragraphs) + "\n")
+    repository = RecordingRepository(document)
+    control = JobControl(
+        lambda: False, stage_budgets={EXTRACTION: 60, NLP: 60}, step_timeouts={EXTRACTION: 10, NLP: 10}
+    )
+
+    await document_jobs.process_document_incremental(
+        None, repository, document.id, str(path), "txt", time.time(), control
+    )
+    return {
+        field: [item for batch in repository.batches for item in batch[field]]
+        for field in ("chunks", "entities", "key_phrases")
+    }
+
+
+@pytest.mark.asyncio
+async def test_revision_only_analyses_changed_blocks(versions, tmp_path):
+    document = SimpleNamespace(id=uuid.uuid4(), version=1, content_hash=None)
+    await _process(document, PARAGRAPHS, tmp_path)
+    assert len(versions) == len(PARAGRAPHS)
+
+    revised = list(PARAGRAPHS)
+    revised[5] = "A rewritten paragraph about Carol. It has two sentences."
+    document.version = 2
+    versions.clear()
+    incremental = await _process(document, revised, tmp_path)
+
+    assert len(versions) == 1
+    # Only the blocks of the newest version are kept
+    stored = [version.version for version in FakeVersionRepository.versions if FakeVersionRepository.blocks.get(version.id)]
+    assert stored == [2]
+    # The carried-over blocks give the same results as processing the revision from scratch
+    fresh = await _process(SimpleNamespace(id=uuid.uuid4(), version=1, content_hash=None), revised, tmp_path)
+    assert incremental == fresh
+
+
+@pytest.mark.asyncio
+async def test_blocks_store_spans_as_offsets_into_their_text(versions, tmp_path):
+    document = SimpleNamespace(id=uuid.uuid4(), version=1, content_hash=None)
+    await _process(document, PARAGRAPHS, tmp_path)
+
+    [stored] = FakeVersionRepository.blocks.values()
+    for block in stored.values():
+        result = decode_block(block["text"], block["sentence_offsets"], block["result"])
+        assert "sentences" not in block["result"]
+        assert result["sentences"] and all(sentence in block["text"] for sentence in result["sentences"])
+        assert all(isinstance(start, int) for start, _, _ in block["result"]["entities"])
+        assert all(isinstance(start, int) for start, _ in block["result"]["noun_chunks"])
+
+
+@pytest.mark.asyncio
+async def test_new_chunk_stage_version_keeps_the_analysed_blocks(versions, tmp_path, monkeypatch):
+    document = SimpleNamespace(id=uuid.uuid4(), version=1, content_hash=None)
+    await _process(document, PARAGRAPHS, tmp_path)
+
+    monkeypatch.setitem(processor_module.STAGE_VERSIONS, "chunk", processor_module.STAGE_VERSIONS["chunk"] + 1)
+    versions.clear()
+    document.version = 2
+    rechunked = await _process(document, PARAGRAPHS, tmp_path)
+
+    # Chunks are derived again from the stored blocks without running spaCy
+    assert versions == []
+    assert len(rechunked["chunks"]) == len(PARAGRAPHS)
+
+
+@pytest.mark.asyncio
+async def test_new_nlp_stage_version_analyses_every_block_again(versions, tmp_path, monkeypatch):
+    document = SimpleNamespace(id=uuid.uuid4(), version=1, content_hash=None)
+    await _process(document, PARAGRAPHS, tmp_path)
+
+    monkeypatch.setitem(processor_module.STAGE_VERSIONS, "nlp", processor_module.STAGE_VERSIONS["nlp"] + 1)
+    versions.clear()
+    document.version = 2
+    await _process(document, PARAGRAPHS, tmp_path)
+
+    assert len(versions) == len(PARAGRAPHS)
+
+
+@pytest.mark.asyncio
+async def test_blocks_of_another_document_come_from_the_stage_cache(versions, fake_nlp, tmp_path, monkeypatch):
+    entries = {}
+    monkeypatch.setattr(stage_cache, "enabled", True)
+    monkeypatch.setattr(stage_cache, "lookup", lambda db, stage, input_hash: entries.get((stage, input_hash)))
+    monkeypatch.setattr(
+        stage_cache, "store",
+        lambda db, stage, input_hash, output, hashed: entries.__setitem__((stage, input_hash), (output, hashed)),
+    )
+    first = await _process(SimpleNamespace(id=uuid.uuid4(), version=1, content_hash=None), PARAGRAPHS, tmp_path)
+    fake_nlp.pipe_calls.clear()
+
+    second = await _process(SimpleNamespace(id=uuid.uuid4(), version=1, content_hash=None), PARAGRAPHS, tmp_path)
+
+    assert fake_nlp.pipe_calls == []
+    assert second == first
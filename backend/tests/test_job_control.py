@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.job_control import EXTRACTION, NLP, JobCancelledError, JobControl, JobTimeoutError
+
+
+def _control(is_cancelled=lambda: False, stage_budget=10.0, step_timeout=0.2, job_timeout=None):
+    return JobControl(
+        is_cancelled,
+        stage_budgets={EXTRACTION: stage_budget, NLP: stage_budget},
+        step_timeouts={EXTRACTION: step_timeout, NLP: step_timeout},
+        check_interval=0,
+        job_timeout=job_timeout,
+    )
+
+
+@pytest.mark.asyncio
+async def test_step_exceeding_its_timeout_is_abandoned():
+    control = _control()
+
+    assert await control.step(NLP, asyncio.sleep(0, result="done")) == "done"
+    with pytest.raises(JobTimeoutError) as error:
+        await control.step(NLP, asyncio.sleep(5))
+    assert (error.value.stage, error.value.scope) == (NLP, "step")
+
+
+def test_blocking_step_is_abandoned_in_a_job_thread():
+    # Worker jobs run on threads and hand blocking work to pools
+    outcome = {}
+
+    async def job():
+        control = _control()
+        step = asyncio.get_running_loop().run_in_executor(None, time.sleep, 1)
+        started = time.monotonic()
+        try:
+            await control.step(EXTRACTION, step)
+        except JobTimeoutError as e:
+            outcome["error"] = e
+        outcome["elapsed"] = time.monotonic() - started
+
+    thread = threading.Thread(target=lambda: asyncio.run(job()))
+    thread.start()
+    thread.join()
+
+    assert (outcome["error"].stage, outcome["error"].scope) == (EXTRACTION, "step")
+    assert outcome["elapsed"] < 0.5
+
+
+@pytest.mark.asyncio
+async def test_job_time_limit_covers_all_stages():
+    control = _control(step_timeout=1, job_timeout=0.15)
+
+    await control.step(EXTRACTION, asyncio.sleep(0.1))
+    with pytest.raises(JobTimeoutError) as error:
+        await control.step(NLP, asyncio.sleep(0.1))
+    assert error.value.scope == "job"
+    assert str(error.value) == "Timed out: job exceeded 0.15s"
+
+    # Checkpoints between steps stop the job too
+    with pytest.raises(JobTimeoutError):
+        control.checkpoint()
+
+
+@pytest.mark.asyncio
+async def test_stage_budget_covers_all_steps():
+    control = _control(stage_budget=0.15, step_timeout=1)
+
+    await control.step(NLP, asyncio.sleep(0.1))
+    with pytest.raises(JobTimeoutError) as error:
+        await control.step(NLP, asyncio.sleep(0.1))
+    assert error.value.scope == "stage"
+
+
+@pytest.mark.asyncio
+async def test_cancellation_stops_extraction_between_units():
+    cancelled = False
+    pulled = []
+
+    async def pages():
+        for page in range(5):
+            pulled.append(page)
+            yield page
+
+    control = _control(is_cancelled=lambda: cancelled)
+    consumed = []
+    with pytest.raises(JobCancelledError):
+        async for page in control.units(pages()):
+            consumed.append(page)
+            cancelled = page == 1
+    # The checkpoint after the next page's step notices the cancellation
+    assert (consumed, pulled) == ([0, 1], [0, 1, 2])
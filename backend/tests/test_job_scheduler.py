@@ -0,0 +1,88 @@
+import inspect
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app import worker
+from app.core.config import settings
+from app.services.job_scheduler import LANE_LARGE, LANE_NORMAL, LANE_SMALL, JobScheduler, next_job
+
+
+START = datetime(2024, 1, 1)
+
+
+def _job(user_id, lane=LANE_NORMAL, minutes=0):
+    return SimpleNamespace(user_id=user_id, lane=lane, created_at=START + timedelta(minutes=minutes))
+
+
+def test_user_with_fewest_running_jobs_goes_first():
+    busy, idle = _job("busy", minutes=0), _job("idle", minutes=10)
+    assert next_job([busy, idle], {"busy": 3}) is idle
+
+
+def test_lower_lane_goes_first_for_equal_users():
+    large, small = _job("a", LANE_LARGE, minutes=0), _job("b", LANE_SMALL, minutes=10)
+    assert next_job([large, small], {}) is small
+
+
+def test_oldest_job_breaks_ties():
+    newer, older = _job("a", minutes=5), _job("b", minutes=1)
+    assert next_job([newer, older], {"a": 1, "b": 1}) is older
+
+
+def _scheduler():
+    return JobScheduler(
+        max_running=2, max_queued=10, max_queued_per_user=10,
+        small_file_size=1, large_file_size=2, default_duration=60,
+    )
+
+
+def _running_job(number):
+    document = SimpleNamespace(id=f"document-{number}", file_path=f"{number}.txt", file_name=f"{number}.txt")
+    return SimpleNamespace(id=f"job-{number}", document=document)
+
+
+def test_memory_backend_runs_jobs_off_the_dispatching_thread(monkeypatch):
+    scheduler = _scheduler()
+    release = threading.Event()
+    ran = []
+
+    class BlockingTask:
+        def apply(self, kwargs):
+            release.wait(5)
+            ran.append((kwargs["job_id"], threading.current_thread().name))
+
+    monkeypatch.setattr(settings, "JOB_QUEUE_BACKEND", "memory")
+    monkeypatch.setattr(worker, "process_document_task", BlockingTask())
+
+    # Returns while the job is still running, as the request that queued it would
+    scheduler._send(None, _running_job(1))
+    assert ran == []
+
+    release.set()
+    scheduler._local_jobs.shutdown(wait=True)
+    [(job_id, thread_name)] = ran
+    assert job_id == "job-1" and thread_name.startswith("local-job")
+
+
+def test_memory_backend_does_not_nest_the_next_job(monkeypatch):
+    scheduler = _scheduler()
+    depths = []
+    done = threading.Event()
+
+    class ChainingTask:
+        def apply(self, kwargs):
+            # Finishing a job dispatches the next one, like DocumentTask.on_success
+            depths.append(len(inspect.stack()))
+            if len(depths) < 20:
+                scheduler._send(None, _running_job(len(depths) + 1))
+            else:
+                done.set()
+
+    monkeypatch.setattr(settings, "JOB_QUEUE_BACKEND", "memory")
+    monkeypatch.setattr(worker, "process_document_task", ChainingTask())
+
+    scheduler._send(None, _running_job(1))
+    assert done.wait(5)
+    scheduler._local_jobs.shutdown(wait=True)
+    assert len(set(depths)) == 1
@@ -0,0 +1,76 @@
+import hashlib
+
+import pytest
+
+from app.services.upload_storage import (
+    MULTIPART_OVERHEAD,
+    UploadFormError,
+    UploadTooLargeError,
+    receive_multipart_file,
+)
+
+
+BOUNDARY = "test-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def _body(*parts):
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename is not None else "")
+        body += (
+            f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\nContent-Type: text/plain\r\n\r\n".encode()
+            + content + b"\r\n"
+        )
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+async def _chunks(body, size=7):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+async def _receive(body, tmp_path, max_size=1024):
+    return await receive_multipart_file(
+        _chunks(body), CONTENT_TYPE, "file", lambda extension: tmp_path / f"upload{extension}", [".txt"], max_size
+    )
+
+
+@pytest.mark.asyncio
+async def test_file_part_is_written_while_the_body_arrives(tmp_path):
+    content = b"Some notes.\r\n--not the boundary\r\n" * 10
+    body = _body(("title", None, b"Notes"), ("file", "notes.txt", content))
+
+    received = await _receive(body, tmp_path)
+
+    assert received.filename == "notes.txt"
+    assert received.content_type == "text/plain"
+    assert received.path.read_bytes() == content
+    assert received.size == len(content)
+    assert received.content_hash == hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_oversized_file_is_rejected_and_removed(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        await _receive(_body(("file", "notes.txt", b"x" * 2048)), tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+    # Parts around the file count towards the body's limit too
+    with pytest.raises(UploadTooLargeError):
+        await _receive(_body(("other", None, b"x" * (MULTIPART_OVERHEAD + 2048))), tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_missing_or_unsupported_files_are_rejected(tmp_path):
+    with pytest.raises(UploadFormError, match="not supported"):
+        await _receive(_body(("file", "notes.exe", b"MZ")), tmp_path)
+    with pytest.raises(UploadFormError, match="No file"):
+        await _receive(_body(("title", None, b"Notes")), tmp_path)
+    with pytest.raises(UploadFormError, match="multipart"):
+        await receive_multipart_file(_chunks(b""), "application/json", "file", lambda extension: tmp_path, [".txt"])
+
+    # A body that breaks off leaves nothing behind
+    with pytest.raises(UploadFormError):
+        await _receive(_body(("file", "notes.txt", b"Some notes."))[:-40], tmp_path)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.services import document_jobs
+from app.services.document_processor import document_processor
+from app.services.job_control import NLP, JobControl
+from app.services.nlp_batcher import NLPBatcher
+
+
+class FakePool:
+    """Records the calls the batcher makes; ``bad`` documents fail."""
+
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.batches = []
+        self.singles = []
+
+    async def analyze_window_batch(self, groups):
+        self.batches.append([items[0][0] for items in groups])
+        if self.bad & {items[0][0] for items in groups}:
+            raise ValueError("bad document")
+        return [[{"text": items[0][0]}] for items in groups]
+
+    async def analyze_windows(self, items):
+        self.singles.append(items[0][0])
+        if items[0][0] in self.bad:
+            raise ValueError("bad document")
+        return [{"text": items[0][0]}]
+
+
+def _items(text):
+    return [(text, (0, len(text), 0, len(text)))]
+
+
+async def _submit(batcher, texts):
+    return await asyncio.gather(
+        *(batcher.analyze_windows(_items(text)) for text in texts), return_exceptions=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_documents_submitted_together_share_one_batch():
+    pool = FakePool()
+
+    results = await _submit(NLPBatcher(pool, max_docs=8, max_wait_ms=10), ["a", "b", "c"])
+
+    assert pool.batches == [["a", "b", "c"]]
+    assert results == [[{"text": "a"}], [{"text": "b"}], [{"text": "c"}]]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting():
+    pool = FakePool()
+
+    # The timer would hold a partial batch for 10 seconds
+    await asyncio.wait_for(_submit(NLPBatcher(pool, max_docs=2, max_wait_ms=10_000), ["a", "b", "c", "d"]), 1)
+
+    assert pool.batches == [["a", "b"], ["c", "d"]]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_one_by_one():
+    pool = FakePool(bad=["b"])
+
+    a, b, c = await _submit(NLPBatcher(pool, max_docs=8, max_wait_ms=10), ["a", "b", "c"])
+
+    assert sorted(pool.singles) == ["a", "b", "c"]
+    assert (a, c) == ([{"text": "a"}], [{"text": "c"}])
+    assert isinstance(b, ValueError)
+
+
+@pytest.mark.asyncio
+async def test_nlp_stage_of_concurrent_jobs_runs_as_one_batch(fake_nlp, monkeypatch):
+    batches = []
+
+    class Pool:
+        async def analyze_window_batch(self, groups):
+            batches.append([text for items in groups for text, _ in items])
+            return document_processor.analyze_window_batch_sync(groups)
+
+    monkeypatch.setattr(document_jobs, "nlp_batcher", NLPBatcher(Pool(), max_docs=8, max_wait_ms=10))
+
+    def control():
+        return JobControl(lambda: False, stage_budgets={NLP: 60}, step_timeouts={NLP: 10})
+
+    texts = ["First document text.", "Second document text."]
+    await asyncio.gather(*(
+        document_processor.nlp_stage(text, [0], document_jobs._analyze_windows(control()))
+        for text in texts
+    ))
+
+    assert batches == [texts]
+    assert fake_nlp.pipe_calls == [texts]
+
+
+def test_batched_windows_are_analysed_with_only_the_needed_pipes(fake_nlp):
+    groups = [_items("Alpha beta."), _items("Gamma delta."), _items("Epsilon.")]
+
+    batched = document_processor.analyze_window_batch_sync(groups)
+
+    assert fake_nlp.pipe_calls == [["Alpha beta.", "Gamma delta.", "Epsilon."]]
+    assert fake_nlp.enabled_pipes == ["tok2vec", "tagger", "parser", "ner"]
+    assert batched == [document_processor.analyze_windows_sync(items) for items in groups]
@@ -0,0 +1,21 @@
+import pytest
+
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    position = {"created_at": "2024-05-01T12:00:00", "id": "0b9f6f9e-1c1c-4c43-9d4c-5d7f0a4e2b11"}
+    assert decode_cursor(encode_cursor(position)) == position
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor({"id": "?" * 7})
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "bm90IGpzb24", "WzEsMl0"])
+def test_invalid_cursor(cursor):
+    # Garbage, base64 of non-JSON, and base64 of a JSON list
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import pdf_extraction
+from app.services.pdf_extraction import PdfShardPool
+
+
+def _extract_page_range(file_path, first_page, last_page):
+    # Later shards finish first
+    time.sleep(0.002 * (20 - first_page % 20))
+    return [(page, f"page {page}") for page in range(first_page, last_page + 1)]
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+@pytest.fixture
+def shard_pool(monkeypatch):
+    monkeypatch.setattr(pdf_extraction, "extract_page_range", _extract_page_range)
+    pool = PdfShardPool(workers=2, shard_pages=3, min_pages=10)
+    executor = RecordingExecutor(max_workers=4)
+    monkeypatch.setattr(pool, "_get_executor", lambda: executor)
+    yield pool
+    executor.shutdown()
+
+
+def test_pages_are_yielded_in_order(shard_pool):
+    assert list(shard_pool.iter_pages("document.pdf", 20)) == [(page, f"page {page}") for page in range(1, 21)]
+
+
+def test_shards_in_flight_are_bounded(shard_pool):
+    pages = shard_pool.iter_pages("document.pdf", 60)
+
+    assert next(pages) == (1, "page 1")
+    assert shard_pool._get_executor().submitted == 4
+    pages.close()
+
+
+def test_small_pdfs_are_not_sharded():
+    assert not PdfShardPool(workers=2, shard_pages=3, min_pages=10).should_shard(9)
+    assert PdfShardPool(workers=2, shard_pages=3, min_pages=10).should_shard(10)
+    assert not PdfShardPool(workers=0, shard_pages=3, min_pages=10).should_shard(1000)
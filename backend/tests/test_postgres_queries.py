@@ -0,0 +1,170 @@
+"""
+Queries that rely on PostgreSQL: the dispatch advisory lock, ``DISTINCT ON``,
+aggregate ``FILTER`` clauses, the partial unique indexes behind
+single-flight processing, the blob reference count and result cache
+upserts and the assembly of streamed result batches. They run against ``TEST_DATABASE_URL``
+and are skipped when it is not set; each test runs in a transaction that
+is rolled back.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import (
+    Base, Document, DocumentResultBatch, DocumentStatus, ProcessingCacheEntry, ProcessingJob, ProcessingJobStatus,
+    User,
+)
+from app.repositories.blob_repository import BlobRepository
+from app.repositories.document_repository import DocumentRepository
+from app.repositories.processing_cache_repository import ProcessingCacheRepository
+from app.repositories.processing_job_repository import ProcessingJobRepository
+from app.services.text_index import TextIndex, TextIndexBuilder
+
+
+pytestmark = pytest.mark.skipif(not settings.TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(settings.TEST_DATABASE_URL)
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        Base.metadata.create_all(connection)
+        session = Session(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            yield session
+        finally:
+            session.close()
+            transaction.rollback()
+    engine.dispose()
+
+
+def _user(db, name):
+    user = User(email=f"{name}@example.com", password_hash="x", first_name=name, last_name="Test")
+    db.add(user)
+    db.flush()
+    return user
+
+
+def _document(db, user):
+    document = Document(
+        title="doc", file_name="doc.txt", file_path="doc.txt", file_size=1,
+        mime_type="text/plain", uploaded_by=user.id,
+    )
+    db.add(document)
+    db.flush()
+    return document
+
+
+def _job(db, user, lane, minutes, status=ProcessingJobStatus.QUEUED, content_hash=None):
+    document = _document(db, user)
+    job = ProcessingJob(
+        document_id=document.id, user_id=user.id, lane=lane, status=status, content_hash=content_hash,
+        created_at=datetime(2024, 1, 1) + timedelta(minutes=minutes),
+        started_at=datetime.utcnow() if status == ProcessingJobStatus.RUNNING else None,
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def test_next_queued_per_user(db):
+    alice, bob = _user(db, "alice"), _user(db, "bob")
+    _job(db, alice, lane=1, minutes=0)
+    alice_small = _job(db, alice, lane=0, minutes=5)
+    bob_first = _job(db, bob, lane=1, minutes=1)
+    _job(db, bob, lane=1, minutes=2)
+
+    job_repo = ProcessingJobRepository(db)
+    job_repo.lock_dispatch()
+    assert {job.id for job in job_repo.next_queued_per_user()} == {alice_small.id, bob_first.id}
+
+
+def test_stats_by_user(db):
+    alice = _user(db, "alice")
+    _job(db, alice, lane=1, minutes=0)
+    _job(db, alice, lane=1, minutes=1, status=ProcessingJobStatus.RUNNING)
+
+    job_repo = ProcessingJobRepository(db)
+    assert job_repo.running_counts_by_user() == {alice.id: 1}
+    [row] = job_repo.stats_by_user(datetime.utcnow() - timedelta(hours=1), user_id=alice.id)
+    assert (row["queued"], row["running"]) == (1, 1)
+    assert row["oldest_queued_at"] == datetime(2024, 1, 1)
+
+
+def test_only_one_transition_succeeds(db):
+    document = _document(db, _user(db, "alice"))
+
+    document_repo = DocumentRepository(db)
+    moves = [
+        document_repo.transition_status(document.id, [DocumentStatus.UPLOADED], DocumentStatus.PROCESSING)
+        for _ in range(2)
+    ]
+    assert moves == [True, False]
+
+
+def test_one_leader_per_content(db):
+    alice = _user(db, "alice")
+    _job(db, alice, lane=1, minutes=0, content_hash="a" * 64)
+    _job(db, alice, lane=1, minutes=1, status=ProcessingJobStatus.ATTACHED, content_hash="a" * 64)
+
+    with pytest.raises(IntegrityError), db.begin_nested():
+        _job(db, alice, lane=1, minutes=2, content_hash="a" * 64)
+
+
+def test_blob_reference_counting(db):
+    blob_repo = BlobRepository(db)
+    deleted = []
+
+    assert [blob_repo.acquire("ab/cd/key.pdf", "a" * 64, 10) for _ in range(2)] == [1, 2]
+    assert blob_repo.release("ab/cd/key.pdf", deleted.append) == 1
+    assert deleted == []
+    assert blob_repo.release("ab/cd/key.pdf", deleted.append) == 0
+    assert deleted == ["ab/cd/key.pdf"]
+
+
+def test_result_batches_are_assembled_in_order(db):
+    document = _document(db, _user(db, "alice"))
+    document_repo = DocumentRepository(db)
+    text_index = TextIndexBuilder()
+    parts = [["One.", "Two."], ["Three."], ["Four.", "Five."]]
+
+    for seq, sentences in enumerate(parts):
+        batch = {
+            "raw_text": " ".join(sentences), "entities": [(sentences[0], "ORDINAL")], "key_phrases": [sentences[-1]],
+            "sections": [], "word_count": len(sentences), "sentence_count": len(sentences),
+            **text_index.add(sentences, [{"start_sentence": 0, "end_sentence": 0}]),
+        }
+        document_repo.append_processing_batch(document.id, seq, batch)
+    document_repo.finish_processing_batches(document.id)
+    db.refresh(document)
+
+    assert document.raw_text == "One. Two.Three.Four. Five."
+    assert TextIndex(document.cleaned_text, document.sentence_offsets, None).sentences() == [
+        "One.", "Two.", "Three.", "Four.", "Five."
+    ]
+    assert [entity["text"] for entity in document.entities] == ["One.", "Three.", "Four."]
+    assert document.key_phrases == ["Two.", "Three.", "Five."]
+    assert (document.word_count, document.sentence_count) == (5, 5)
+    assert db.query(DocumentResultBatch).count() == 0
+
+
+def test_result_cache_entries_are_upserted_together(db):
+    cache_repo = ProcessingCacheRepository(db)
+    cache_repo.upsert("a" * 64, "v1", {"word_count": 1}, size_bytes=10)
+
+    cache_repo.upsert_many([
+        {"content_hash": "a" * 64, "pipeline_version": "v1", "result": {"word_count": 2}, "size_bytes": 20},
+        {"content_hash": "b" * 64, "pipeline_version": "v1", "result": {"word_count": 3}, "size_bytes": 30},
+    ])
+
+    entries = {entry.content_hash: entry for entry in db.query(ProcessingCacheEntry).all()}
+    assert {content_hash: entry.result["word_count"] for content_hash, entry in entries.items()} == {
+        "a" * 64: 2, "b" * 64: 3,
+    }
+    assert entries["a" * 64].size_bytes == 20
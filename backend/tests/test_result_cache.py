@@ -0,0 +1,162 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import result_cache as result_cache_module
+from app.services.result_cache import BINARY_FIELDS, CACHED_FIELDS, RESULT_FIELDS, TEXT_FIELDS, ResultCache
+
+
+@pytest.fixture
+def entries(monkeypatch):
+    """In-memory processing_cache table behind ProcessingCacheRepository."""
+    table = {}
+
+    class FakeCacheRepository:
+        def __init__(self, db):
+            pass
+
+        def get_entry(self, content_hash, pipeline_version):
+            return table.get((content_hash, pipeline_version))
+
+        def record_hit(self, entry):
+            entry.hit_count += 1
+            return entry
+
+        def upsert(self, content_hash, pipeline_version, result, size_bytes):
+            table[(content_hash, pipeline_version)] = SimpleNamespace(result=result, size_bytes=size_bytes, hit_count=0)
+
+        def upsert_many(self, entries):
+            for entry in entries:
+                self.upsert(**entry)
+
+        def delete_other_versions(self, pipeline_version):
+            stale = [key for key in table if key[1] != pipeline_version]
+            for key in stale:
+                del table[key]
+            return len(stale)
+
+        def delete_unused_since(self, cutoff):
+            return 0
+
+        def delete_least_recently_used(self, keep):
+            return 0
+
+    monkeypatch.setattr(result_cache_module, "ProcessingCacheRepository", FakeCacheRepository)
+    return table
+
+
+@pytest.fixture(autouse=True)
+def documents(monkeypatch):
+    """Completed documents behind DocumentRepository, by ID."""
+    rows = {}
+
+    class FakeDocumentRepository:
+        def __init__(self, db):
+            pass
+
+        def get_completed_texts(self, document_id, content_hash):
+            document = rows.get(document_id)
+            if document is None or document.content_hash != content_hash:
+                return None
+            return tuple(getattr(document, field) for field in TEXT_FIELDS)
+
+    monkeypatch.setattr(result_cache_module, "DocumentRepository", FakeDocumentRepository)
+    return rows
+
+
+DB = SimpleNamespace(rollback=lambda: None)
+
+
+# Packed offsets are bytes
+VALUES = {field: f"{field} value".encode() if field in BINARY_FIELDS else f"{field} value" for field in RESULT_FIELDS}
+
+
+def _document(content_hash="a" * 64, document_id="doc-1"):
+    return SimpleNamespace(id=document_id, content_hash=content_hash, **VALUES)
+
+
+def _cache(enabled=True, max_entry_bytes=1024 * 1024, evict_interval=0):
+    return ResultCache(
+        enabled=enabled, max_entries=10, max_entry_bytes=max_entry_bytes, ttl_days=30, evict_interval=evict_interval
+    )
+
+
+def test_miss_then_hit(entries, documents):
+    cache = _cache()
+    assert cache.lookup(DB, "a" * 64) is None
+
+    documents["doc-1"] = _document()
+    cache.store(DB, documents["doc-1"])
+
+    assert cache.lookup(DB, "a" * 64) == VALUES
+    assert cache.lookup(DB, "b" * 64) is None
+    [entry] = entries.values()
+    assert entry.hit_count == 1
+
+
+def test_other_pipeline_version_misses_and_is_purged(entries, monkeypatch):
+    cache = _cache()
+    cache.store(DB, _document())
+
+    monkeypatch.setattr(settings, "NLP_WINDOW_CHARS", settings.NLP_WINDOW_CHARS + 1)
+    assert cache.lookup(DB, "a" * 64) is None
+
+    cache.store(DB, _document("b" * 64))
+    assert [content_hash for content_hash, _ in entries] == ["b" * 64]
+
+
+def test_disabled_cache_and_unhashed_documents(entries):
+    _cache(enabled=False).store(DB, _document())
+    _cache().store(DB, _document(content_hash=None))
+
+    assert not entries
+    assert _cache(enabled=False).lookup(DB, "a" * 64) is None
+
+
+def test_oversized_results_are_not_stored(entries):
+    _cache(max_entry_bytes=100).store(DB, _document())
+    assert not entries
+
+
+def test_eviction_is_throttled(entries, monkeypatch):
+    cache = _cache(evict_interval=3600)
+    cache.store(DB, _document())
+
+    monkeypatch.setattr(settings, "NLP_WINDOW_CHARS", settings.NLP_WINDOW_CHARS + 1)
+    cache.store(DB, _document("b" * 64))
+    # The entry of the old version stays until the next eviction is due
+    assert [content_hash for content_hash, _ in entries] == ["a" * 64, "b" * 64]
+
+
+def test_texts_are_read_from_the_source_document(entries, documents):
+    cache = _cache()
+    documents["doc-1"] = _document()
+    cache.store(DB, documents["doc-1"])
+
+    [entry] = entries.values()
+    assert not set(TEXT_FIELDS) & set(entry.result)
+    assert set(CACHED_FIELDS) <= set(entry.result)
+
+    # Gone, reprocessing or replaced by another file
+    del documents["doc-1"]
+    assert cache.lookup(DB, "a" * 64) is None
+    documents["doc-1"] = _document("b" * 64)
+    assert cache.lookup(DB, "a" * 64) is None
+    assert entry.hit_count == 0
+
+
+def test_store_many_writes_one_batch(entries, monkeypatch):
+    batches = []
+    repository = result_cache_module.ProcessingCacheRepository
+    upsert_many = repository.upsert_many
+    monkeypatch.setattr(repository, "upsert_many", lambda self, batch: batches.append(batch) or upsert_many(self, batch))
+
+    documents = [
+        _document("a" * 64, "doc-1"), _document("b" * 64, "doc-2"), _document("a" * 64, "doc-3"), _document(None, "doc-4"),
+    ]
+    _cache().store_many(DB, documents)
+
+    # One batch, one entry per content
+    assert [len(batch) for batch in batches] == [2]
+    assert entries[("a" * 64, result_cache_module.document_processor.pipeline_version)].result["source_document_id"] == "doc-3"
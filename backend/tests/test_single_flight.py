@@ -0,0 +1,134 @@
+import itertools
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.database import DocumentStatus, ProcessingJobStatus
+from app.services import job_scheduler as job_scheduler_module
+from app.services.job_scheduler import JobScheduler
+from app.services.result_cache import RESULT_FIELDS
+
+
+ACTIVE = (ProcessingJobStatus.QUEUED, ProcessingJobStatus.RUNNING, ProcessingJobStatus.ATTACHED)
+
+
+class FakeDb:
+    def refresh(self, obj):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    """In-memory processing_jobs and documents tables behind the repositories."""
+    jobs = []
+    documents = {}
+    updates = []
+    clock = itertools.count()
+
+    class FakeJobRepository:
+        def __init__(self, db):
+            pass
+
+        def get(self, job_id):
+            return next((job for job in jobs if job.id == job_id), None)
+
+        def get_active_for_document(self, document_id):
+            return next((job for job in jobs if job.document_id == document_id and job.status in ACTIVE), None)
+
+        def get_leader_for_content(self, content_hash):
+            return next((job for job in jobs if job.content_hash == content_hash and job.status in ACTIVE[:2]), None)
+
+        def get_attached(self, leader_id):
+            return [job for job in jobs if job.leader_id == leader_id and job.status == ProcessingJobStatus.ATTACHED]
+
+        def create(self, data):
+            job = SimpleNamespace(**{
+                "id": uuid.uuid4(), "leader_id": None,
+                "created_at": datetime(2024, 1, 1) + timedelta(seconds=next(clock)), **data,
+            })
+            jobs.append(job)
+            return job
+
+        def update(self, job, data):
+            for field, value in data.items():
+                setattr(job, field, value)
+            return job
+
+    class FakeDocumentRepository:
+        def __init__(self, db):
+            pass
+
+        def get(self, document_id):
+            return documents.get(document_id)
+
+        def update_processing_status(self, document_id, status, **fields):
+            updates.append((document_id, status, fields))
+
+    monkeypatch.setattr(job_scheduler_module, "ProcessingJobRepository", FakeJobRepository)
+    monkeypatch.setattr(job_scheduler_module, "DocumentRepository", FakeDocumentRepository)
+    monkeypatch.setattr(job_scheduler_module, "create_db_session", FakeDb)
+    return SimpleNamespace(jobs=jobs, documents=documents, updates=updates)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = JobScheduler(
+        max_running=2, max_queued=10, max_queued_per_user=10,
+        small_file_size=1, large_file_size=100, default_duration=60,
+    )
+    # Dispatching talks to the broker; these tests only follow the job states
+    scheduler.dispatch = lambda: 0
+    return scheduler
+
+
+def _document(tables, content_hash="a" * 64):
+    document = SimpleNamespace(
+        id=uuid.uuid4(), uploaded_by="user", file_path="document.pdf", file_size=10,
+        content_hash=content_hash, processing_time=3, **{field: f"{field} value" for field in RESULT_FIELDS},
+    )
+    tables.documents[document.id] = document
+    return document
+
+
+def test_identical_content_attaches_to_the_leader(tables, scheduler):
+    first, second, other = _document(tables), _document(tables), _document(tables, "b" * 64)
+
+    leader = scheduler.submit(FakeDb(), first)
+    attached = scheduler.submit(FakeDb(), second)
+
+    assert leader.status == ProcessingJobStatus.QUEUED
+    assert (attached.status, attached.leader_id) == (ProcessingJobStatus.ATTACHED, leader.id)
+    assert scheduler.submit(FakeDb(), other).status == ProcessingJobStatus.QUEUED
+    # A document never gets a second unfinished job
+    assert scheduler.submit(FakeDb(), first) is leader
+    assert len(tables.jobs) == 3
+
+
+def test_attached_documents_receive_the_leaders_results(tables, scheduler):
+    first, second = _document(tables), _document(tables)
+    leader = scheduler.submit(FakeDb(), first)
+    attached = scheduler.submit(FakeDb(), second)
+
+    scheduler.finish(leader.id, succeeded=True)
+
+    assert attached.status == ProcessingJobStatus.COMPLETED
+    [(document_id, status, fields)] = tables.updates
+    assert (document_id, status) == (second.id, DocumentStatus.COMPLETED)
+    assert {field: fields[field] for field in RESULT_FIELDS} == {field: f"{field} value" for field in RESULT_FIELDS}
+
+
+def test_first_attached_job_takes_over_after_a_failure(tables, scheduler):
+    leader = scheduler.submit(FakeDb(), _document(tables))
+    second = scheduler.submit(FakeDb(), _document(tables))
+    third = scheduler.submit(FakeDb(), _document(tables))
+
+    scheduler.finish(leader.id, succeeded=False)
+
+    assert (second.status, second.leader_id) == (ProcessingJobStatus.QUEUED, None)
+    assert (third.status, third.leader_id) == (ProcessingJobStatus.ATTACHED, second.id)
+    assert tables.updates == []
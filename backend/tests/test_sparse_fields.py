@@ -0,0 +1,39 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.api.api_v1.endpoints.documents import DOCUMENT_LIST_FIELDS, _parse_fields
+from app.models.database import Document
+from app.repositories.base import load_options
+from app.repositories.document_repository import DOCUMENT_LARGE_COLUMNS
+
+
+def _selected_columns(*options):
+    sql = str(select(Document).options(*options).compile(dialect=postgresql.dialect()))
+    columns = sql.split("\nFROM ")[0].removeprefix("SELECT ")
+    return {column.strip().removeprefix("documents.") for column in columns.split(",")}
+
+
+def test_only_requested_fields_are_loaded():
+    # The primary key is always loaded
+    assert _selected_columns(*load_options(Document, ["title", "status"])) == {"id", "title", "status"}
+
+
+def test_listings_defer_the_large_columns():
+    everything = _selected_columns()
+    listed = _selected_columns(*load_options(Document, None, DOCUMENT_LARGE_COLUMNS))
+
+    # Attribute names; document_metadata is stored in the metadata column
+    assert everything - listed == {getattr(Document, column).expression.name for column in DOCUMENT_LARGE_COLUMNS}
+    assert load_options(Document) == []
+
+
+def test_parse_fields():
+    assert _parse_fields(None, DOCUMENT_LIST_FIELDS) is None
+    assert _parse_fields(" title, id,title ,", DOCUMENT_LIST_FIELDS) == ["title", "id"]
+    assert _parse_fields(",", DOCUMENT_LIST_FIELDS) is None
+
+    with pytest.raises(HTTPException) as error:
+        _parse_fields("title,raw_text", DOCUMENT_LIST_FIELDS)
+    assert error.value.status_code == 400 and "raw_text" in error.value.detail
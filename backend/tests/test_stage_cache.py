@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import document_processor as processor_module
+from app.services import stage_cache as stage_cache_module
+from app.services.stage_cache import RAN, REUSED, StageCache, output_hash
+
+
+@pytest.fixture
+def entries(monkeypatch):
+    """In-memory processing_cache table behind ProcessingCacheRepository."""
+    table = {}
+
+    class FakeCacheRepository:
+        def __init__(self, db):
+            pass
+
+        def get_entry(self, content_hash, pipeline_version, namespace):
+            return table.get((namespace, content_hash, pipeline_version))
+
+        def get_output_hash(self, content_hash, pipeline_version, namespace):
+            entry = self.get_entry(content_hash, pipeline_version, namespace)
+            return entry.output_hash if entry else None
+
+        def record_hit(self, entry):
+            return entry
+
+        def upsert(self, content_hash, pipeline_version, result, size_bytes, namespace, output_hash):
+            table[(namespace, content_hash, pipeline_version)] = SimpleNamespace(result=result, output_hash=output_hash)
+
+        def delete_other_versions(self, pipeline_version, namespace):
+            stale = [key for key in table if key[0] == namespace and key[2] != pipeline_version]
+            for key in stale:
+                del table[key]
+            return len(stale)
+
+        def delete_unused_since(self, cutoff, namespace):
+            return 0
+
+        def delete_least_recently_used(self, keep, namespace):
+            return 0
+
+    monkeypatch.setattr(stage_cache_module, "ProcessingCacheRepository", FakeCacheRepository)
+    return table
+
+
+DB = SimpleNamespace(rollback=lambda: None)
+
+
+async def _run_chain(cache, cleaned_text, analysis, runs):
+    """Run the nlp and chunk stages for a cleaned text, recording which ones computed."""
+    report = {}
+
+    async def analyse():
+        runs.append("nlp")
+        return analysis
+
+    async def chunk():
+        runs.append("chunk")
+        return {"chunks": [len(sentence) for sentence in analysis["sentences"]]}
+
+    _, analysis_hash = await cache.run(DB, "nlp", output_hash(cleaned_text), analyse, report)
+    await cache.run(DB, "chunk", analysis_hash, chunk, report)
+    return report
+
+
+@pytest.fixture
+def cache():
+    return StageCache(enabled=True, max_entries=10, max_entry_bytes=1024 * 1024, ttl_days=30, evict_interval=0)
+
+
+ANALYSIS = {"sentences": ["One.", "Two sentences."], "entities": []}
+
+
+@pytest.mark.asyncio
+async def test_unchanged_stages_are_reused(entries, cache):
+    runs = []
+    assert await _run_chain(cache, "text", ANALYSIS, runs) == {"nlp": RAN, "chunk": RAN}
+    assert await _run_chain(cache, "text", ANALYSIS, runs) == {"nlp": REUSED, "chunk": REUSED}
+    assert await _run_chain(cache, "other text", ANALYSIS, runs) == {"nlp": RAN, "chunk": REUSED}
+    assert runs == ["nlp", "chunk", "nlp"]
+
+
+@pytest.mark.asyncio
+async def test_version_bump_reruns_only_its_stage(entries, cache, monkeypatch):
+    runs = []
+    await _run_chain(cache, "text", ANALYSIS, runs)
+
+    monkeypatch.setitem(processor_module.STAGE_VERSIONS, "chunk", processor_module.STAGE_VERSIONS["chunk"] + 1)
+    assert await _run_chain(cache, "text", ANALYSIS, runs) == {"nlp": REUSED, "chunk": RAN}
+
+    # Window settings are part of the NLP version; the same analysis keeps the chunks
+    monkeypatch.setattr(settings, "NLP_WINDOW_CHARS", settings.NLP_WINDOW_CHARS + 1)
+    assert await _run_chain(cache, "text", ANALYSIS, runs) == {"nlp": RAN, "chunk": REUSED}
+
+    # Outputs of the old stage versions are purged
+    assert {key[0] for key in entries} == {"stage:nlp", "stage:chunk"} and len(entries) == 2
+
+
+@pytest.mark.asyncio
+async def test_plan_follows_the_chain_of_output_hashes(entries, cache):
+    await _run_chain(cache, "text", ANALYSIS, [])
+
+    assert cache.plan(DB, output_hash("text"), ("nlp", "chunk")) == {"nlp": REUSED, "chunk": REUSED}
+    assert cache.plan(DB, output_hash("edited"), ("nlp", "chunk")) == {"nlp": RAN, "chunk": RAN}
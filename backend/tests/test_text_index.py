@@ -0,0 +1,77 @@
+from app.services.text_index import TextIndex, TextIndexBuilder, build_text_index, offsets_view, pack_offsets
+
+
+SENTENCES = ["First sentence.", "Second one.", "Third.", "And the fourth."]
+CHUNKS = [
+    {"start_sentence": 0, "end_sentence": 1},
+    {"start_sentence": 2, "end_sentence": 3},
+]
+STORED = build_text_index(SENTENCES, CHUNKS)
+
+
+def _index():
+    return TextIndex(STORED["cleaned_text"], STORED["sentence_offsets"], STORED["chunk_offsets"])
+
+
+def test_pack_offsets_round_trip():
+    assert list(offsets_view(pack_offsets([0, 1, 2**32 - 1]))) == [0, 1, 2**32 - 1]
+    assert pack_offsets([1]) == b"\x01\x00\x00\x00"
+    assert list(offsets_view(None)) == []
+
+
+def test_sentences_and_chunks():
+    index = _index()
+
+    assert index.text == " ".join(SENTENCES)
+    assert index.sentence_count == 4
+    assert index.chunk_count == 2
+    assert index.sentences() == SENTENCES
+    assert index.sentences(1, 3) == SENTENCES[1:3]
+    assert index.chunks() == [
+        {"id": 0, "text": "First sentence. Second one.", "start_sentence": 0, "end_sentence": 1, "sentence_count": 2},
+        {"id": 1, "text": "Third. And the fourth.", "start_sentence": 2, "end_sentence": 3, "sentence_count": 2},
+    ]
+
+
+def test_builder_parts_match_whole_document():
+    builder = TextIndexBuilder()
+    first = builder.add(SENTENCES[:2], CHUNKS[:1])
+    second = builder.add(SENTENCES[2:], CHUNKS[1:])
+
+    assert first["cleaned_text"] + second["cleaned_text"] == STORED["cleaned_text"]
+    assert first["sentence_offsets"] + second["sentence_offsets"] == STORED["sentence_offsets"]
+    assert first["chunk_offsets"] + second["chunk_offsets"] == STORED["chunk_offsets"]
+
+
+def test_partial_text():
+    full = _index()
+    start, end = full.sentences_range(1, 3)
+    assert full.text[start:end] == "Second one. Third."
+
+    # Only the part of the text holding the requested sentences is loaded
+    partial = TextIndex(
+        full.text[start:end],
+        STORED["sentence_offsets"],
+        None,
+        text_start=start,
+        text_length=len(full.text),
+    )
+    assert partial.sentences(1, 3) == SENTENCES[1:3]
+
+    start, end = full.chunks_range(1)
+    partial = TextIndex(
+        full.text[start:end],
+        STORED["sentence_offsets"],
+        STORED["chunk_offsets"],
+        text_start=start,
+        text_length=len(full.text),
+    )
+    assert partial.chunks(1) == full.chunks(1)
+
+
+def test_empty_ranges():
+    index = _index()
+    assert index.sentences(10) == []
+    assert index.sentences_range(10) == (0, 0)
+    assert index.chunks_range(5) == (0, 0)
+    assert TextIndex(None, None, None).sentences() == []
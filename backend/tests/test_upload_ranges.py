@@ -0,0 +1,22 @@
+from app.repositories.upload_session_repository import merge_range
+
+
+def test_first_range():
+    assert merge_range([], 0, 10) == [[0, 10]]
+
+
+def test_adjacent_ranges_merge():
+    assert merge_range([[0, 10]], 10, 20) == [[0, 20]]
+
+
+def test_disjoint_ranges_stay_sorted():
+    assert merge_range([[20, 30]], 0, 10) == [[0, 10], [20, 30]]
+
+
+def test_range_fills_gap():
+    assert merge_range([[0, 10], [20, 30]], 10, 20) == [[0, 30]]
+
+
+def test_overlapping_and_repeated_ranges():
+    assert merge_range([[0, 10], [20, 30]], 5, 25) == [[0, 30]]
+    assert merge_range([[0, 30]], 5, 10) == [[0, 30]]
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+
+import pytest
+
+from app import worker
+from app.core.config import settings
+from app.services.job_control import NLP, JobCancelledError, JobTimeoutError
+
+
+JOB = {
+    "job_id": "job-id",
+    "document_id": "document-id",
+    "file_path": "document.txt",
+    "file_type": "txt",
+    "original_filename": "a.txt",
+}
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.running = True
+        self.finished = []
+
+    def is_running(self, job_id):
+        return self.running
+
+    def finish(self, job_id, succeeded):
+        self.finished.append((job_id, succeeded))
+
+
+@pytest.fixture
+def job(monkeypatch):
+    """Replaces the job body; records the attempts and the documents marked failed."""
+    calls = {"attempts": 0, "failed": [], "error": None, "fail_times": 0, "scheduler": FakeScheduler()}
+
+    async def process_document_job(document_id, file_path, file_type, original_filename, control):
+        calls["attempts"] += 1
+        if calls["error"] and calls["attempts"] <= calls["fail_times"]:
+            raise calls["error"]
+
+    monkeypatch.setattr(worker, "process_document_job", process_document_job)
+    monkeypatch.setattr(worker, "mark_document_failed", lambda document_id, reason: calls["failed"].append(document_id))
+    monkeypatch.setattr(worker, "job_scheduler", calls["scheduler"])
+    return calls
+
+
+def test_jobs_are_acknowledged_after_they_finish():
+    conf = worker.celery_app.conf
+    assert conf.task_acks_late and conf.task_reject_on_worker_lost
+    assert conf.worker_prefetch_multiplier == 1
+
+
+def test_jobs_run_in_threads_of_one_process():
+    # Daemonic prefork processes could not start the NLP and PDF process pools
+    assert worker.celery_app.conf.worker_pool in ("threads", "solo")
+
+
+def test_jobs_of_all_threads_share_one_event_loop():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    loops = []
+    threads = [threading.Thread(target=lambda: loops.append(worker._run(current_loop()))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loops) == 3 and len(set(loops)) == 1
+
+
+def test_failed_job_is_retried(job):
+    job.update(error=RuntimeError("broker hiccup"), fail_times=2)
+
+    worker.process_document_task.apply(kwargs=JOB)
+
+    assert job["attempts"] == 3
+    assert job["failed"] == []
+    assert job["scheduler"].finished == [("job-id", True)]
+
+
+def test_document_fails_once_retries_are_exhausted(job):
+    job.update(error=RuntimeError("always broken"), fail_times=100)
+
+    result = worker.process_document_task.apply(kwargs=JOB)
+
+    assert result.failed()
+    assert job["attempts"] == settings.JOB_MAX_RETRIES + 1
+    assert job["failed"] == ["document-id"]
+    assert job["scheduler"].finished == [("job-id", False)]
+
+
+def test_missing_file_is_not_retried(job):
+    job.update(error=FileNotFoundError("document.txt"), fail_times=100)
+
+    worker.process_document_task.apply(kwargs=JOB)
+
+    assert job["attempts"] == 1
+    assert job["failed"] == ["document-id"]
+
+
+def test_timed_out_job_is_not_retried(job):
+    job.update(error=JobTimeoutError(NLP, 5, "stage"), fail_times=100)
+
+    worker.process_document_task.apply(kwargs=JOB)
+
+    assert job["attempts"] == 1
+    assert job["failed"] == ["document-id"]
+    assert job["scheduler"].finished == [("job-id", False)]
+
+
+def test_cancelled_job_is_dropped(job):
+    job.update(error=JobCancelledError(), fail_times=100)
+
+    worker.process_document_task.apply(kwargs=JOB)
+
+    assert job["attempts"] == 1
+    assert job["failed"] == []
+    assert job["scheduler"].finished == []
+
+
+def test_redelivered_job_that_is_no_longer_running_is_skipped(job):
+    job["scheduler"].running = False
+
+    worker.process_document_task.apply(kwargs=JOB)
+
+    assert job["attempts"] == 0
+    assert job["scheduler"].finished == []
+
+
+def test_jobs_stop_at_the_soft_time_limit_without_celery():
+    # The threads and solo pools ignore soft_time_limit; the job checks it itself
+    assert worker._job_control(JOB["job_id"]).job_timeout == worker.JOB_SOFT_TIME_LIMIT
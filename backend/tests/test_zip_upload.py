@@ -0,0 +1,50 @@
+import io
+import zipfile
+
+from app.services.upload_storage import save_zip_entries
+
+
+def _archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def _save(tmp_path, files, max_entries=10, max_total_size=1000, max_size=1000):
+    entries = save_zip_entries(
+        _archive(files), tmp_path, max_entries, max_total_size, max_size=max_size, chunk_size=16
+    )
+    return {entry["filename"]: entry.get("error") for entry in entries}, entries
+
+
+def test_supported_files_are_stored(tmp_path):
+    errors, entries = _save(tmp_path, {
+        "notes/a.txt": "first", "b.pdf": "second", "c.exe": "x", "__MACOSX/._a.txt": "fork", "notes/.hidden.txt": "",
+    })
+
+    assert errors == {"notes/a.txt": None, "b.pdf": None, "c.exe": "File type .exe not supported"}
+    stored = {entry["file_name"]: entry for entry in entries if "id" in entry}
+    assert (tmp_path / f"{stored['a.txt']['id']}.txt").read_text() == "first"
+    assert stored["b.pdf"]["file_size"] == len("second")
+
+
+def test_size_limits_count_decompressed_bytes(tmp_path):
+    # Compresses to a few bytes, but decompresses beyond the limit
+    errors, _ = _save(tmp_path, {"bomb.txt": "0" * 5000, "small.txt": "ok"}, max_size=100, max_total_size=10000)
+    assert errors == {"bomb.txt": "File too large", "small.txt": None}
+
+    errors, _ = _save(tmp_path, {"a.txt": "a" * 60, "b.txt": "b" * 60}, max_size=100, max_total_size=100)
+    assert errors == {"a.txt": None, "b.txt": "Upload exceeds the total size limit"}
+    # Partly written files are removed
+    assert not list(tmp_path.glob(".upload-*"))
+
+
+def test_entry_limit_and_invalid_archives(tmp_path):
+    errors, _ = _save(tmp_path, {f"{i}.txt": str(i) for i in range(3)}, max_entries=2)
+    assert errors == {"0.txt": None, "1.txt": None, "2.txt": "Too many files in one upload"}
+
+    entries = save_zip_entries(io.BytesIO(b"not a zip"), tmp_path, 10, 1000)
+    assert entries == [{"filename": "", "error": "Not a valid ZIP archive"}]
@@ -0,0 +1,3 @@
+DROP INDEX IF EXISTS public.ix_documents_content_hash;
+
+ALTER TABLE public.documents DROP COLUMN IF EXISTS content_hash;
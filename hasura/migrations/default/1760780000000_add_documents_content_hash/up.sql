@@ -0,0 +1,4 @@
+-- SHA-256 of the uploaded file, computed while the upload is streamed to disk.
+ALTER TABLE public.documents ADD COLUMN content_hash character varying(64);
+
+CREATE INDEX ix_documents_content_hash ON public.documents (content_hash);
@@ -0,0 +1,13 @@
+-- Processing results keyed by file content hash and pipeline version.
+CREATE TABLE public.processing_cache (
+    content_hash character varying(64) NOT NULL,
+    pipeline_version character varying(64) NOT NULL,
+    result jsonb NOT NULL,
+    size_bytes integer DEFAULT 0 NOT NULL,
+    hit_count integer DEFAULT 0,
+    created_at timestamp with time zone DEFAULT now(),
+    last_used_at timestamp with time zone DEFAULT now(),
+    PRIMARY KEY (content_hash, pipeline_version)
+);
+
+CREATE INDEX ix_processing_cache_last_used_at ON public.processing_cache (last_used_at);
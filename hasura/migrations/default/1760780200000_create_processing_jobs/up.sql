@@ -0,0 +1,14 @@
+-- Processing jobs waiting for or holding a slot of the fair-share scheduler.
+CREATE TABLE public.processing_jobs (
+    id uuid DEFAULT gen_random_uuid() NOT NULL PRIMARY KEY,
+    document_id uuid NOT NULL REFERENCES public.documents (id) ON DELETE CASCADE,
+    user_id uuid NOT NULL REFERENCES public.users (id),
+    lane integer DEFAULT 1 NOT NULL,
+    status character varying(20) DEFAULT 'queued' NOT NULL,
+    created_at timestamp with time zone DEFAULT now(),
+    started_at timestamp with time zone,
+    finished_at timestamp with time zone
+);
+
+CREATE INDEX ix_processing_jobs_document_id ON public.processing_jobs (document_id);
+CREATE INDEX ix_processing_jobs_dispatch ON public.processing_jobs (status, user_id, lane, created_at);
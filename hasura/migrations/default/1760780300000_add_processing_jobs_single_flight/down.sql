@@ -0,0 +1,6 @@
+DROP INDEX IF EXISTS public.ux_processing_jobs_active_content;
+DROP INDEX IF EXISTS public.ux_processing_jobs_active_document;
+DROP INDEX IF EXISTS public.ix_processing_jobs_leader_id;
+
+ALTER TABLE public.processing_jobs DROP COLUMN IF EXISTS leader_id;
+ALTER TABLE public.processing_jobs DROP COLUMN IF EXISTS content_hash;
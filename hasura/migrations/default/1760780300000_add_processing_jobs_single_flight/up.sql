@@ -0,0 +1,12 @@
+-- Single-flight processing: identical content is processed by one leader job,
+-- and jobs of other documents with the same content attach to it.
+ALTER TABLE public.processing_jobs ADD COLUMN content_hash character varying(64);
+ALTER TABLE public.processing_jobs ADD COLUMN leader_id uuid REFERENCES public.processing_jobs (id) ON DELETE SET NULL;
+
+CREATE INDEX ix_processing_jobs_leader_id ON public.processing_jobs (leader_id);
+
+-- At most one active job per document and one queued or running job per content
+CREATE UNIQUE INDEX ux_processing_jobs_active_document ON public.processing_jobs (document_id)
+    WHERE status IN ('queued', 'running', 'attached');
+CREATE UNIQUE INDEX ux_processing_jobs_active_content ON public.processing_jobs (content_hash)
+    WHERE status IN ('queued', 'running');
@@ -0,0 +1 @@
+ALTER TABLE public.documents DROP COLUMN IF EXISTS error_message;
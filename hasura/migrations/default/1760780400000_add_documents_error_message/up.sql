@@ -0,0 +1,2 @@
+-- Reason of the last failed processing, shown to the user
+ALTER TABLE public.documents ADD COLUMN error_message text;
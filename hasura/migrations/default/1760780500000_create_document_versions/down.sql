@@ -0,0 +1,4 @@
+DROP TABLE IF EXISTS public.document_blocks;
+DROP TABLE IF EXISTS public.document_versions;
+
+ALTER TABLE public.documents DROP COLUMN IF EXISTS version;
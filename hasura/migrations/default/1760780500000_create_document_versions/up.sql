@@ -0,0 +1,33 @@
+-- Document versions and the per-block results reused by incremental processing.
+ALTER TABLE public.documents ADD COLUMN version integer DEFAULT 1 NOT NULL;
+
+CREATE TABLE public.document_versions (
+    id uuid DEFAULT gen_random_uuid() NOT NULL PRIMARY KEY,
+    document_id uuid NOT NULL REFERENCES public.documents (id) ON DELETE CASCADE,
+    version integer NOT NULL,
+    file_name character varying(255) NOT NULL,
+    file_path character varying(500) NOT NULL,
+    file_size integer NOT NULL,
+    content_hash character varying(64),
+    pipeline_version character varying(64),
+    block_count integer DEFAULT 0,
+    reused_blocks integer DEFAULT 0,
+    created_at timestamp with time zone DEFAULT now()
+);
+
+CREATE UNIQUE INDEX ux_document_versions_document_version ON public.document_versions (document_id, version);
+
+CREATE TABLE public.document_blocks (
+    version_id uuid NOT NULL REFERENCES public.document_versions (id) ON DELETE CASCADE,
+    position integer NOT NULL,
+    block_hash character varying(64) NOT NULL,
+    unit_count integer NOT NULL,
+    result jsonb NOT NULL,
+    PRIMARY KEY (version_id, position)
+);
+
+CREATE INDEX ix_document_blocks_version_hash ON public.document_blocks (version_id, block_hash);
+
+-- Existing documents start at version 1
+INSERT INTO public.document_versions (document_id, version, file_name, file_path, file_size, content_hash, created_at)
+SELECT id, 1, file_name, file_path, file_size, content_hash, created_at FROM public.documents;
@@ -0,0 +1,7 @@
+ALTER TABLE public.documents DROP COLUMN IF EXISTS processing_stages;
+
+DELETE FROM public.processing_cache WHERE namespace <> 'document';
+ALTER TABLE public.processing_cache DROP CONSTRAINT processing_cache_pkey;
+ALTER TABLE public.processing_cache ADD PRIMARY KEY (content_hash, pipeline_version);
+ALTER TABLE public.processing_cache DROP COLUMN IF EXISTS output_hash;
+ALTER TABLE public.processing_cache DROP COLUMN IF EXISTS namespace;
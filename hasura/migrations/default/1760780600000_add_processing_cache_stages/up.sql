@@ -0,0 +1,9 @@
+-- Outputs of individual processing stages share the processing cache, one
+-- namespace per stage; output_hash is the cache key of the next stage.
+ALTER TABLE public.processing_cache ADD COLUMN namespace character varying(32) DEFAULT 'document' NOT NULL;
+ALTER TABLE public.processing_cache ADD COLUMN output_hash character varying(64);
+ALTER TABLE public.processing_cache DROP CONSTRAINT processing_cache_pkey;
+ALTER TABLE public.processing_cache ADD PRIMARY KEY (namespace, content_hash, pipeline_version);
+
+-- Which stages the last processing run reused or ran
+ALTER TABLE public.documents ADD COLUMN processing_stages jsonb;
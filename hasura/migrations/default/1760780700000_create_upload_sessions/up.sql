@@ -0,0 +1,17 @@
+-- Sessions of resumable uploads; the partial data lives on disk.
+CREATE TABLE public.upload_sessions (
+    id uuid DEFAULT gen_random_uuid() NOT NULL PRIMARY KEY,
+    user_id uuid NOT NULL REFERENCES public.users (id) ON DELETE CASCADE,
+    file_name character varying(255) NOT NULL,
+    title character varying(255),
+    mime_type character varying(100),
+    file_size integer NOT NULL,
+    file_path character varying(500) NOT NULL,
+    received jsonb DEFAULT '[]'::jsonb NOT NULL,
+    created_at timestamp with time zone DEFAULT now(),
+    updated_at timestamp with time zone DEFAULT now(),
+    expires_at timestamp with time zone NOT NULL
+);
+
+CREATE INDEX ix_upload_sessions_user_id ON public.upload_sessions (user_id);
+CREATE INDEX ix_upload_sessions_expires_at ON public.upload_sessions (expires_at);
@@ -0,0 +1,9 @@
+-- Reference counts of content-addressed stored files, shared by identical uploads.
+-- Files stored before this migration keep their paths in documents.file_path.
+CREATE TABLE public.blobs (
+    key character varying(500) NOT NULL PRIMARY KEY,
+    content_hash character varying(64) NOT NULL,
+    size integer NOT NULL,
+    ref_count integer DEFAULT 1 NOT NULL,
+    created_at timestamp with time zone DEFAULT now()
+);
@@ -0,0 +1,6 @@
+DROP INDEX IF EXISTS public.ix_documents_uploaded_by_status_created_id;
+DROP INDEX IF EXISTS public.ix_documents_status_created_id;
+DROP INDEX IF EXISTS public.ix_documents_uploaded_by_created_id;
+DROP INDEX IF EXISTS public.ix_documents_created_id;
+
+ALTER TABLE public.documents ALTER COLUMN created_at DROP NOT NULL;
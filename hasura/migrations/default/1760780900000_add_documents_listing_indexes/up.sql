@@ -0,0 +1,8 @@
+-- Keyset pagination of document listings, newest first, on (created_at, id).
+UPDATE public.documents SET created_at = now() WHERE created_at IS NULL;
+ALTER TABLE public.documents ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX ix_documents_created_id ON public.documents (created_at DESC, id DESC);
+CREATE INDEX ix_documents_uploaded_by_created_id ON public.documents (uploaded_by, created_at DESC, id DESC);
+CREATE INDEX ix_documents_status_created_id ON public.documents (status, created_at DESC, id DESC);
+CREATE INDEX ix_documents_uploaded_by_status_created_id ON public.documents (uploaded_by, status, created_at DESC, id DESC);
@@ -0,0 +1,3 @@
+ALTER TABLE public.documents DROP COLUMN IF EXISTS chunk_offsets;
+ALTER TABLE public.documents DROP COLUMN IF EXISTS sentence_offsets;
+ALTER TABLE public.documents DROP COLUMN IF EXISTS cleaned_text;
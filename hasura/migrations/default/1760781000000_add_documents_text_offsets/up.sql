@@ -0,0 +1,7 @@
+-- Sentences and chunks as offsets into one stored cleaned text, instead of
+-- chunk texts in processed_chunks. Offsets are packed unsigned 32-bit
+-- little-endian integers. processed_chunks is kept for documents processed
+-- before.
+ALTER TABLE public.documents ADD COLUMN cleaned_text text;
+ALTER TABLE public.documents ADD COLUMN sentence_offsets bytea;
+ALTER TABLE public.documents ADD COLUMN chunk_offsets bytea;
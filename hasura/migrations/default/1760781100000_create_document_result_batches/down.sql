@@ -0,0 +1 @@
+DROP TABLE IF EXISTS public.document_result_batches;
@@ -0,0 +1,15 @@
+-- Result batches of documents being streamed, assembled into the document when it completes.
+CREATE TABLE public.document_result_batches (
+    document_id uuid NOT NULL REFERENCES public.documents (id) ON DELETE CASCADE,
+    seq integer NOT NULL,
+    raw_text text NOT NULL,
+    cleaned_text text NOT NULL,
+    sentence_offsets bytea NOT NULL,
+    chunk_offsets bytea NOT NULL,
+    entities jsonb NOT NULL,
+    key_phrases jsonb NOT NULL,
+    sections jsonb NOT NULL,
+    word_count integer NOT NULL,
+    sentence_count integer NOT NULL,
+    PRIMARY KEY (document_id, seq)
+);
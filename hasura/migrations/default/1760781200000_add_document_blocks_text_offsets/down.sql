@@ -0,0 +1,4 @@
+DELETE FROM public.document_blocks;
+UPDATE public.document_versions SET pipeline_version = NULL;
+ALTER TABLE public.document_blocks DROP COLUMN IF EXISTS sentence_offsets;
+ALTER TABLE public.document_blocks DROP COLUMN IF EXISTS text;
@@ -0,0 +1,8 @@
+-- Blocks keep their cleaned text once, with sentences as packed start and
+-- end offsets into it and entities and noun chunks in result as offsets
+-- too. Blocks stored before hold full strings in result and are dropped;
+-- they are analysed again when their documents are next processed.
+DELETE FROM public.document_blocks;
+UPDATE public.document_versions SET pipeline_version = NULL;
+ALTER TABLE public.document_blocks ADD COLUMN text text NOT NULL;
+ALTER TABLE public.document_blocks ADD COLUMN sentence_offsets bytea NOT NULL;